@@ -0,0 +1,38 @@
+"""
+Агент распределённой нагрузки: выполняет доли шагов сценариев по командам координатора (runner.py --agents)
+
+Запуск на каждой машине, создающей нагрузку:
+
+    python agent.py --host 0.0.0.0 --port 9109
+
+Параметры подключения к InfluxDB агент получает от координатора вместе с шагом. Агент не проверяет, кто отправил
+шаг, поэтому по умолчанию принимает соединения только с локальной машины: адрес --host, доступный координатору,
+задаётся явно, а порт агента открывается только в сети нагрузочного стенда
+"""
+import argparse
+import time
+
+from stress_tester.distributed import Agent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='Адрес, на котором агент принимает соединения (0.0.0.0 - все адреса машины)')
+    parser.add_argument('--port', type=int, default=9109, help='Порт')
+    parser.add_argument('--name', help='Имя агента в отчётах. По умолчанию - имя машины и порт')
+    args = parser.parse_args()
+    
+    agent = Agent(args.port, args.host, args.name).start()
+    print(f'Агент {agent.name}: http://{args.host}:{agent.port}')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        agent.stop()
+
+
+if __name__ == '__main__':
+    main()
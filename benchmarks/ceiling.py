@@ -0,0 +1,110 @@
+"""
+Предельная скорость записи самого инструмента для каждого способа одновременной записи и генерации данных
+
+Запись выполняется в замену InfluxDB (stress_tester.mock_server), запущенную в отдельном процессе, поэтому
+результат показывает, сколько точек и запросов в секунду способен создать и отправить StressTester.
+Если скорость записи в настоящую СУБД намного ниже, узкое место - СУБД, а не генератор нагрузки.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.ceiling --nodes 20 --duration 600 --batch-sizes 100,5000
+"""
+import argparse
+import multiprocessing
+import socket
+import time
+from itertools import product
+
+import requests
+
+from stress_tester import StressTester
+from stress_tester.mock_server import serve
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, latency: float) -> multiprocessing.Process:
+    """
+    Запуск замены InfluxDB в отдельном процессе с ожиданием готовности
+    """
+    process = multiprocessing.Process(target=serve, kwargs=dict(port=port, latency=latency), daemon=True)
+    process.start()
+    for _ in range(100):
+        try:
+            requests.get(f'http://127.0.0.1:{port}/ping', timeout=1).raise_for_status()
+            return process
+        except requests.RequestException:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError('Замена InfluxDB не запустилась')
+
+
+def server_points(port: int) -> int:
+    """
+    :return: Количество точек, принятых заменой InfluxDB
+    """
+    data = requests.get(f'http://127.0.0.1:{port}/debug/vars').json()
+    return data['httpd::mock']['values']['pointsWrittenOK']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=20, help='Количество одновременно пишущих узлов')
+    parser.add_argument('--duration', type=int, default=600, help='Количество секунд данных узла')
+    parser.add_argument('--batch-sizes', default='100,5000',
+                        help='Размеры пакетов через запятую: малые пакеты ограничивают скорость запросов, '
+                             'большие - скорость точек')
+    parser.add_argument('--engines', default='threads,asyncio,processes', help='Способы одновременной записи')
+    parser.add_argument('--workers', type=int, help='Количество процессов для engine=processes')
+    parser.add_argument('--compression', action='store_true', help='Добавить замеры со сжатием gzip')
+    parser.add_argument('--stream', action='store_true', help='Генерировать данные по мере отправки')
+    parser.add_argument('--latency', type=float, default=0.0, help='Задержка ответа замены InfluxDB (в секундах)')
+    parser.add_argument('--repeat', type=int, default=3, help='Количество повторов, берётся лучший результат')
+    args = parser.parse_args()
+    
+    engines = args.engines.split(',')
+    generators = ['python'] if numpy is None or args.stream else ['python', 'numpy']
+    compressions = [None, 'gzip'] if args.compression else [None]
+    batch_sizes = [int(batch_size) for batch_size in args.batch_sizes.split(',')]
+    
+    port = free_port()
+    server = start_server(port, args.latency)
+    try:
+        tester = StressTester('127.0.0.1', port, server_stats_interval=0)
+        tester.create_db()
+        
+        print(f'{"способ":>9} {"генерация":>9} {"сжатие":>6} {"пакет":>6} {"точек/сек.":>11} {"запросов/сек.":>13} '
+              f'{"МБ/сек.":>8} {"p99, сек.":>9} {"ошибок":>7} {"принято":>7}')
+        
+        for engine, generator, compression, batch_size in product(engines, generators, compressions, batch_sizes):
+            results = []
+            for seed in range(args.repeat):
+                received = server_points(port)
+                result = tester.write(args.nodes, duration=args.duration, batch_size=batch_size, seed=seed,
+                                      generator=generator, engine=engine, workers=args.workers,
+                                      compression=compression, stream=args.stream)
+                results.append((result, server_points(port) - received))
+            result, received = max(results, key=lambda pair: pair[0].points_per_second)
+            requests_per_second = result.requests / result.duration if result.duration else 0.0
+            print(f'{engine:>9} {generator:>9} {compression or "нет":>6} {batch_size:>6} '
+                  f'{result.points_per_second:>11.0f} {requests_per_second:>13.0f} '
+                  f'{result.bytes_per_second / 1024 / 1024:>8.2f} {result.p99:>9.3f} {result.errors:>7} '
+                  f'{"да" if received == result.points else "нет":>7}')
+    finally:
+        server.terminate()
+        server.join()
+    
+    print('Принято - совпадает ли количество точек, подсчитанное заменой InfluxDB, с отправленным')
+
+
+if __name__ == '__main__':
+    main()
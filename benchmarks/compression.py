@@ -0,0 +1,64 @@
+"""
+Сравнение степени и скорости сжатия тел запросов на запись и оценка скорости записи через канал заданной ширины
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.compression --bandwidth 100
+    python -m benchmarks.compression --bandwidth 100 --signals realistic
+"""
+import argparse
+
+from stress_tester import Signals, StressTester
+from stress_tester.compression import CompressedBatch
+
+
+def measure(batch: bytes, encoding: str, compresslevel: int, repeat: int) -> CompressedBatch:
+    """
+    :return: Сжатое тело с наименьшим из repeat замеров временем сжатия
+    """
+    return min((CompressedBatch(batch, encoding, compresslevel) for _ in range(repeat)),
+               key=lambda compressed: compressed.cpu_time)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--duration', type=int, default=10000, help='Количество секунд данных узла')
+    parser.add_argument('--sensors', type=int, default=1, help='Количество датчиков каждого типа')
+    parser.add_argument('--bandwidth', type=float, default=100, help='Ширина канала до InfluxDB (Мбит/сек.)')
+    parser.add_argument('--repeat', type=int, default=3, help='Количество повторов, берётся лучший результат')
+    parser.add_argument('--signals', help='Набор моделей значений датчиков (realistic). По умолчанию - равномерно '
+                                          'распределённые значения')
+    args = parser.parse_args()
+    
+    tester = StressTester('localhost')
+    signals = Signals.from_config(args.signals) if args.signals else None
+    lines = tester._node_lines('1', args.sensors, args.sensors, args.sensors, args.sensors, args.duration, 0, seed=0,
+                               signals=signals)
+    batch = b'\n'.join(lines)
+    points = args.duration * args.sensors * 4
+    bandwidth = args.bandwidth * 1000 * 1000 / 8
+    
+    print(f'{"способ":>10} {"раз":>8} {"МБ/сек.":>8} {"точек/сек. последовательно":>27} '
+          f'{"точек/сек. параллельно":>23}')
+    
+    transfer_time = len(batch) / bandwidth
+    print(f'{"нет":>10} {1:>8.2f} {"-":>8} {points / transfer_time:>27.0f} {points / transfer_time:>23.0f}')
+    
+    for encoding in ('gzip', 'deflate'):
+        for compresslevel in (1, 3, 6, 9):
+            compressed = measure(batch, encoding, compresslevel, args.repeat)
+            ratio = len(batch) / len(compressed.data)
+            speed = len(batch) / compressed.cpu_time / 1024 / 1024
+            transfer_time = len(compressed.data) / bandwidth
+            sequential = points / (compressed.cpu_time + transfer_time)
+            parallel = points / max(compressed.cpu_time, transfer_time)
+            print(f'{f"{encoding}-{compresslevel}":>10} {ratio:>8.2f} {speed:>8.1f} {sequential:>27.0f} '
+                  f'{parallel:>23.0f}')
+    
+    print(f'Скорость записи оценена для канала {args.bandwidth:g} Мбит/сек. без учёта времени обработки '
+          f'запроса СУБД: последовательно - сжатие в потоке отправки, '
+          f'параллельно - сжатие следующего пакета во время отправки текущего (parallel_compression)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Сравнение скорости генерации строк line protocol построчным (python) и векторизованным (numpy) способами
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.line_generation
+"""
+import argparse
+import time
+
+from stress_tester import StressTester
+
+
+def measure(tester: StressTester, generator: str, duration: int, sensors: int, seed: int) -> float:
+    """
+    :return: Время (в секундах) генерации и склейки данных одного узла
+    """
+    started = time.perf_counter()
+    lines = tester._node_lines('1', sensors, sensors, sensors, sensors, duration, 0, seed, generator)
+    b'\n'.join(lines)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--duration', type=int, default=10000, help='Количество секунд данных узла')
+    parser.add_argument('--sensors', type=int, default=1, help='Количество датчиков каждого типа')
+    parser.add_argument('--repeat', type=int, default=3, help='Количество повторов, берётся лучший результат')
+    args = parser.parse_args()
+    
+    tester = StressTester('localhost')
+    points = args.duration * args.sensors * 4
+    
+    results = {}
+    for generator in ('python', 'numpy'):
+        results[generator] = min(
+            measure(tester, generator, args.duration, args.sensors, seed)
+            for seed in range(args.repeat)
+        )
+        print(f'{generator:>6}: {results[generator]:.3f} сек., {points / results[generator]:.0f} точек/сек.')
+    
+    print(f'Ускорение: {results["python"] / results["numpy"]:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Сравнение скорости кодирования line protocol: прежние вложенные шаблоны и текущая генерация
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.line_protocol
+"""
+import argparse
+import random
+import time
+from itertools import chain
+from typing import Callable, Iterator
+
+from stress_tester import StressTester
+
+
+def template_node_lines(tester: StressTester, node_name: str, sensors: int, duration: int,
+                        seed: int) -> Iterator[bytes]:
+    """
+    Генерация строк вложенными шаблонами str.format, как до появления модуля line_protocol
+    """
+    rng = random.Random(f'{seed}:{node_name}')
+    
+    dot_template = 'python_measurement,thread={} {{{{}}}}={{{{}}}},q=0 {{}}'.format(node_name)
+    
+    return (
+        line.encode()
+        for time_template in map(dot_template.format, map((1000).__mul__, range(duration)))
+        for line in chain(
+            (time_template.format('float', tester._random_float(rng)) for _ in range(sensors)),
+            (time_template.format('int', tester._random_int(rng)) for _ in range(sensors)),
+            (time_template.format('str', tester._random_str(rng)) for _ in range(sensors)),
+            (time_template.format('bool', tester._random_bool(rng)) for _ in range(sensors)),
+        )
+    )
+
+
+def best_time(function: Callable[[], object], repeat: int) -> float:
+    """
+    :return: Наименьшее из repeat время (в секундах) выполнения функции
+    """
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--duration', type=int, default=10000, help='Количество секунд данных узла')
+    parser.add_argument('--sensors', type=int, default=1, help='Количество датчиков каждого типа')
+    parser.add_argument('--repeat', type=int, default=3, help='Количество повторов, берётся лучший результат')
+    args = parser.parse_args()
+    
+    tester = StressTester('localhost')
+    points = args.duration * args.sensors * 4
+    
+    print('Генерация данных узла (строки line protocol):')
+    results = dict(
+        template=best_time(
+            lambda: b'\n'.join(template_node_lines(tester, '1', args.sensors, args.duration, 0)), args.repeat
+        ),
+        current=best_time(
+            lambda: b'\n'.join(tester._node_lines('1', args.sensors, args.sensors, args.sensors, args.sensors,
+                                                  args.duration, 0, 0)),
+            args.repeat
+        )
+    )
+    for name, seconds in results.items():
+        print(f'{name:>10}: {seconds:.3f} сек., {points / seconds:.0f} точек/сек.')
+    print(f'Ускорение: {results["template"] / results["current"]:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Сравнение скорости записи в InfluxDB и объёма передаваемых данных при разной точности меток времени
+
+Запуск из корня репозитория (InfluxDB - из файла параметров подключения):
+
+    python -m benchmarks.precision --nodes 10 --duration 600 --sample-interval 0.1
+"""
+import argparse
+import json
+from pathlib import Path
+
+from stress_tester import StressTester
+from stress_tester.line_protocol import PRECISIONS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--config', default=str(Path(__file__).parent.parent / 'influxdb_config.json'),
+                        help='Файл с параметрами подключения к InfluxDB')
+    parser.add_argument('--nodes', type=int, default=10, help='Количество одновременно пишущих узлов')
+    parser.add_argument('--duration', type=int, default=600, help='Количество секунд данных узла')
+    parser.add_argument('--sample-interval', type=float, default=1.0,
+                        help='Интервал между значениями датчика (в секундах). Точности, которым он не кратен, '
+                             'пропускаются')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Количество точек в одном запросе')
+    parser.add_argument('--repeat', type=int, default=3, help='Количество повторов, берётся лучший результат')
+    args = parser.parse_args()
+    
+    with open(args.config, mode='r', encoding='utf-8') as fp:
+        config = json.load(fp)
+    
+    print(f'{"точность":>8} {"точек/сек.":>11} {"МБ/сек.":>8} {"байт/точку":>10} {"p99, сек.":>9} {"ошибок":>7}')
+    
+    for precision in PRECISIONS:
+        tester = StressTester(**dict(config, precision=precision, server_stats_interval=0))
+        try:
+            tester._sampling(args.duration, args.sample_interval)
+        except ValueError:
+            print(f'{precision:>8} интервал {args.sample_interval:g} сек. не кратен точности')
+            continue
+        
+        results = []
+        for seed in range(args.repeat):
+            tester.drop_db()
+            tester.create_db()
+            results.append(tester.write(args.nodes, duration=args.duration, batch_size=args.batch_size,
+                                        seed=seed, sample_interval=args.sample_interval))
+        result = max(results, key=lambda run_result: run_result.points_per_second)
+        bytes_per_point = result.bytes / result.points if result.points else 0.0
+        print(f'{precision:>8} {result.points_per_second:>11.0f} {result.bytes_per_second / 1024 / 1024:>8.2f} '
+              f'{bytes_per_point:>10.1f} {result.p99:>9.3f} {result.errors:>7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Сравнение замеров из хранилища результатов и поиск статистически значимых регрессий
+
+Запуск:
+
+    python compare.py --list
+    python compare.py baseline 20201018T020000-3fa9c1
+
+Замер задаётся идентификатором или меткой (метка выбирает все замеры с этой меткой). Код возврата - 1,
+если найдены регрессии
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from stress_tester import ResultsStore
+from stress_tester.regression import compare_runs
+
+_VERDICTS = dict(regression='регрессия', improvement='улучшение', unchanged='без изменений',
+                 insufficient='мало повторов')
+
+
+def _format(value: float, metric: str) -> str:
+    if metric.endswith('_per_second'):
+        return f'{value:.0f}/сек.'
+    return f'{value:.3f} сек.'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('baseline', nargs='?', help='Идентификатор или метка базового замера')
+    parser.add_argument('candidate', nargs='?', help='Идентификатор или метка сравниваемого замера')
+    parser.add_argument('--store', default=str(Path(__file__).parent / 'results.jsonl'),
+                        help='Хранилище результатов замеров')
+    parser.add_argument('--list', action='store_true', help='Вывести список замеров')
+    parser.add_argument('--alpha', type=float, default=0.01, help='Уровень значимости')
+    parser.add_argument('--threshold', type=float, default=0.05,
+                        help='Минимальное относительное изменение показателя')
+    args = parser.parse_args()
+    
+    store = ResultsStore(args.store)
+    
+    if args.list or not args.candidate:
+        for run in store.runs():
+            print(f'{run["run"]} {run["label"] or "-"} InfluxDB {run["influxdb_version"] or "?"}: '
+                  f'{", ".join(run["scenarios"])}')
+        return
+    
+    baseline = store.records(args.baseline)
+    candidate = store.records(args.candidate)
+    for selector, records in ((args.baseline, baseline), (args.candidate, candidate)):
+        if not records:
+            sys.exit(f'Замер {selector} не найден в {args.store}')
+    
+    rows = compare_runs(baseline, candidate, args.alpha, args.threshold)
+    for row in rows:
+        change = '-' if row['change'] is None else f'{row["change"]:+.1%}'
+        p_value = '-' if row['p_value'] is None else f'{row["p_value"]:.3g}'
+        print(f'{row["scenario"]}/{row["step"]} {row["part"]} {row["metric"]}: '
+              f'{_format(row["baseline"], row["metric"])} -> {_format(row["candidate"], row["metric"])} '
+              f'({change}, p={p_value}) {_VERDICTS[row["verdict"]]}')
+    
+    regressions = sum(row['verdict'] == 'regression' for row in rows)
+    print(f'Регрессий: {regressions}')
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,12 +2,13 @@ import json
 from pathlib import Path
 
 from menu import get_menu
+from stress_tester import ResultsStore
 
 
 def main():
     with (Path(__file__).parent / 'influxdb_config.json').open(mode='r') as fp:
         config = json.load(fp)
-    menu = get_menu(config)
+    menu = get_menu(config, ResultsStore(Path(__file__).parent / 'results.jsonl'))
     menu.call()
 
 
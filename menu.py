@@ -4,7 +4,8 @@ from abc import ABC
 from datetime import datetime
 
 from console_menu import MenuLayer, MenuEntry
-from stress_tester import StressTester
+from stress_tester import StressTester, ResultsStore
+from stress_tester.results_store import environment
 
 
 def _parse_date(date_str: str):
@@ -40,7 +41,8 @@ def _get_write_menu():
     class WriteMenu(DefaultMenu):
         name = 'Оценка скорости записи'
         
-        __slots__ = ('nodes_count', 'float_sensors', 'int_sensors', 'str_sensors', 'bool_sensors', 'duration')
+        __slots__ = ('nodes_count', 'float_sensors', 'int_sensors', 'str_sensors', 'bool_sensors', 'duration',
+                     'batch_size', 'max_batch_bytes', 'stream', 'compresslevel')
         
         def __init__(self):
             super(WriteMenu, self).__init__()
@@ -51,6 +53,10 @@ def _get_write_menu():
             self.bool_sensors: int = 1
             self.duration: int = 1
             self.start_date: datetime = None  # noqa
+            self.batch_size: int = 0
+            self.max_batch_bytes: int = 0
+            self.stream: int = 0
+            self.compresslevel: int = 0
     
     write_menu = WriteMenu()
     
@@ -100,9 +106,16 @@ def _get_write_menu():
                                         'На протяжении скольки секунд копились данные для записи каждым узлом ({} сек)')
     start_date_entry = WriteParamDatetimeEntry('start_date',
                                                'Начиная с какой даты вести запись (None - с текущего момента) ({})')
+    batch_size_entry = WriteParamIntEntry('batch_size',
+                                          'Максимальное количество точек в запросе (0 - без ограничения) ({})')
+    max_batch_bytes_entry = WriteParamIntEntry('max_batch_bytes',
+                                               'Максимальный размер запроса в байтах (0 - без ограничения) ({})')
+    stream_entry = WriteParamIntEntry('stream', 'Генерировать данные во время отправки (0 - нет, 1 - да) ({})')
+    compresslevel_entry = WriteParamIntEntry('compresslevel', 'Степень сжатия gzip (0 - без сжатия, 1-9) ({})')
     
     for entry in (nodes_count_entry, float_sensors_entry, int_sensors_entry, str_sensors_entry,
-                  bool_sensors_entry, duration_entry, start_date_entry):
+                  bool_sensors_entry, duration_entry, start_date_entry, batch_size_entry, max_batch_bytes_entry,
+                  stream_entry, compresslevel_entry):
         write_menu.add_entry(entry)
     
     return write_menu  # type: WriteMenu
@@ -176,9 +189,20 @@ def _get_read_menu():
     return read_menu  # type: ReadMenu
 
 
-def get_menu(influxdb_config: dict):
+def get_menu(influxdb_config: dict, store: ResultsStore = None):
     tester = StressTester(**influxdb_config)
     
+    def save_result(action: str, params: dict):
+        if store is None:
+            return
+        run = store.new_run()
+        try:
+            store.save(run, 'menu', action, action, tester.result, params, environment(tester))
+        except OSError as ex:
+            print(f'Не удалось сохранить результат: {ex}')
+        else:
+            print(f'Результат сохранён в {store.path} (замер {run})')
+    
     class MainMenu(DefaultMenu):
         name = 'InfluxDB Stress Tool'
     
@@ -188,19 +212,25 @@ def get_menu(influxdb_config: dict):
     read_menu = _get_read_menu()
     
     def read_action():
+        params = dict(
+            nodes_count=read_menu.nodes_count,
+            aggregation=read_menu.aggregation,
+            type=read_menu.type,
+            start_date=read_menu.start_date,
+            end_date=read_menu.end_date,
+            time_interval=read_menu.time_interval
+        )
         try:
-            tester.read(
-                nodes_count=read_menu.nodes_count,
-                aggregation=read_menu.aggregation,
-                type=read_menu.type,
-                start_date=read_menu.start_date,
-                end_date=read_menu.end_date,
-                time_interval=read_menu.time_interval
-            )
+            with tester.live_progress():
+                tester.read(**params)
         except Exception as ex:
             print(f'Не удалось выполнить чтение: {ex}')
         else:
-            print(f'Время чтения: {tester.time_diff:.2f} сек.')
+            connection_stats = tester.connection_stats
+            print(tester.result)
+            print(f'Соединений открыто: {connection_stats.opened}, '
+                  f'запросов через открытые ранее соединения: {connection_stats.reused}')
+            save_result('read', params)
         
         input('Нажмите Enter, чтобы продолжить')
         read_menu.call()
@@ -213,20 +243,31 @@ def get_menu(influxdb_config: dict):
     write_menu = _get_write_menu()
     
     def write_action():
+        params = dict(
+            nodes_count=write_menu.nodes_count,
+            float_sensors=write_menu.float_sensors,
+            int_sensors=write_menu.int_sensors,
+            str_sensors=write_menu.str_sensors,
+            bool_sensors=write_menu.bool_sensors,
+            duration=write_menu.duration,
+            start_date=write_menu.start_date,
+            batch_size=write_menu.batch_size or None,
+            max_batch_bytes=write_menu.max_batch_bytes or None,
+            stream=bool(write_menu.stream),
+            compression='gzip' if write_menu.compresslevel else None,
+            compresslevel=write_menu.compresslevel or 6
+        )
         try:
-            tester.write(
-                nodes_count=write_menu.nodes_count,
-                float_sensors=write_menu.float_sensors,
-                int_sensors=write_menu.int_sensors,
-                str_sensors=write_menu.str_sensors,
-                bool_sensors=write_menu.bool_sensors,
-                duration=write_menu.duration,
-                start_date=write_menu.start_date
-            )
+            with tester.live_progress():
+                tester.write(**params)
         except Exception as ex:
             print(f'Не удалось выполнить запись: {ex}')
         else:
-            print(f'Время записи: {tester.time_diff:.2f} сек.')
+            connection_stats = tester.connection_stats
+            print(tester.result)
+            print(f'Соединений открыто: {connection_stats.opened}, '
+                  f'запросов через открытые ранее соединения: {connection_stats.reused}')
+            save_result('write', params)
         input('Нажмите Enter, чтобы продолжить')
         write_menu.call()
     
@@ -0,0 +1,112 @@
+"""
+Выполнение сценариев из файлов YAML или JSON без интерактивного меню
+
+Запуск:
+
+    python runner.py scenarios/peak.yaml scenarios/steady.yaml --output results.json
+
+Результаты шагов с нагрузкой сохраняются в хранилище (--store) для сравнения замеров (см. compare.py).
+Нагрузку можно распределить между агентами на нескольких машинах (см. agent.py):
+
+    python runner.py scenarios/peak.yaml --agents host1:9109,host2:9109
+"""
+import argparse
+import json
+import sys
+from contextlib import nullcontext
+from pathlib import Path
+
+from stress_tester import StressTester, ResultsStore
+from stress_tester.distributed import Coordinator
+from stress_tester.live import LineProtocolExporter, PrometheusExporter
+from stress_tester.mock_server import MockInfluxDB
+from stress_tester.scenario import load_scenario, run_scenario
+
+
+def _print_step(record: dict):
+    iteration = '.'.join(str(index + 1) for index in record['iteration'])
+    if 'error' in record:
+        print(f'[{iteration}] {record["name"]}: ошибка {record["error"]}', file=sys.stderr)
+    else:
+        print(f'[{iteration}] {record["name"]}: {record["result"]["duration"]:.2f} сек.', file=sys.stderr)
+
+
+def _print_progress(line: str):
+    print(line, file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('scenarios', nargs='+', help='Файлы сценариев (.yaml, .yml, .json)')
+    parser.add_argument('--config', default=str(Path(__file__).parent / 'influxdb_config.json'),
+                        help='Файл с параметрами подключения к InfluxDB')
+    parser.add_argument('--output', default='-', help='Файл для результатов в формате JSON (по умолчанию - вывод)')
+    parser.add_argument('--store', default=str(Path(__file__).parent / 'results.jsonl'),
+                        help='Хранилище результатов замеров')
+    parser.add_argument('--label', help='Метка замера в хранилище (например, версия InfluxDB)')
+    parser.add_argument('--progress', type=float, default=10,
+                        help='Интервал отчёта о ходе нагрузки (в секундах). 0 - без отчёта')
+    parser.add_argument('--export', metavar='HOST:PORT',
+                        help='InfluxDB, в которую экспортируются показатели хода нагрузки (БД --export-db)')
+    parser.add_argument('--export-db', default='stress_monitor', help='БД для показателей хода нагрузки')
+    parser.add_argument('--prometheus-port', type=int,
+                        help='Порт страницы /metrics с показателями хода нагрузки в формате Prometheus')
+    parser.add_argument('--mock', action='store_true',
+                        help='Выполнять сценарии на замене InfluxDB (stress_tester.mock_server), например, '
+                             'для проверки сценариев без СУБД')
+    parser.add_argument('--mock-store', action='store_true',
+                        help='Хранить записанные на замене InfluxDB значения для проверки записанных данных (verify)')
+    parser.add_argument('--agents', metavar='HOST:PORT,...',
+                        help='Агенты, между которыми делится нагрузка шагов write, sustain, backfill, read '
+                             'и read_mix (см. agent.py). Ход нагрузки агентов не экспортируется')
+    parser.add_argument('--start-delay', type=float, default=2.0,
+                        help='Время (в секундах) от рассылки шага агентам до общего начала нагрузки')
+    args = parser.parse_args()
+    
+    exporters = []
+    if args.export:
+        host, _, port = args.export.partition(':')
+        exporters.append(LineProtocolExporter(host, int(port or 8086), args.export_db))
+    if args.prometheus_port:
+        exporters.append(PrometheusExporter(args.prometheus_port))
+    
+    store = ResultsStore(args.store)
+    run = ResultsStore.new_run()
+    
+    with open(args.config, mode='r') as fp:
+        config = json.load(fp)
+    
+    results = []
+    with MockInfluxDB(store=args.mock_store) if args.mock else nullcontext() as mock:
+        if mock is not None:
+            config = mock.config(**config)
+        for path in args.scenarios:
+            scenario = load_scenario(path)
+            print(f'Сценарий {scenario["name"]} ({path})', file=sys.stderr)
+            tester_config = dict(config, **scenario.get('config', {}))
+            if args.agents:
+                # Координатор сам выводит ход нагрузки, объединённый по агентам
+                tester = Coordinator(args.agents.split(','), tester_config, args.start_delay,
+                                     progress_interval=args.progress, output=_print_progress)
+            else:
+                tester = StressTester(**tester_config)
+            if (args.progress or exporters) and not args.agents:
+                live = tester.live_progress(args.progress or 10, exporters=exporters,
+                                            output=_print_progress if args.progress else None)
+            else:
+                live = nullcontext()
+            with live:
+                results.append(dict(run_scenario(tester, scenario, _print_step, store, args.label, run), file=path))
+    print(f'Замер {run} сохранён в {args.store}', file=sys.stderr)
+    
+    if args.output == '-':
+        json.dump(results, sys.stdout, ensure_ascii=False, indent=2)
+    else:
+        with open(args.output, mode='w', encoding='utf-8') as fp:
+            json.dump(results, fp, ensure_ascii=False, indent=2)
+    
+    sys.exit(1 if any(result['failed'] for result in results) else 0)
+
+
+if __name__ == '__main__':
+    main()
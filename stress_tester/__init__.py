@@ -1 +1,11 @@
+from .histogram import LatencyHistogram
+from .payload_cache import PayloadCache
+from .queries import QueryMix, QueryTemplate
+from .results import RunResult, SustainedResult, MixedResult, ReadResult, BackfillResult, VerificationResult
+from .results_store import ResultsStore
+from .retry import AdaptiveLimiter, RetryPolicy
+from .schema import Schema
+from .sessions import ConnectionStats
+from .signals import Signals
 from .stress_tester import StressTester
+from .verification import Verification
@@ -0,0 +1,264 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Iterable, List, Union, Iterator, AsyncIterator, Tuple
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from .results import RunResult, CountingBody
+from .live import LiveMetrics
+from .queries import parse_content
+from .retry import RetryPolicy, classify, parse_retry_after
+from .sessions import ConnectionStats
+
+
+class _AsyncBarrier:
+    """
+    Аналог threading.Barrier для сопрограмм одного цикла событий
+    """
+    
+    def __init__(self, parties: int, action: Callable[[], None]):
+        """
+        :param parties: Количество сопрограмм, которые должны дойти до барьера
+        :param action: Функция, вызываемая при прохождении барьера последней сопрограммой
+        """
+        self._parties = parties
+        self._action = action
+        self._count = 0
+        self._event = asyncio.Event()
+    
+    async def wait(self):
+        self._count += 1
+        if self._count == self._parties:
+            self._action()
+            self._event.set()
+        else:
+            await self._event.wait()
+
+
+async def _async_chunks(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Передача синхронно генерируемых частей тела запроса с возвратом управления циклу событий после каждой части
+    """
+    for chunk in chunks:
+        yield chunk
+        await asyncio.sleep(0)
+
+
+def _trace_config(stats: ConnectionStats) -> 'aiohttp.TraceConfig':
+    """
+    :param stats: Счётчик запросов и открытых соединений
+    :return: Настройка трассировки aiohttp, учитывающая запросы и открытые соединения в ConnectionStats
+    """
+    async def _on_request_start(session, context, params):
+        stats.add_request()
+    
+    async def _on_connection_create_end(session, context, params):
+        stats.add_connection()
+    
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_connection_create_end.append(_on_connection_create_end)
+    
+    return trace_config
+
+
+def _session(connections: int, keep_alive: bool, stats: ConnectionStats,
+             timeout: float = None) -> 'aiohttp.ClientSession':
+    """
+    :param connections: Размер пула соединений. 0 - без ограничения
+    :param keep_alive: Использовать ли соединения повторно
+    :param stats: Счётчик запросов и открытых соединений
+    :param timeout: Время ожидания ответа на запрос (в секундах). None - без ограничения
+    :return: Сессия с пулом соединений
+    """
+    if aiohttp is None:
+        raise ImportError('Для асинхронного режима необходим пакет aiohttp')
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=connections, force_close=not keep_alive),
+        timeout=aiohttp.ClientTimeout(total=timeout),
+        trace_configs=[_trace_config(stats)]
+    )
+
+
+@asynccontextmanager
+async def _node_session(shared_session: 'aiohttp.ClientSession', connections: int, keep_alive: bool,
+                        stats: ConnectionStats, timeout: float = None):
+    """
+    :param shared_session: Общая сессия. None - узлу создаётся собственная сессия
+    :return: Сессия узла
+    """
+    if shared_session is not None:
+        yield shared_session
+    else:
+        async with _session(connections, keep_alive, stats, timeout) as session:
+            yield session
+
+
+@asynccontextmanager
+async def _shared_session(shared: bool, connections: int, keep_alive: bool, stats: ConnectionStats,
+                          timeout: float = None):
+    """
+    :param shared: Использовать ли всеми узлами общую сессию
+    :return: Общая сессия, либо None, если каждому узлу создаётся собственная сессия
+    """
+    if shared:
+        async with _session(connections, keep_alive, stats, timeout) as session:
+            yield session
+    else:
+        yield None
+
+
+def run_write(endpoint: str,
+              params: dict,
+              headers: dict,
+              node_names: List[str],
+              node_batches: Callable[[str], Iterable[Union[bytes, Iterator[bytes]]]],
+              start_action: Callable[[], None],
+              end_action: Callable[[], None],
+              connections: int = 100,
+              keep_alive: bool = True,
+              shared: bool = True,
+              stats: ConnectionStats = None,
+              live: LiveMetrics = None,
+              timeout: float = None,
+              retry: RetryPolicy = None) -> RunResult:
+    """
+    Одновременная запись узлами-сопрограммами
+
+    :param endpoint: Адрес /write
+    :param params: Параметры запроса на запись
+    :param headers: Заголовки запросов
+    :param node_names: Имена узлов
+    :param node_batches: Функция, возвращающая тела запросов узла. Тело запроса - либо байты, либо итератор
+        по частям тела для передачи по частям (chunked transfer encoding)
+    :param start_action: Функция, вызываемая в момент одновременного начала записи всеми узлами
+    :param end_action: Функция, вызываемая в момент окончания записи последним узлом
+    :param connections: Размер пула соединений (общего либо каждого узла). 0 - без ограничения
+    :param keep_alive: Использовать ли соединения повторно
+    :param shared: Использовать ли всеми узлами общий пул соединений. Если нет, у каждого узла собственный пул
+    :param stats: Счётчик запросов и открытых соединений
+    :param live: Показатели хода нагрузки
+    :param timeout: Время ожидания ответа на запрос (в секундах). None - без ограничения
+    :param retry: Правила повтора запросов, завершившихся перегрузкой или ошибкой. None - без повторов
+    :return: Объединённый результат запросов всех узлов (без длительности операции)
+    """
+    if stats is None:
+        stats = ConnectionStats()
+    
+    result = RunResult(live)
+    
+    async def _send(session, body: CountingBody) -> List[str]:
+        outcomes = []
+        while True:
+            data = body.data
+            if not isinstance(data, bytes):
+                data = _async_chunks(data)
+            retry_after = None
+            try:
+                async with session.post(endpoint, params=params, data=data,
+                                        headers=dict(headers, **body.headers)) as response:
+                    content = await response.read()
+                outcome = classify(response.status, content.decode(errors='replace'))
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            except asyncio.TimeoutError:
+                outcome = 'timeout'
+            except aiohttp.ClientError:
+                outcome = 'connection'
+            outcomes.append(outcome)
+            
+            attempt = len(outcomes) - 1
+            if outcome == 'ok' or retry is None or not body.replayable or not retry.should_retry(outcome, attempt):
+                return outcomes
+            await asyncio.sleep(retry.delay(attempt, retry_after))
+    
+    async def _node(shared_session, node_name, start_writing, end_writing):
+        batches = node_batches(node_name)
+        async with _node_session(shared_session, connections, keep_alive, stats, timeout) as session:
+            await start_writing.wait()
+            for batch in batches:
+                body = CountingBody(batch)
+                result.request_started()
+                request_start = time.perf_counter()
+                outcomes = await _send(session, body)
+                result.record_body(time.perf_counter() - request_start, body, outcomes[-1] != 'ok', outcomes)
+            await end_writing.wait()
+    
+    async def _main():
+        start_writing = _AsyncBarrier(len(node_names), start_action)
+        end_writing = _AsyncBarrier(len(node_names), end_action)
+        async with _shared_session(shared, connections, keep_alive, stats, timeout) as shared_session:
+            await asyncio.gather(
+                *(_node(shared_session, node_name, start_writing, end_writing) for node_name in node_names)
+            )
+    
+    asyncio.run(_main())
+    
+    return result
+
+
+def run_read(endpoint: str,
+             params: dict,
+             headers: dict,
+             nodes_count: int,
+             start_action: Callable[[], None],
+             end_action: Callable[[], None],
+             connections: int = 100,
+             keep_alive: bool = True,
+             shared: bool = True,
+             stats: ConnectionStats = None,
+             live: LiveMetrics = None,
+             timeout: float = None) -> Tuple[RunResult, dict]:
+    """
+    Одновременное чтение узлами-сопрограммами
+
+    :param endpoint: Адрес /query
+    :param params: Параметры запроса на чтение
+    :param headers: Заголовки запросов
+    :param nodes_count: Количество одновременно читающих узлов
+    :param start_action: Функция, вызываемая в момент одновременного начала чтения всеми узлами
+    :param end_action: Функция, вызываемая в момент окончания чтения последним узлом
+    :param connections: Размер пула соединений (общего либо каждого узла). 0 - без ограничения
+    :param keep_alive: Использовать ли соединения повторно
+    :param shared: Использовать ли всеми узлами общий пул соединений. Если нет, у каждого узла собственный пул
+    :param stats: Счётчик запросов и открытых соединений
+    :param live: Показатели хода нагрузки
+    :param timeout: Время ожидания ответа на запрос (в секундах). None - без ограничения
+    :return: Объединённый результат запросов всех узлов (без длительности операции) и ответ, полученный
+        первым узлом
+    """
+    if stats is None:
+        stats = ConnectionStats()
+    
+    result = RunResult(live)
+    responses = [{} for _ in range(nodes_count)]
+    
+    async def _node(index, shared_session, ready_to_read, finished_reading):
+        async with _node_session(shared_session, connections, keep_alive, stats, timeout) as session:
+            await ready_to_read.wait()
+            result.request_started()
+            request_start = time.perf_counter()
+            try:
+                async with session.get(endpoint, params=params, headers=headers) as response:
+                    content = await response.read()
+                rows, error, responses[index] = parse_content(content)
+                result.record(time.perf_counter() - request_start, bytes_count=len(content),
+                              error=error or response.status >= 400, rows=rows)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                result.record(time.perf_counter() - request_start, error=True)
+            await finished_reading.wait()
+    
+    async def _main():
+        ready_to_read = _AsyncBarrier(nodes_count, start_action)
+        finished_reading = _AsyncBarrier(nodes_count, end_action)
+        async with _shared_session(shared, connections, keep_alive, stats, timeout) as shared_session:
+            await asyncio.gather(
+                *(_node(index, shared_session, ready_to_read, finished_reading) for index in range(nodes_count))
+            )
+    
+    asyncio.run(_main())
+    
+    return result, responses[0]
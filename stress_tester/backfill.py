@@ -0,0 +1,77 @@
+import re
+from itertools import zip_longest
+from typing import Dict, List, Sequence, Tuple, Union
+
+# Порядок записи срезов: chronological - от ранних к поздним, reverse - от поздних к ранним,
+# interleaved - по кругу между группами шардов, чтобы одновременные запросы попадали в разные группы
+ORDERS = ('chronological', 'reverse', 'interleaved')
+
+# Длительность группы шардов по умолчанию для политики хранения с бесконечным сроком (как в InfluxDB 1.x)
+DEFAULT_SHARD_DURATION = 7 * 24 * 60 * 60
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ns|us|µs|ms|s|m|h|d|w)')
+_DURATION_UNITS = dict(ns=1e-9, us=1e-6, µs=1e-6, ms=1e-3, s=1, m=60, h=60 * 60, d=24 * 60 * 60, w=7 * 24 * 60 * 60)
+
+# Срез: начало группы шардов, начало и конец среза (в единицах метки времени)
+Slice = Tuple[int, int, int]
+
+
+def parse_duration(value: Union[str, float]) -> float:
+    """
+    :param value: Длительность в секундах, либо строкой в формате InfluxQL или InfluxDB (7d, 1h30m, 168h0m0s)
+    :return: Длительность в секундах
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = value.strip()
+    parts = _DURATION_PART.findall(text)
+    if not parts or ''.join(amount + unit for amount, unit in parts) != text:
+        raise ValueError(f'Неправильный формат длительности: {value}')
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def shard_slices(start: int, end: int, shard_duration: int, slice_duration: int) -> List[Slice]:
+    """
+    Разбиение периода на срезы, не пересекающие границы групп шардов
+
+    Группы шардов InfluxDB выровнены по началу эпохи: группа начинается в момент, кратный своей длительности.
+    Срезы внутри группы также выровнены по её началу
+
+    :param start: Начало периода (в единицах метки времени)
+    :param end: Конец периода, не включая его (в единицах метки времени)
+    :param shard_duration: Длительность группы шардов (в единицах метки времени)
+    :param slice_duration: Длительность среза (в единицах метки времени). Не больше длительности группы
+    :return: Срезы в хронологическом порядке
+    """
+    slice_duration = min(slice_duration, shard_duration)
+    slices = []
+    group = start - start % shard_duration
+    while group < end:
+        group_end = min(group + shard_duration, end)
+        slice_start = group + max(start - group, 0) // slice_duration * slice_duration
+        while slice_start < group_end:
+            slices.append((group, max(slice_start, start), min(slice_start + slice_duration, group_end)))
+            slice_start += slice_duration
+        group += shard_duration
+    return slices
+
+
+def order_tasks(slices: Sequence[Slice], node_names: Sequence[str], order: str) -> List[Tuple[Slice, str]]:
+    """
+    :param slices: Срезы в хронологическом порядке
+    :param node_names: Имена узлов
+    :param order: Порядок записи срезов (см. ORDERS)
+    :return: Задачи записи (срез, узел) в порядке выполнения. Данные узла внутри среза всегда идут
+        в хронологическом порядке
+    """
+    if order not in ORDERS:
+        raise ValueError(f'Неизвестный порядок записи: {order}')
+    if order == 'reverse':
+        slices = slices[::-1]
+    tasks = [(slice_, node_name) for slice_ in slices for node_name in node_names]
+    if order != 'interleaved':
+        return tasks
+    groups: Dict[int, List[Tuple[Slice, str]]] = {}
+    for task in tasks:
+        groups.setdefault(task[0][0], []).append(task)
+    return [task for tasks in zip_longest(*groups.values()) for task in tasks if task is not None]
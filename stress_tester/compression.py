@@ -0,0 +1,124 @@
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Union
+
+_WBITS = dict(gzip=31, deflate=15)
+
+
+def _points(chunk: bytes) -> int:
+    """
+    :return: Количество строк line protocol в части тела запроса
+    """
+    if not chunk:
+        return 0
+    return chunk.count(b'\n') + (not chunk.endswith(b'\n'))
+
+
+class CompressedBatch:
+    """
+    Тело запроса, сжатое целиком
+    """
+    
+    def __init__(self, batch: bytes, encoding: str, compresslevel: int):
+        """
+        :param batch: Строки line protocol без завершающего перевода строки
+        :param encoding: Способ сжатия: gzip или deflate
+        :param compresslevel: Степень сжатия (1-9)
+        """
+        self.encoding = encoding
+        self.points = _points(batch)
+        self.raw_bytes = len(batch)
+        
+        cpu_start = time.thread_time()
+        compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, _WBITS[encoding])
+        self.data = compressor.compress(batch) + compressor.flush()
+        self.cpu_time = time.thread_time() - cpu_start
+
+
+class CompressedStream:
+    """
+    Тело запроса, сжимаемое по частям по мере передачи (chunked transfer encoding)
+
+    Количество точек, размер несжатых данных и время сжатия накапливаются по мере передачи
+    """
+    
+    def __init__(self, chunks: Iterable[bytes], encoding: str, compresslevel: int, parallel: bool = False):
+        """
+        :param chunks: Части тела запроса, каждая завершается переводом строки
+        :param encoding: Способ сжатия: gzip или deflate
+        :param compresslevel: Степень сжатия (1-9)
+        :param parallel: Генерировать и сжимать следующую часть в фоновом потоке, пока передаётся текущая
+        """
+        self.encoding = encoding
+        self.points = 0
+        self.raw_bytes = 0
+        self.cpu_time = 0.0
+        self._chunks = chunks
+        self._compresslevel = compresslevel
+        self._parallel = parallel
+    
+    def __iter__(self) -> Iterator[bytes]:
+        if self._parallel:
+            return _prefetch(self._compressed())
+        return self._compressed()
+    
+    def _compressed(self) -> Iterator[bytes]:
+        compressor = zlib.compressobj(self._compresslevel, zlib.DEFLATED, _WBITS[self.encoding])
+        for chunk in self._chunks:
+            self.points += _points(chunk)
+            self.raw_bytes += len(chunk)
+            cpu_start = time.thread_time()
+            compressed = compressor.compress(chunk)
+            self.cpu_time += time.thread_time() - cpu_start
+            if compressed:
+                yield compressed
+        cpu_start = time.thread_time()
+        compressed = compressor.flush()
+        self.cpu_time += time.thread_time() - cpu_start
+        yield compressed
+
+
+def _prefetch(items: Iterable) -> Iterator:
+    """
+    Получение очередного элемента в фоновом потоке, пока обрабатывается текущий
+    """
+    items = iter(items)
+    end = object()
+    with ThreadPoolExecutor(1) as executor:
+        future = executor.submit(next, items, end)
+        while True:
+            item = future.result()
+            if item is end:
+                break
+            future = executor.submit(next, items, end)
+            yield item
+
+
+def compress_batches(batches: Iterable[Union[bytes, Iterator[bytes]]],
+                     encoding: str,
+                     compresslevel: int = 6,
+                     parallel: bool = False) -> Iterable[Union[CompressedBatch, CompressedStream]]:
+    """
+    Сжатие тел запросов на запись
+
+    :param batches: Тела запросов: байты, либо итераторы по частям тела для передачи по частям
+    :param encoding: Способ сжатия: gzip или deflate
+    :param compresslevel: Степень сжатия (1-9)
+    :param parallel: Сжимать ли следующее тело (или часть тела) в фоновом потоке, пока отправляется текущее.
+        Сжатие средствами zlib отпускает GIL, поэтому выполняется параллельно с отправкой
+    :return: Сжатые тела запросов. Если batches - список, возвращается список заранее сжатых тел
+    """
+    if encoding not in _WBITS:
+        raise ValueError(f'Неизвестный способ сжатия: {encoding}')
+    
+    def _compress(batch):
+        if isinstance(batch, bytes):
+            return CompressedBatch(batch, encoding, compresslevel)
+        return CompressedStream(batch, encoding, compresslevel, parallel)
+    
+    if isinstance(batches, list):
+        return [_compress(batch) for batch in batches]
+    if parallel:
+        return _prefetch(map(_compress, batches))
+    return map(_compress, batches)
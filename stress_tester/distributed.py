@@ -0,0 +1,443 @@
+"""
+Распределённая нагрузка: агенты на нескольких машинах выполняют доли одного шага, координатор объединяет результаты
+
+Агент (Agent) - HTTP-сервер, выполняющий шаги сценария по командам координатора. Координатор (Coordinator)
+делит узлы шага между агентами, назначает общий момент начала нагрузки с поправкой на расхождение часов агентов,
+во время нагрузки собирает и объединяет показатели хода нагрузки, а после - результаты агентов вместе
+с гистограммами времени выполнения запросов
+"""
+import json
+import math
+import platform
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import requests
+
+from .live import LiveMetrics, format_snapshot
+from .results import BackfillResult, ReadResult, RunResult, SustainedResult
+from .scenario import step_params
+from .stress_tester import StressTester
+
+# Действия, которые можно разделить между агентами, и классы их результатов
+_RESULTS = dict(write=RunResult, sustain=SustainedResult, backfill=BackfillResult, read=RunResult,
+                read_mix=ReadResult)
+
+
+class Agent:
+    """
+    Агент распределённой нагрузки
+
+    Принимает от координатора шаг (действие и параметры в виде, как в файле сценария), параметры подключения
+    к InfluxDB, долю узлов и момент начала нагрузки, выполняет шаг в фоновом потоке и отдаёт ход нагрузки
+    и результат. Одновременно выполняется не больше одного шага. Выполняются только действия, которые делятся
+    между агентами (write, sustain, backfill, read, read_mix).
+
+    Агент не проверяет, кто отправил шаг, поэтому по умолчанию принимает соединения только с локальной машины.
+    Для работы с координатором на другой машине адрес задаётся явно (например, 0.0.0.0 - все адреса машины),
+    а доступ к порту агента ограничивается сетью нагрузочного стенда
+
+    Страницы (JSON): GET /status - имя, состояние (idle, running, done, failed) и текущее время агента,
+    POST /run - запуск шага, GET /progress - показатели хода нагрузки, GET /result - результат последнего шага
+    """
+    
+    def __init__(self, port: int = 9109, host: str = '127.0.0.1', name: str = None):
+        """
+        :param port: Порт HTTP-сервера. 0 - любой свободный
+        :param host: Адрес, на котором HTTP-сервер принимает соединения. По умолчанию - только локальные
+        :param name: Имя агента в отчётах. По умолчанию - имя машины и порт
+        """
+        self._address = (host, port)
+        self.name = name
+        self._lock = Lock()
+        self._state = 'idle'
+        self._live: Optional[LiveMetrics] = None
+        self._result: Optional[dict] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+    
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+    
+    def status(self) -> dict:
+        return dict(name=self.name, state=self._state, time=time.time())
+    
+    def progress(self) -> dict:
+        """
+        :return: Показатели хода нагрузки (см. LiveMetrics.snapshot). Пустой словарь, если шаг не выполнялся
+        """
+        live = self._live
+        return live.snapshot() if live is not None else {}
+    
+    def result(self) -> dict:
+        """
+        :return: Состояние, результат последнего шага (RunResult.to_dict), время начала и окончания нагрузки
+            (time.time() агента), либо описание ошибки
+        """
+        return dict(self._result or {}, state=self._state)
+    
+    def run(self, job: dict) -> bool:
+        """
+        Запуск шага в фоновом потоке
+
+        :param job: action и params - действие и параметры шага, config - параметры StressTester,
+            node_share - доля узлов (начало и конец среза имён узлов), start_at - момент начала нагрузки
+            (time.time() агента), window - длительность скользящего окна показателей хода нагрузки
+        :return: Запущен ли шаг (False - выполняется предыдущий)
+        """
+        if not isinstance(job, dict) or job.get('action') not in _RESULTS:
+            action = job.get('action') if isinstance(job, dict) else None
+            raise ValueError(f'Действие {action!r} не выполняется агентом. Возможные действия: {", ".join(_RESULTS)}')
+        with self._lock:
+            if self._state == 'running':
+                return False
+            self._state = 'running'
+            self._result = None
+            self._live = LiveMetrics(job.get('window', 10.0))
+        Thread(target=self._run, args=(job, self._live), daemon=True).start()
+        return True
+    
+    def _run(self, job: dict, live: LiveMetrics):
+        try:
+            # Показатели InfluxDB снимает координатор, чтобы не нагружать СУБД запросами каждого агента
+            tester = StressTester(**dict(job['config'], server_stats_interval=0))
+            with tester.listen(live), tester.as_agent(job.get('node_share'), job.get('start_at')):
+                returned = getattr(tester, job['action'])(**step_params(job['action'], job.get('params', {})))
+            result = returned[0] if isinstance(returned, tuple) else returned
+            self._result = dict(result=result.to_dict(), start_time=tester.start_time, end_time=tester.end_time)
+            self._state = 'done'
+        except Exception as ex:
+            self._result = dict(error=f'{type(ex).__name__}: {ex}', traceback=traceback.format_exc())
+            self._state = 'failed'
+    
+    def start(self) -> 'Agent':
+        agent = self
+        
+        class _Handler(BaseHTTPRequestHandler):
+            def _reply(self, status: int, data: dict):
+                body = json.dumps(data, ensure_ascii=False).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def do_GET(self):
+                pages = dict(status=agent.status, progress=agent.progress, result=agent.result)
+                page = pages.get(self.path.split('?')[0].strip('/'))
+                if page is None:
+                    self.send_error(404)
+                    return
+                self._reply(200, page())
+            
+            def do_POST(self):
+                if self.path.split('?')[0] != '/run':
+                    self.send_error(404)
+                    return
+                try:
+                    job = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                    started = agent.run(job)
+                except ValueError as ex:
+                    self._reply(400, dict(error=f'Неправильное описание шага: {ex}'))
+                    return
+                if not started:
+                    self._reply(409, dict(error='Агент выполняет предыдущий шаг'))
+                    return
+                self._reply(202, agent.status())
+            
+            def log_message(self, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer(self._address, _Handler)
+        self._server.daemon_threads = True
+        if self.name is None:
+            self.name = f'{platform.node()}:{self.port}'
+        Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+    
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def split_nodes(nodes_count: int, agents_count: int) -> List[Tuple[int, int]]:
+    """
+    :return: Доли узлов агентов (начало и конец среза имён узлов), отличающиеся не больше чем на узел.
+        Агентам, которым не хватило узлов, достаются пустые доли
+    """
+    return [(nodes_count * index // agents_count, nodes_count * (index + 1) // agents_count)
+            for index in range(agents_count)]
+
+
+def merge_snapshots(snapshots: Sequence[dict]) -> dict:
+    """
+    Объединение показателей хода нагрузки агентов: счётчики и скорости складываются, доля ошибок усредняется
+    с весом количества запросов, а процентили времени выполнения запросов берутся наибольшими (оценка сверху,
+    поскольку гистограммы скользящего окна агентами не передаются)
+    """
+    snapshots = [snapshot for snapshot in snapshots if snapshot]
+    if not snapshots:
+        return {}
+    merged = {
+        key: sum(snapshot[key] for snapshot in snapshots)
+        for key in ('requests', 'errors', 'points', 'bytes', 'in_flight', 'points_per_second', 'bytes_per_second',
+                    'requests_per_second')
+    }
+    errors = sum(snapshot['error_rate'] * snapshot['requests_per_second'] for snapshot in snapshots)
+    merged.update(
+        elapsed=max(snapshot['elapsed'] for snapshot in snapshots),
+        error_rate=errors / merged['requests_per_second'] if merged['requests_per_second'] else 0.0,
+        **{key: max(snapshot[key] for snapshot in snapshots) for key in ('p50', 'p90', 'p99')}
+    )
+    return merged
+
+
+class Coordinator:
+    """
+    Координатор распределённой нагрузки
+
+    Узлы шага делятся между агентами поровну (split_nodes): при записи (write, sustain, backfill) агент
+    генерирует данные только своих узлов, поэтому вместе агенты записывают те же серии, что записал бы один
+    StressTester, а интенсивность sustain делится пропорционально долям. При чтении (read, read_mix) каждый
+    агент запускает свою долю читающих узлов. Одновременные запись и чтение (mixed) не делятся.
+
+    Агенты начинают нагрузку в общий момент: перед шагом координатор оценивает расхождение часов каждого агента
+    со своими по времени ответа на /status (с поправкой на половину времени запроса) и передаёт агенту момент
+    начала в его часах. Длительность объединённого результата - от самого раннего начала до самого позднего
+    окончания нагрузки агентами.
+
+    Координатор подходит вместо StressTester для run_scenario: шаги без нагрузки (drop_db, create_db, ping)
+    он выполняет сам
+    """
+    
+    def __init__(self,
+                 agents: Sequence[str],
+                 config: dict,
+                 start_delay: float = 2.0,
+                 poll_interval: float = 1.0,
+                 progress_interval: float = 10.0,
+                 window: float = 10.0,
+                 output: Optional[Callable[[str], None]] = print):
+        """
+        :param agents: Адреса агентов (host:port)
+        :param config: Параметры StressTester для агентов (параметры подключения к InfluxDB)
+        :param start_delay: Время (в секундах) от рассылки шага до начала нагрузки. Должно превышать время
+            рассылки шага всем агентам и подготовки ими данных
+        :param poll_interval: Интервал опроса агентов о завершении шага (в секундах)
+        :param progress_interval: Интервал отчёта о ходе нагрузки (в секундах). 0 - без отчёта
+        :param window: Длительность скользящего окна показателей хода нагрузки (в секундах)
+        :param output: Функция вывода строк отчёта. None - без вывода
+        """
+        if not agents:
+            raise ValueError('Не заданы агенты')
+        self.agents = [agent if agent.startswith('http') else f'http://{agent}' for agent in agents]
+        self.start_delay = start_delay
+        self.poll_interval = poll_interval
+        self.progress_interval = progress_interval
+        self.window = window
+        self.output = output
+        self._agent_config = dict(config)
+        self._tester = StressTester(**config)
+        self._session = requests.Session()
+        self._result = None
+        self._start_time: Optional[float] = None
+        self._end_time: Optional[float] = None
+        self.start_skew: Optional[float] = None
+    
+    @property
+    def config(self) -> dict:
+        return dict(self._tester.config, agents=list(self.agents))
+    
+    @property
+    def time_diff(self) -> float:
+        """
+        :return: Время (в секундах) выполнения последней операции. Для шага с нагрузкой - от начала нагрузки
+            первым агентом до её окончания последним агентом (по часам координатора)
+        """
+        return self._end_time - self._start_time
+    
+    @property
+    def result(self) -> Optional[RunResult]:
+        """
+        :return: Объединённый результат последнего шага с нагрузкой
+        """
+        return self._result
+    
+    def _local(self, operation: Callable[[], None]):
+        """
+        Выполнение операции без нагрузки самим координатором
+        """
+        operation()
+        self._start_time, self._end_time = self._tester.start_time, self._tester.end_time
+    
+    def ping(self):
+        self._local(self._tester.ping)
+    
+    def create_db(self):
+        self._local(self._tester.create_db)
+    
+    def drop_db(self):
+        self._local(self._tester.drop_db)
+    
+    def server_info(self) -> dict:
+        return self._tester.server_info()
+    
+    def _request(self, method: str, agent: str, path: str, **kwargs) -> dict:
+        response = self._session.request(method, agent + path, timeout=10, **kwargs)
+        if response.status_code >= 400:
+            raise RuntimeError(f'Агент {agent}: {response.json().get("error", response.text)}')
+        return response.json()
+    
+    def clock_offsets(self, probes: int = 3) -> Dict[str, float]:
+        """
+        :param probes: Количество запросов к каждому агенту. Берётся оценка по самому быстрому запросу
+        :return: Расхождение часов каждого агента с часами координатора (в секундах)
+        """
+        offsets = {}
+        for agent in self.agents:
+            samples = []
+            for _ in range(probes):
+                sent = time.time()
+                status = self._request('GET', agent, '/status')
+                received = time.time()
+                if status['state'] == 'running':
+                    raise RuntimeError(f'Агент {agent} выполняет предыдущий шаг')
+                samples.append((received - sent, status['time'] - (sent + received) / 2))
+            offsets[agent] = min(samples)[1]
+        return offsets
+    
+    def _jobs(self, action: str, params: dict) -> Dict[str, dict]:
+        """
+        :return: Параметры шага для каждого агента, получившего непустую долю узлов
+        """
+        if action not in _RESULTS:
+            raise ValueError(f'Действие {action} не делится между агентами')
+        nodes_count = params['nodes_count']
+        jobs = {}
+        for agent, (start, stop) in zip(self.agents, split_nodes(nodes_count, len(self.agents))):
+            if start == stop:
+                continue
+            agent_params = dict(params)
+            node_share = None
+            if action in ('write', 'sustain', 'backfill'):
+                node_share = (start, stop)
+            else:
+                agent_params['nodes_count'] = stop - start
+            if action == 'sustain':
+                share = (stop - start) / nodes_count
+                agent_params['rate'] = params['rate'] * share
+                if params.get('connections'):
+                    agent_params['connections'] = max(1, math.ceil(params['connections'] * share))
+            if action == 'read_mix':
+                if not params.get('tag_values'):
+                    agent_params['tag_values'] = self._tester.node_names(nodes_count)
+                if params.get('seed') is not None:
+                    agent_params['seed'] = f'{params["seed"]}:{start}'
+            jobs[agent] = dict(action=action, params=agent_params, config=self._agent_config, node_share=node_share,
+                               window=self.window)
+        return jobs
+    
+    def _wait(self, agents: Sequence[str]) -> Dict[str, dict]:
+        """
+        Ожидание завершения шага агентами с отчётом о ходе нагрузки
+
+        :return: Результаты агентов
+        """
+        last_report = time.monotonic()
+        pending = set(agents)
+        while pending:
+            time.sleep(self.poll_interval)
+            if self.output is not None and self.progress_interval and \
+                    time.monotonic() - last_report >= self.progress_interval:
+                last_report = time.monotonic()
+                snapshot = merge_snapshots([self._request('GET', agent, '/progress') for agent in agents])
+                if snapshot:
+                    self.output(format_snapshot(snapshot, self.window))
+            for agent in list(pending):
+                if self._request('GET', agent, '/status')['state'] != 'running':
+                    pending.remove(agent)
+        
+        results = {agent: self._request('GET', agent, '/result') for agent in agents}
+        failed = [f'{agent}: {result["error"]}' for agent, result in results.items() if result['state'] != 'done']
+        if failed:
+            raise RuntimeError('Шаг завершился ошибкой на агентах: ' + '; '.join(failed))
+        return results
+    
+    def _merge(self, action: str, results: Dict[str, dict], offsets: Dict[str, float]) -> RunResult:
+        result_class = _RESULTS[action]
+        merged = result_class()
+        windows: List[RunResult] = []
+        starts = []
+        ends = []
+        for agent, agent_result in results.items():
+            part = result_class.from_dict(agent_result['result'])
+            merged.merge(part)
+            starts.append(agent_result['start_time'] - offsets[agent])
+            ends.append(agent_result['end_time'] - offsets[agent])
+            if isinstance(part, SustainedResult):
+                merged.target_rate += part.target_rate
+                merged.tolerance = part.tolerance
+                # Интервалы агентов отсчитываются от общего момента начала, поэтому объединяются по номеру
+                for index, window in enumerate(part.windows):
+                    if index == len(windows):
+                        windows.append(RunResult())
+                        windows[index].duration = 0.0
+                    windows[index].merge(window)
+                    windows[index].duration = max(windows[index].duration, window.duration)
+        if isinstance(merged, SustainedResult):
+            merged.windows = windows
+        
+        self.start_skew = max(starts) - min(starts)
+        self._start_time = min(starts)
+        self._end_time = max(ends)
+        if isinstance(merged, ReadResult):
+            merged.set_duration(self.time_diff)
+        else:
+            merged.duration = self.time_diff
+        return merged
+    
+    def run_step(self, action: str, params: dict) -> RunResult:
+        """
+        Выполнение шага агентами
+
+        :param action: Действие: write, sustain, backfill, read или read_mix
+        :param params: Параметры шага в виде, как в файле сценария (параметры одноимённого метода StressTester)
+        :return: Объединённый результат. Показатели InfluxDB (server) снимаются координатором; в отличие
+            от StressTester, показатели клиента по интервалам в них не учитываются
+        """
+        jobs = self._jobs(action, params)
+        offsets = self.clock_offsets()
+        
+        sampler = self._tester.server_stats_sampler()
+        if sampler is not None and not sampler.start():
+            sampler = None
+        
+        start_at = time.time() + self.start_delay
+        started = []
+        try:
+            for agent, job in jobs.items():
+                body = json.dumps(dict(job, start_at=start_at + offsets[agent]), ensure_ascii=False, default=str)
+                self._request('POST', agent, '/run', data=body.encode(),
+                              headers={'Content-Type': 'application/json'})
+                started.append(agent)
+            results = self._wait(started)
+        finally:
+            if sampler is not None:
+                server_stats = sampler.stop(start_at)
+        
+        result = self._merge(action, results, offsets)
+        if self.output is not None and self.start_skew > self.poll_interval:
+            self.output(f'Агенты начали нагрузку с разбросом {self.start_skew:.3f} сек. Увеличьте start_delay')
+        if sampler is not None:
+            result.server = server_stats
+        self._result = result
+        return result
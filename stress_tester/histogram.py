@@ -0,0 +1,127 @@
+import math
+from collections import Counter
+from typing import Dict
+
+
+class LatencyHistogram:
+    """
+    Гистограмма времени выполнения запросов с логарифмическими интервалами
+
+    Как и в HdrHistogram, относительная погрешность восстановленного значения не превышает precision
+    при любой величине значения, а количество хранимых интервалов растёт логарифмически с диапазоном значений.
+    Гистограммы, собранные в разных потоках и процессах, объединяются сложением счётчиков (merge)
+    """
+    
+    def __init__(self, precision: float = 0.01, min_value: float = 1e-6):
+        """
+        :param precision: Относительная погрешность восстановленного значения
+        :param min_value: Минимальное различимое значение (в секундах). Меньшие значения учитываются как min_value
+        """
+        self._precision = precision
+        self._min_value = min_value
+        self._log_base = math.log1p(2 * precision)
+        self._counts: Dict[int, int] = Counter()
+        self._total = 0
+        self._sum = 0.0
+        self._min = math.inf
+        self._max = 0.0
+    
+    def _index(self, value: float) -> int:
+        return int(math.log(max(value, self._min_value) / self._min_value) / self._log_base)
+    
+    def _value(self, index: int) -> float:
+        """
+        :return: Середина интервала с номером index
+        """
+        return self._min_value * math.exp((index + 0.5) * self._log_base)
+    
+    def record(self, value: float):
+        """
+        :param value: Время выполнения запроса (в секундах)
+        """
+        self._counts[self._index(value)] += 1
+        self._total += 1
+        self._sum += value
+        self._min = min(self._min, value)
+        self._max = max(self._max, value)
+    
+    def merge(self, other: 'LatencyHistogram'):
+        """
+        Добавление значений другой гистограммы с такими же precision и min_value
+        """
+        if (self._precision, self._min_value) != (other._precision, other._min_value):
+            raise ValueError('Объединять можно только гистограммы с одинаковой точностью')
+        self._counts.update(other._counts)
+        self._total += other._total
+        self._sum += other._sum
+        self._min = min(self._min, other._min)
+        self._max = max(self._max, other._max)
+    
+    @property
+    def count(self) -> int:
+        """
+        :return: Количество учтённых значений
+        """
+        return self._total
+    
+    @property
+    def min(self) -> float:
+        return self._min if self._total else 0.0
+    
+    @property
+    def max(self) -> float:
+        return self._max
+    
+    @property
+    def mean(self) -> float:
+        return self._sum / self._total if self._total else 0.0
+    
+    def counts(self) -> Dict[int, int]:
+        """
+        :return: Количество значений в каждом интервале (номер интервала -> количество). Номера интервалов
+            гистограмм с одинаковыми precision и min_value совпадают
+        """
+        return dict(self._counts)
+    
+    def percentile(self, percent: float) -> float:
+        """
+        :param percent: Процентиль (0-100)
+        :return: Значение, не больше которого percent процентов учтённых значений
+        """
+        if not self._total:
+            return 0.0
+        rank = max(1, math.ceil(self._total * percent / 100))
+        seen = 0
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+            if seen >= rank:
+                return min(max(self._value(index), self._min), self._max)
+        return self._max
+    
+    def to_dict(self) -> dict:
+        """
+        :return: Представление гистограммы, пригодное для сериализации в JSON
+        """
+        return dict(
+            precision=self._precision,
+            min_value=self._min_value,
+            counts={str(index): count for index, count in self._counts.items()},
+            total=self._total,
+            sum=self._sum,
+            min=self._min if self._total else None,
+            max=self._max
+        )
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'LatencyHistogram':
+        """
+        :param data: Результат to_dict
+        :return: Восстановленная гистограмма
+        """
+        histogram = cls(data['precision'], data['min_value'])
+        histogram._counts.update({int(index): count for index, count in data['counts'].items()})
+        histogram._total = data['total']
+        histogram._sum = data['sum']
+        histogram._min = math.inf if data['min'] is None else data['min']
+        histogram._max = data['max']
+        return histogram
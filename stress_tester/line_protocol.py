@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+from typing import Dict, Optional, Union
+
+# Количество единиц метки времени в секунде для каждой точности
+PRECISIONS = dict(ns=1_000_000_000, us=1_000_000, ms=1000, s=1)
+
+# Обозначения точности в параметрах HTTP API (precision, epoch) и единицы длительности InfluxQL
+API_PRECISIONS = dict(ns='ns', us='u', ms='ms', s='s')
+
+
+def _escape(value: str, chars: str) -> str:
+    for char in chars:
+        if char in value:
+            value = value.replace(char, '\\' + char)
+    return value
+
+
+def escape_measurement(name: str) -> str:
+    """
+    :return: Имя измерения с экранированными запятыми и пробелами
+    """
+    return _escape(name, ', ')
+
+
+def escape_key(key: str) -> str:
+    """
+    :return: Ключ или значение тега, либо ключ поля с экранированными запятыми, знаками равенства и пробелами
+    """
+    return _escape(key, ',= ')
+
+
+def escape_string(value: str) -> str:
+    """
+    :return: Строковое значение поля (без кавычек) с экранированными обратной косой чертой и кавычками
+    """
+    return _escape(value, '\\"')
+
+
+def to_timestamp(value: Union[datetime, float], precision: str = 'ns') -> int:
+    """
+    :param value: Момент времени: datetime (без часового пояса - местное время) или секунды от начала эпохи
+    :param precision: Точность метки времени: ns, us, ms или s
+    :return: Метка времени в единицах точности
+    """
+    multiplier = precision_multiplier(precision)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.astimezone()
+        delta = value - datetime(1970, 1, 1, tzinfo=timezone.utc)
+        # Целочисленная арифметика, чтобы не терять микросекунды при точности ns и us
+        microseconds = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+        return microseconds * multiplier // 1_000_000
+    return int(value * multiplier)
+
+
+def precision_multiplier(precision: str) -> int:
+    """
+    :return: Количество единиц метки времени в секунде
+    """
+    try:
+        return PRECISIONS[precision]
+    except KeyError:
+        raise ValueError(f'Неизвестная точность меток времени: {precision}') from None
+
+
+def series_key(measurement: str, tags: Optional[Dict[str, str]] = None) -> str:
+    """
+    :param measurement: Имя измерения
+    :param tags: Теги. Упорядочиваются по ключам, как рекомендует InfluxDB
+    :return: Ключ серии: экранированные имя измерения и теги
+    """
+    key = escape_measurement(measurement)
+    if tags:
+        key += ''.join(f',{escape_key(tag)}={escape_key(str(value))}' for tag, value in sorted(tags.items()))
+    return key
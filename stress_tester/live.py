@@ -0,0 +1,303 @@
+import platform
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Event, Lock, Thread
+from typing import Callable, Deque, Iterable, Optional, Tuple
+
+import requests
+
+from .histogram import LatencyHistogram
+
+
+class LiveMetrics:
+    """
+    Показатели нагрузки, обновляемые по мере выполнения запросов
+
+    Счётчики (запросы, ошибки, точки, байты) накапливаются с момента создания, скорость, доля ошибок
+    и время выполнения запросов вычисляются за последние window секунд. Запросы учитываются из всех потоков
+    и сопрограмм, выполняющих нагрузку (см. RunResult)
+    """
+    
+    def __init__(self, window: float = 10.0):
+        """
+        :param window: Длительность скользящего окна (в секундах)
+        """
+        self.window = window
+        self._lock = Lock()
+        self._start = time.perf_counter()
+        self._seconds: Deque[Tuple[int, dict]] = deque()
+        self.requests = 0
+        self.errors = 0
+        self.points = 0
+        self.bytes = 0
+        self.in_flight = 0
+    
+    def _second(self, now: float) -> dict:
+        """
+        :return: Показатели текущей секунды скользящего окна
+        """
+        second = int(now - self._start)
+        if not self._seconds or self._seconds[0][0] != second:
+            self._seconds.appendleft((second, dict(latency=LatencyHistogram(), requests=0, errors=0, points=0,
+                                                   bytes=0)))
+            while self._seconds[-1][0] <= second - self.window:
+                self._seconds.pop()
+        return self._seconds[0][1]
+    
+    def request_started(self):
+        with self._lock:
+            self.in_flight += 1
+    
+    def record(self, latency: float, points: int = 0, bytes_count: int = 0, error: bool = False):
+        """
+        Учёт выполненного запроса
+
+        :param latency: Время выполнения запроса (в секундах)
+        :param points: Количество переданных точек
+        :param bytes_count: Количество переданных байт
+        :param error: Завершился ли запрос ошибкой
+        """
+        with self._lock:
+            self.in_flight = max(self.in_flight - 1, 0)
+            self.requests += 1
+            second = self._second(time.perf_counter())
+            second['latency'].record(latency)
+            second['requests'] += 1
+            if error:
+                self.errors += 1
+                second['errors'] += 1
+            else:
+                self.points += points
+                self.bytes += bytes_count
+                second['points'] += points
+                second['bytes'] += bytes_count
+    
+    def snapshot(self) -> dict:
+        """
+        :return: Время от начала (elapsed), счётчики с начала (requests, errors, points, bytes), количество
+            выполняющихся запросов (in_flight) и показатели скользящего окна: скорость (points_per_second,
+            bytes_per_second, requests_per_second), доля ошибок (error_rate), время выполнения запросов
+            (p50, p90, p99)
+        """
+        with self._lock:
+            now = time.perf_counter()
+            self._second(now)
+            elapsed = now - self._start
+            span = min(self.window, elapsed) or 1.0
+            latency = LatencyHistogram()
+            requests_count = errors = points = bytes_count = 0
+            for second, metrics in self._seconds:
+                if second > elapsed - self.window:
+                    latency.merge(metrics['latency'])
+                    requests_count += metrics['requests']
+                    errors += metrics['errors']
+                    points += metrics['points']
+                    bytes_count += metrics['bytes']
+            return dict(
+                elapsed=elapsed,
+                requests=self.requests,
+                errors=self.errors,
+                points=self.points,
+                bytes=self.bytes,
+                in_flight=self.in_flight,
+                points_per_second=points / span,
+                bytes_per_second=bytes_count / span,
+                requests_per_second=requests_count / span,
+                error_rate=errors / requests_count if requests_count else 0.0,
+                p50=latency.percentile(50),
+                p90=latency.percentile(90),
+                p99=latency.percentile(99)
+            )
+
+
+class LiveGroup:
+    """
+    Несколько объектов, в которых запросы учитываются одновременно (например, LiveMetrics и ServerStatsSampler)
+    """
+    
+    def __init__(self, listeners: Iterable):
+        self.listeners = list(listeners)
+    
+    def request_started(self):
+        for listener in self.listeners:
+            listener.request_started()
+    
+    def record(self, latency: float, points: int = 0, bytes_count: int = 0, error: bool = False):
+        for listener in self.listeners:
+            listener.record(latency, points, bytes_count, error)
+
+
+def format_snapshot(snapshot: dict, window: float) -> str:
+    """
+    :return: Строка консольного отчёта о ходе нагрузки
+    """
+    return (
+        f'[{snapshot["elapsed"]:>7.1f} сек.] {snapshot["points_per_second"]:.0f} точек/сек., '
+        f'{snapshot["bytes_per_second"] / 1024 / 1024:.2f} МБ/сек., {snapshot["requests_per_second"]:.1f} '
+        f'запросов/сек., в работе: {snapshot["in_flight"]}, ошибок: {snapshot["error_rate"]:.1%}, '
+        f'p50 {snapshot["p50"]:.3f} сек., p99 {snapshot["p99"]:.3f} сек. (за {window:g} сек.); '
+        f'всего точек: {snapshot["points"]}, ошибок: {snapshot["errors"]}'
+    )
+
+
+class LineProtocolExporter:
+    """
+    Экспорт показателей нагрузки в InfluxDB в виде line protocol
+
+    Показатели лучше записывать в отдельный экземпляр InfluxDB: запись в тестируемый экземпляр добавляет
+    к нагрузке несколько запросов за интервал отчёта
+    """
+    
+    def __init__(self,
+                 host: str = 'localhost',
+                 port: int = 8086,
+                 db: str = 'stress_monitor',
+                 measurement: str = 'stress_tester',
+                 tags: dict = None):
+        """
+        :param host: Адрес InfluxDB
+        :param port: Порт InfluxDB
+        :param db: БД для показателей. Создаётся при запуске экспорта
+        :param measurement: Имя измерения
+        :param tags: Теги точек. По умолчанию - имя машины, создающей нагрузку (client)
+        """
+        self._url = f'http://{host}:{port}'
+        self._db = db
+        self._prefix = ','.join(
+            [measurement] + [f'{key}={value}' for key, value in (tags or dict(client=platform.node())).items()]
+        )
+        self._session = None
+    
+    def start(self):
+        self._session = requests.Session()
+        self._session.post(self._url + '/query', params=dict(q=f'CREATE DATABASE "{self._db}"'))
+    
+    def export(self, snapshot: dict):
+        fields = ','.join(
+            f'{key}={value}i' if isinstance(value, int) else f'{key}={value}'
+            for key, value in snapshot.items()
+        )
+        self._session.post(self._url + '/write', params=dict(db=self._db, precision='ns'),
+                           data=f'{self._prefix} {fields} {time.time_ns()}'.encode()).raise_for_status()
+    
+    def stop(self):
+        self._session.close()
+
+
+class PrometheusExporter:
+    """
+    Страница /metrics с показателями нагрузки в текстовом формате Prometheus
+    """
+    
+    _COUNTERS = ('requests', 'errors', 'points', 'bytes')
+    
+    def __init__(self, port: int = 9108, host: str = '0.0.0.0', prefix: str = 'influxdb_stress'):
+        """
+        :param port: Порт HTTP-сервера
+        :param host: Адрес, на котором HTTP-сервер принимает соединения
+        :param prefix: Префикс имён метрик
+        """
+        self._address = (host, port)
+        self._prefix = prefix
+        self._page = b''
+        self._server: Optional[ThreadingHTTPServer] = None
+    
+    def start(self):
+        exporter = self
+        
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                page = exporter._page
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(page)))
+                self.end_headers()
+                self.wfile.write(page)
+            
+            def log_message(self, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer(self._address, _Handler)
+        self._server.daemon_threads = True
+        Thread(target=self._server.serve_forever, daemon=True).start()
+    
+    def export(self, snapshot: dict):
+        lines = []
+        for key, value in snapshot.items():
+            if key in ('p50', 'p90', 'p99'):
+                continue
+            name = f'{self._prefix}_{key}_total' if key in self._COUNTERS else f'{self._prefix}_{key}'
+            lines.append(f'# TYPE {name} {"counter" if key in self._COUNTERS else "gauge"}')
+            lines.append(f'{name} {value}')
+        name = f'{self._prefix}_latency_seconds'
+        lines.append(f'# TYPE {name} gauge')
+        lines.extend(f'{name}{{quantile="0.{percent}"}} {snapshot[f"p{percent}"]}' for percent in (50, 90, 99))
+        self._page = ('\n'.join(lines) + '\n').encode()
+    
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class LiveReporter:
+    """
+    Периодический отчёт о ходе нагрузки в консоль и экспорт показателей
+    """
+    
+    def __init__(self,
+                 metrics: LiveMetrics,
+                 interval: float = 5.0,
+                 exporters: Iterable = (),
+                 output: Optional[Callable[[str], None]] = print):
+        """
+        :param metrics: Показатели нагрузки
+        :param interval: Интервал отчёта (в секундах)
+        :param exporters: Объекты экспорта показателей (LineProtocolExporter, PrometheusExporter)
+        :param output: Функция вывода строки отчёта. None - без вывода в консоль
+        """
+        self.metrics = metrics
+        self.interval = interval
+        self.exporters = list(exporters)
+        self.output = output
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+        self._failed = set()
+    
+    def report(self):
+        snapshot = self.metrics.snapshot()
+        if self.output is not None:
+            self.output(format_snapshot(snapshot, self.metrics.window))
+        for exporter in self.exporters:
+            try:
+                exporter.export(snapshot)
+            except Exception as ex:
+                if id(exporter) not in self._failed:
+                    self._failed.add(id(exporter))
+                    print(f'{datetime.now():%H:%M:%S} Не удалось экспортировать показатели: {ex}', file=sys.stderr)
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.report()
+    
+    def start(self):
+        for exporter in self.exporters:
+            exporter.start()
+        self._stop.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """
+        Остановка отчёта. Показатели на момент остановки выводятся и экспортируются последний раз
+        """
+        self._stop.set()
+        self._thread.join()
+        self.report()
+        for exporter in self.exporters:
+            exporter.stop()
@@ -0,0 +1,545 @@
+"""
+Лёгкая замена InfluxDB для замеров производительности самого инструмента и проверок без СУБД
+
+Запуск в отдельном процессе (чтобы сервер не отнимал процессорное время у генератора нагрузки):
+
+    python -m stress_tester.mock_server --port 8086 --latency 0.005 --error-rate 0.01
+    python -m stress_tester.mock_server --port 8086 --store --drop-rate 0.001 --visibility-delay 2
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import re
+import time
+import zlib
+from threading import Event, Lock, Thread
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .verification import parse_series_key, split_line, unescape
+
+MOCK_VERSION = '1.8-mock'
+
+_REASONS = {
+    200: 'OK', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    429: 'Too Many Requests', 500: 'Internal Server Error', 503: 'Service Unavailable',
+}
+
+_ERRORS = {
+    429: 'too many requests',
+    500: 'hinted handoff queue full',
+    503: 'max-concurrent-write-limit exceeded',
+}
+
+_DATABASE = re.compile(r'^(CREATE|DROP)\s+DATABASE\s+"?([^";]+?)"?$', re.IGNORECASE)
+_COUNT = re.compile(r'^SELECT\s+count\(', re.IGNORECASE)
+_RETENTION_POLICIES = re.compile(r'^SHOW\s+RETENTION\s+POLICIES', re.IGNORECASE)
+# Подсчёт значений по всем тегам и окнам времени (см. verification.count_statements)
+_GROUPED_COUNT = re.compile(r'^SELECT\s+count\(\*\)\s+FROM\s+(.+?)\s+WHERE\s+time\s*>=\s*(\d+)\s+AND\s+time\s*<\s*(\d+)'
+                            r'\s+GROUP\s+BY\s+\*\s*,\s*time\((\d+)ns\)$', re.IGNORECASE)
+_QUOTED_NAME = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+# Наносекунд в единице метки времени по обозначению точности в параметрах HTTP API
+_NANOSECONDS = dict(ns=1, n=1, u=1000, us=1000, ms=1_000_000, s=1_000_000_000)
+
+
+def _split_unescaped(line: str, separator: str) -> List[str]:
+    """
+    Разбиение строки line protocol по разделителю вне экранирования и строковых значений
+    """
+    parts = []
+    current = []
+    quoted = False
+    escaped = False
+    for char in line:
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif char == separator and not quoted:
+            parts.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append(''.join(current))
+    return parts
+
+
+def check_line(line: str) -> Optional[str]:
+    """
+    Упрощённая проверка строки line protocol: ключ серии, поля вида ключ=значение и целочисленная метка времени
+
+    :return: Описание ошибки, либо None, если строка правильная
+    """
+    parts = [part for part in _split_unescaped(line, ' ') if part]
+    if len(parts) not in (2, 3):
+        return 'invalid field format'
+    series, fields = parts[0], parts[1]
+    if not series or series.startswith(','):
+        return 'missing measurement'
+    for field in _split_unescaped(fields, ','):
+        key, separator, value = field.partition('=')
+        if not key or not separator or not value:
+            return 'missing fields'
+    if len(parts) == 3:
+        try:
+            int(parts[2])
+        except ValueError:
+            return 'bad timestamp'
+    return None
+
+
+class MockInfluxDB:
+    """
+    Замена InfluxDB на asyncio: /ping, /write (разбор и подсчёт точек line protocol), /query (создание и удаление
+    БД, SHOW DATABASES, SHOW RETENTION POLICIES, count() по количеству записанных точек, заданный ответ
+    на остальные запросы)
+    и /debug/vars (показатели для ServerStatsSampler)
+
+    Задержка ответа (latency + случайная добавка до jitter) и доля ответов об ошибке (error_rate) позволяют
+    моделировать перегруженную СУБД. Запись в несуществующую БД, как и в InfluxDB, завершается ошибкой 404
+
+    С store записанные значения хранятся в памяти (по серии, полю и метке времени, как в InfluxDB), а запросы
+    count(*) с группировкой по всем тегам и окнам времени подсчитывают их, в том числе с ответом частями
+    (chunked=true). Доля молча отброшенных значений (drop_rate) и задержка видимости (visibility_delay)
+    моделируют потерю подтверждённых точек и их запоздалое появление для проверки записи (см. Verification)
+    """
+    
+    def __init__(self,
+                 host: str = '127.0.0.1',
+                 port: int = 0,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 error_rate: float = 0.0,
+                 error_status: int = 503,
+                 retry_after: float = None,
+                 validate: bool = False,
+                 query_response: dict = None,
+                 seed: int = None,
+                 store: bool = False,
+                 drop_rate: float = 0.0,
+                 visibility_delay: float = 0.0):
+        """
+        :param host: Адрес, на котором сервер принимает соединения
+        :param port: Порт. 0 - свободный порт, выбранный системой (см. атрибут port после start)
+        :param latency: Задержка ответа на запросы /write и /query (в секундах)
+        :param jitter: Максимальная случайная добавка к задержке (в секундах)
+        :param error_rate: Доля запросов /write, завершающихся ошибкой error_status
+        :param error_status: Код ответа об ошибке: 503 (по умолчанию), 429 или 500 (hinted handoff queue full)
+        :param retry_after: Значение заголовка Retry-After (в секундах) в ответах об ошибке. None - без заголовка
+        :param validate: Проверять ли каждую строку line protocol (см. check_line). Без проверки точки считаются
+            по переводам строк, что на порядок дешевле
+        :param query_response: Ответ на запросы SELECT, кроме count(). По умолчанию - одна строка в серии mock
+        :param seed: Начальное значение генератора случайных задержек и ошибок
+        :param store: Хранить ли записанные значения для подсчёта запросами count(*). Требует разбора каждой строки
+        :param drop_rate: Доля значений, отбрасываемых без ошибки в ответе (при store)
+        :param visibility_delay: Через сколько секунд после записи значения видны запросам (при store)
+        """
+        if not 0 <= error_rate <= 1:
+            raise ValueError('Доля ошибок должна быть в диапазоне [0; 1]')
+        if error_status not in _ERRORS:
+            raise ValueError(f'Неподдерживаемый код ответа об ошибке: {error_status}')
+        if not 0 <= drop_rate <= 1:
+            raise ValueError('Доля отбрасываемых значений должна быть в диапазоне [0; 1]')
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.validate = validate
+        self.query_response = query_response
+        self.store = store
+        self.drop_rate = drop_rate
+        self.visibility_delay = visibility_delay
+        self._rng = random.Random(seed)
+        self._lock = Lock()
+        self._databases: Dict[str, int] = {}
+        # Записанные значения БД: (серия, поле) -> метка времени в наносекундах -> момент, с которого значение видимо
+        self._values: Dict[str, Dict[tuple, Dict[int, float]]] = {}
+        # Разобранные ключи серий и полей: в каждом запросе на запись они повторяются
+        self._series: Dict[bytes, tuple] = {}
+        self._fields: Dict[bytes, str] = {}
+        self._counters = dict(requests=0, writes=0, points=0, bytes=0, queries=0, errors=0, active=0)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[Thread] = None
+    
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+    
+    def config(self, **kwargs) -> dict:
+        """
+        :param kwargs: Остальные параметры StressTester
+        :return: Параметры StressTester для подключения к серверу
+        """
+        return dict(kwargs, host=self.host, port=self.port)
+    
+    @property
+    def stats(self) -> dict:
+        """
+        :return: Количество запросов, запросов на запись, записанных точек и байт, запросов чтения, ответов
+            об ошибке и количество точек по БД
+        """
+        with self._lock:
+            return dict(self._counters, databases=dict(self._databases))
+    
+    def reset(self):
+        """
+        Обнуление счётчиков (БД сохраняются)
+        """
+        with self._lock:
+            for key in self._counters:
+                if key != 'active':
+                    self._counters[key] = 0
+    
+    async def serve(self) -> asyncio.AbstractServer:
+        """
+        Запуск сервера в текущем цикле событий
+
+        :return: Сервер asyncio
+        """
+        server = await asyncio.start_server(self._handle, self.host, self.port, backlog=1024)
+        self.port = server.sockets[0].getsockname()[1]
+        return server
+    
+    def start(self) -> 'MockInfluxDB':
+        """
+        Запуск сервера с собственным циклом событий в фоновом потоке
+        """
+        ready = Event()
+        
+        def _run():
+            self._loop = asyncio.new_event_loop()
+            server = self._loop.run_until_complete(self.serve())
+            ready.set()
+            try:
+                self._loop.run_forever()
+            finally:
+                server.close()
+                tasks = asyncio.all_tasks(self._loop)
+                for task in tasks:
+                    task.cancel()
+                if tasks:
+                    # gather без задач обращается к текущему циклу событий, которого у этого потока нет
+                    self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+                self._loop.close()
+        
+        self._thread = Thread(target=_run, name='mock-influxdb', daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+    
+    def stop(self):
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+    
+    def _count(self, key: str, value: int = 1):
+        with self._lock:
+            self._counters[key] += value
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Обработка запросов одного соединения (HTTP/1.1 с повторным использованием соединения)
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await self._read_body(reader, headers)
+                
+                self._count('requests')
+                self._count('active')
+                try:
+                    status, response_headers, content = await self._dispatch(method, target, headers, body)
+                finally:
+                    self._count('active', -1)
+                
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                head = [f'HTTP/1.1 {status} {_REASONS.get(status, "")}', f'Content-Length: {len(content)}',
+                        f'X-Influxdb-Version: {MOCK_VERSION}', 'X-Influxdb-Build: mock']
+                if content:
+                    head.append('Content-Type: application/json')
+                head.extend(f'{name}: {value}' for name, value in response_headers.items())
+                if not keep_alive:
+                    head.append('Connection: close')
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + content)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # Остановка сервера: соединение закрывается без ответа
+            pass
+        finally:
+            writer.close()
+    
+    @staticmethod
+    async def _read_body(reader: asyncio.StreamReader, headers: dict) -> bytes:
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0].strip(), 16)
+                if not size:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            body = b''.join(chunks)
+        else:
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+        
+        encoding = headers.get('content-encoding', '').lower()
+        if encoding == 'gzip':
+            body = gzip.decompress(body)
+        elif encoding == 'deflate':
+            body = zlib.decompress(body)
+        return body
+    
+    async def _delay(self):
+        delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+    
+    async def _dispatch(self, method: str, target: str, headers: dict, body: bytes) -> Tuple[int, dict, bytes]:
+        """
+        :return: Код ответа, дополнительные заголовки и тело ответа
+        """
+        url = urlsplit(target)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == '/ping':
+            return 204, {}, b''
+        if url.path == '/write':
+            if method != 'POST':
+                return 405, {}, b''
+            await self._delay()
+            return self._write(params, body)
+        if url.path == '/query':
+            if headers.get('content-type', '').startswith('application/x-www-form-urlencoded'):
+                params.update({key: values[-1] for key, values in parse_qs(body.decode()).items()})
+            await self._delay()
+            return self._query(params)
+        if url.path == '/debug/vars':
+            return 200, {}, json.dumps(self._debug_vars()).encode()
+        return 404, {}, b''
+    
+    @staticmethod
+    def _error(status: int, message: str, headers: dict = None) -> Tuple[int, dict, bytes]:
+        return status, headers or {}, json.dumps(dict(error=message)).encode()
+    
+    def _write(self, params: dict, body: bytes) -> Tuple[int, dict, bytes]:
+        self._count('writes')
+        db = params.get('db')
+        if not db:
+            self._count('errors')
+            return self._error(400, 'database is required')
+        if db not in self._databases:
+            self._count('errors')
+            return self._error(404, f'database not found: "{db}"')
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self._count('errors')
+            headers = {} if self.retry_after is None else {'Retry-After': f'{self.retry_after:g}'}
+            return self._error(self.error_status, _ERRORS[self.error_status], headers)
+        
+        if self.validate:
+            points = 0
+            for line in body.decode().split('\n'):
+                if not line or line.startswith('#'):
+                    continue
+                error = check_line(line)
+                if error is not None:
+                    self._count('errors')
+                    return self._error(400, f'unable to parse \'{line[:100]}\': {error}')
+                points += 1
+        else:
+            points = body.count(b'\n') + (not body.endswith(b'\n')) if body else 0
+        
+        with self._lock:
+            self._counters['points'] += points
+            self._counters['bytes'] += len(body)
+            self._databases[db] += points
+        if self.store:
+            self._store(db, params.get('precision', 'ns'), body)
+        return 204, {}, b''
+    
+    def _store(self, db: str, precision: str, body: bytes):
+        """
+        Сохранение значений принятых строк
+        """
+        nanoseconds = _NANOSECONDS.get(precision, 1)
+        visible_at = time.time() + self.visibility_delay
+        with self._lock:
+            values = self._values.setdefault(db, {})
+            for line in body.split(b'\n'):
+                if not line or line.startswith(b'#'):
+                    continue
+                try:
+                    key, field_keys, timestamp = split_line(line)
+                except ValueError:
+                    continue
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = parse_series_key(key.decode())
+                for field_key in field_keys:
+                    if self.drop_rate and self._rng.random() < self.drop_rate:
+                        continue
+                    field = self._fields.get(field_key)
+                    if field is None:
+                        field = self._fields[field_key] = unescape(field_key.decode())
+                    cell_values = values.setdefault((series, field), {})
+                    cell_values[timestamp * nanoseconds] = visible_at
+    
+    def _grouped_count(self, db: str, statement: re.Match, epoch: str) -> List[dict]:
+        """
+        :return: Серии ответа на запрос count(*) с группировкой по всем тегам и окнам времени
+        """
+        measurements = {unescape(name) for name in _QUOTED_NAME.findall(statement[1])}
+        low, high, window = int(statement[2]), int(statement[3]), int(statement[4])
+        divider = _NANOSECONDS.get(epoch, 1)
+        now = time.time()
+        counts: Dict[tuple, Dict[str, Dict[int, int]]] = {}
+        with self._lock:
+            for (series, field), cell_values in self._values.get(db, {}).items():
+                if series[0] not in measurements:
+                    continue
+                for timestamp, visible_at in cell_values.items():
+                    if low <= timestamp < high and visible_at <= now:
+                        windows = counts.setdefault(series, {}).setdefault(field, {})
+                        window_start = timestamp - timestamp % window
+                        windows[window_start] = windows.get(window_start, 0) + 1
+        
+        result = []
+        for (measurement, tags), fields in sorted(counts.items()):
+            names = sorted(fields)
+            values = [
+                [window_start // divider] + [fields[name].get(window_start, 0) for name in names]
+                for window_start in range(low - low % window, high, window)
+            ]
+            columns = ['time'] + [f'count_{name}' for name in names]
+            result.append(dict(name=measurement, tags=dict(tags), columns=columns, values=values))
+        return result
+    
+    def _query(self, params: dict) -> Tuple[int, dict, bytes]:
+        self._count('queries')
+        query = params.get('q', '').strip()
+        if not query:
+            return self._error(400, 'missing required parameter "q"')
+        
+        results = []
+        for statement_id, statement in enumerate(part.strip() for part in query.split(';') if part.strip()):
+            result = dict(statement_id=statement_id)
+            database = _DATABASE.match(statement)
+            if database:
+                with self._lock:
+                    if database[1].upper() == 'CREATE':
+                        self._databases.setdefault(database[2], 0)
+                    else:
+                        self._databases.pop(database[2], None)
+                        self._values.pop(database[2], None)
+            elif statement.upper() == 'SHOW DATABASES':
+                with self._lock:
+                    values = [[name] for name in self._databases]
+                result['series'] = [dict(name='databases', columns=['name'], values=values)]
+            elif _RETENTION_POLICIES.match(statement):
+                # Политика хранения по умолчанию, как у БД, созданной без параметров
+                result['series'] = [dict(columns=['name', 'duration', 'shardGroupDuration', 'replicaN', 'default'],
+                                         values=[['autogen', '0s', '168h0m0s', 1, True]])]
+            elif self.store and _GROUPED_COUNT.match(statement):
+                result['series'] = self._grouped_count(params.get('db'), _GROUPED_COUNT.match(statement),
+                                                       params.get('epoch', 'ns'))
+            elif _COUNT.match(statement):
+                with self._lock:
+                    count = self._databases.get(params.get('db'), 0)
+                result['series'] = [dict(name='mock', columns=['time', 'count'], values=[[0, count]])]
+            elif statement.upper().startswith('SELECT'):
+                if self.query_response is not None:
+                    return 200, {}, json.dumps(self.query_response).encode()
+                result['series'] = [dict(name='mock', columns=['time', 'value'], values=[[0, 0.0]])]
+            results.append(result)
+        if params.get('chunked') == 'true':
+            # Ответ частями: каждая серия (или результат запроса без серий) - отдельный объект JSON в отдельной строке
+            chunks = [
+                dict(results=[dict(result, series=[series], partial=True)])
+                for result in results if result.get('series') for series in result['series']
+            ] + [dict(results=[result]) for result in results if not result.get('series')]
+            return 200, {}, b''.join(json.dumps(chunk).encode() + b'\n' for chunk in chunks)
+        return 200, {}, json.dumps(dict(results=results)).encode()
+    
+    def _debug_vars(self) -> dict:
+        stats = self.stats
+        return {
+            'cmdline': ['mock_server'],
+            'httpd::mock': dict(name='httpd', tags=dict(bind=f'{self.host}:{self.port}'), values=dict(
+                pointsWrittenOK=stats['points'], writeReq=stats['writes'], queryReq=stats['queries'],
+                reqActive=stats['active']
+            )),
+            'write': dict(name='write', tags={}, values=dict(pointReq=stats['points'], writeError=stats['errors'])),
+        }
+
+
+def serve(**kwargs):
+    """
+    Запуск сервера в текущем потоке до прерывания процесса
+
+    :param kwargs: Параметры MockInfluxDB
+    """
+    async def _main():
+        server = await MockInfluxDB(**kwargs).serve()
+        async with server:
+            await server.serve_forever()
+    
+    asyncio.run(_main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1', help='Адрес, на котором сервер принимает соединения')
+    parser.add_argument('--port', type=int, default=8086, help='Порт')
+    parser.add_argument('--latency', type=float, default=0.0, help='Задержка ответа (в секундах)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Максимальная случайная добавка к задержке')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Доля запросов на запись с ответом об ошибке')
+    parser.add_argument('--error-status', type=int, default=503, choices=sorted(_ERRORS),
+                        help='Код ответа об ошибке')
+    parser.add_argument('--retry-after', type=float, help='Значение заголовка Retry-After в ответах об ошибке')
+    parser.add_argument('--validate', action='store_true', help='Проверять каждую строку line protocol')
+    parser.add_argument('--store', action='store_true', help='Хранить значения для подсчёта запросами count(*)')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='Доля молча отбрасываемых значений')
+    parser.add_argument('--visibility-delay', type=float, default=0.0,
+                        help='Через сколько секунд после записи значения видны запросам')
+    args = parser.parse_args()
+    
+    print(f'Замена InfluxDB: http://{args.host}:{args.port}')
+    try:
+        serve(host=args.host, port=args.port, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+              error_status=args.error_status, retry_after=args.retry_after, validate=args.validate, store=args.store,
+              drop_rate=args.drop_rate, visibility_delay=args.visibility_delay)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+import multiprocessing
+import queue
+from typing import Callable, Iterable, List, Union, Iterator
+
+from .results import RunResult
+from .retry import RetryPolicy
+
+
+def _write_worker(tester,
+                  node_names: List[str],
+                  node_batches: Callable[[str], Iterable[Union[bytes, Iterator[bytes]]]],
+                  barrier: multiprocessing.Barrier,
+                  results: multiprocessing.Queue,
+                  retry: RetryPolicy = None,
+                  adaptive_concurrency: bool = False):
+    """
+    Запись узлами одного процесса
+
+    Соединения родительского процесса не используются: процессу создаётся собственная сессия.
+    Потоки процесса подготавливают данные и дожидаются друг друга на локальном барьере, после чего последний
+    из них дожидается остальных процессов на межпроцессном барьере. В родительский процесс передаётся время
+    начала и окончания записи в процессе, результат запросов процесса и счётчик соединений
+    либо возникшее исключение
+    """
+    tester._start_time = None
+    tester._end_time = None
+    tester._connection_stats.reset()
+    tester._session = tester._new_session()
+    
+    def _start_action():
+        barrier.wait()
+        tester._set_start_time()
+    
+    try:
+        result = tester._threaded_write(node_names, node_batches, start_action=_start_action, retry=retry,
+                                        adaptive_concurrency=adaptive_concurrency)
+        if tester._start_time is None or tester._end_time is None:
+            raise RuntimeError('Запись в одном из процессов завершилась с ошибкой')
+        results.put((tester._start_time, tester._end_time, result, tester._connection_stats))
+    except BaseException as ex:
+        barrier.abort()
+        results.put(ex)
+
+
+def run_write(tester,
+              node_names: List[str],
+              node_batches: Callable[[str], Iterable[Union[bytes, Iterator[bytes]]]],
+              workers: int,
+              retry: RetryPolicy = None,
+              adaptive_concurrency: bool = False) -> RunResult:
+    """
+    Одновременная запись узлами, распределёнными между несколькими процессами
+
+    Время начала операции - самое раннее из времён начала записи процессами, время окончания - самое позднее.
+    Гистограммы времени выполнения запросов процессов объединяются
+
+    :param tester: Объект StressTester, от имени которого выполняется запись
+    :param node_names: Имена узлов
+    :param node_batches: Функция, возвращающая тела запросов узла. Должна поддерживать pickle
+    :param workers: Количество процессов
+    :param retry: Правила повтора запросов, завершившихся перегрузкой или ошибкой. None - без повторов
+    :param adaptive_concurrency: Подстраивать ли количество одновременных запросов под перегрузку СУБД.
+        Ограничение действует в каждом процессе независимо
+    :return: Объединённый результат запросов всех процессов (без длительности операции)
+    """
+    workers = max(1, min(workers, len(node_names)))
+    
+    context = multiprocessing.get_context()
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    
+    processes = [
+        context.Process(target=_write_worker, args=(tester, node_names[i::workers], node_batches, barrier, results,
+                                                    retry, adaptive_concurrency))
+        for i in range(workers)
+    ]
+    
+    for process in processes:
+        process.start()
+    
+    collected = []
+    while len(collected) < workers:
+        try:
+            collected.append(results.get(timeout=1))
+        except queue.Empty:
+            if not any(process.is_alive() for process in processes):
+                barrier.abort()
+                raise RuntimeError('Процессы записи завершились, не передав результат')
+    
+    for process in processes:
+        process.join()
+    
+    for result in collected:
+        if isinstance(result, BaseException):
+            raise result
+    
+    tester._start_time = min(start_time for start_time, _, _, _ in collected)
+    tester._end_time = max(end_time for _, end_time, _, _ in collected)
+    run_result = RunResult()
+    for _, _, process_result, connection_stats in collected:
+        run_result.merge(process_result)
+        tester._connection_stats.merge(connection_stats)
+    
+    return run_result
@@ -0,0 +1,110 @@
+import gzip
+import shutil
+from pathlib import Path
+from typing import Union, Iterator, List
+
+
+class PayloadCache:
+    """
+    Дисковый кэш данных для записи в InfluxDB
+
+    Данные каждого узла хранятся в отдельном сжатом gzip файле в виде строк line protocol, метки времени которых
+    отсчитываются от нуля. При воспроизведении метки времени сдвигаются к заданному моменту начала записи
+    """
+    
+    def __init__(self, directory: Union[str, Path], compresslevel: int = 1):
+        """
+        :param directory: Каталог для хранения сгенерированных данных
+        :param compresslevel: Степень сжатия gzip (1-9). По умолчанию 1 - максимальная скорость
+        """
+        self._directory = Path(directory)
+        self._compresslevel = compresslevel
+    
+    def prepare(self,
+                tester,
+                node_names: List[str],
+                float_sensors: int,
+                int_sensors: int,
+                str_sensors: int,
+                bool_sensors: int,
+                duration: int,
+                seed: int = None,
+                generator: str = 'python',
+                schema=None,
+                sample_interval: float = 1.0,
+                signals=None,
+                nodes_count: int = None) -> Path:
+        """
+        Генерация данных, если для заданного набора параметров они ещё не были сгенерированы
+
+        :param tester: Объект StressTester, которым генерируются данные
+        :param node_names: Имена узлов
+        :param float_sensors: Количество вещественных датчиков на узле
+        :param int_sensors: Количество целочисленных датчиков на узле
+        :param str_sensors: Количество строковых датчиков на узле
+        :param bool_sensors: Количество булевых датчиков на узле
+        :param duration: На протяжении скольки секунд копились данные
+        :param seed: Начальное значение генератора случайных чисел
+        :param generator: Способ генерации данных (python или numpy)
+        :param schema: Схема данных (Schema). По умолчанию - схема StressTester
+        :param sample_interval: Интервал между значениями датчика (в секундах)
+        :param signals: Модели значений датчиков (Signals). По умолчанию - равномерно распределённые значения
+        :param nodes_count: Количество узлов всей нагрузки, между которыми распределяются устройства схемы.
+            По умолчанию - количество node_names. При распределённой нагрузке node_names - только доля узлов
+            агента, и данные каждой доли хранятся отдельно
+        :return: Каталог со сгенерированными данными
+        """
+        if nodes_count is None:
+            nodes_count = len(node_names)
+        share = ''
+        if len(node_names) != nodes_count:
+            share = f'_nodes{node_names[0]}-{node_names[-1]}' if node_names else '_nodes'
+        precision = tester.config['precision']
+        corpus = self._directory / (
+            f'n{nodes_count}{share}'
+            f'_f{float_sensors}_i{int_sensors}_s{str_sensors}_b{bool_sensors}'
+            f'_d{duration}_seed{seed}_{generator}_{precision}'
+            f'{"" if sample_interval == 1 else f"_every{sample_interval:g}"}'
+            f'{"" if schema is None else f"_schema{schema.key}"}'
+            f'{"" if signals is None else f"_signals{signals.key}"}'
+        )
+        
+        if corpus.is_dir():
+            return corpus
+        
+        incomplete = corpus.with_name(corpus.name + '.tmp')
+        if incomplete.exists():
+            shutil.rmtree(incomplete)
+        incomplete.mkdir(parents=True)
+        
+        for node_name in node_names:
+            lines = tester._node_lines(node_name, float_sensors, int_sensors, str_sensors, bool_sensors,
+                                       duration, 0, seed, generator, schema, nodes_count, sample_interval,
+                                       signals)
+            with gzip.open(incomplete / f'{node_name}.lp.gz', mode='wb', compresslevel=self._compresslevel) as fp:
+                fp.writelines(line + b'\n' for line in lines)
+        
+        incomplete.rename(corpus)
+        
+        return corpus
+    
+    @staticmethod
+    def replay(corpus: Path, node_name: str, start_timestamp: int) -> Iterator[bytes]:
+        """
+        Воспроизведение данных узла
+
+        :param corpus: Каталог со сгенерированными данными (результат prepare)
+        :param node_name: Имя узла
+        :param start_timestamp: Метка времени первой точки
+        :return: Итератор по закодированным строкам (без завершающего перевода строки)
+        """
+        last_offset = None
+        timestamp = b''
+        
+        with gzip.open(corpus / f'{node_name}.lp.gz', mode='rb') as fp:
+            for line in fp:
+                prefix, _, offset = line.rstrip(b'\n').rpartition(b' ')
+                if offset != last_offset:
+                    last_offset = offset
+                    timestamp = str(start_timestamp + int(offset)).encode()
+                yield prefix + b' ' + timestamp
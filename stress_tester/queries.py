@@ -0,0 +1,186 @@
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Sequence, Tuple
+
+import requests
+
+
+class QueryTemplate:
+    """
+    Шаблон запроса на чтение
+
+    В шаблон подставляются: {measurement}, {field}, {tag} - имена измерения, поля и тега, {tag_value} - случайное
+    значение тега, {start} и {end} - границы случайного временного окна длительностью window секунд
+    """
+    
+    def __init__(self, name: str, query: str, weight: float = 1.0, window: float = 300):
+        """
+        :param name: Имя шаблона, под которым учитываются его запросы
+        :param query: Шаблон запроса InfluxQL
+        :param weight: Вес шаблона: доля его запросов пропорциональна весу
+        :param window: Длительность временного окна запроса (в секундах)
+        """
+        if weight <= 0:
+            raise ValueError('Вес шаблона должен быть положительным')
+        if window <= 0:
+            raise ValueError('Длительность временного окна должна быть положительной')
+        self.name = name
+        self.query = query
+        self.weight = weight
+        self.window = window
+    
+    def __repr__(self):
+        return f'QueryTemplate({self.name!r}, {self.query!r}, weight={self.weight}, window={self.window})'
+
+
+_SELECT = 'SELECT {function} FROM "{{measurement}}" WHERE {condition}time >= {{start}} AND time < {{end}}{group_by}'
+
+
+def _select(function: str, condition: str = '', group_by: str = '') -> str:
+    return _SELECT.format(function=function, condition=condition, group_by=group_by)
+
+
+# Смесь запросов по умолчанию: сырые данные за короткое окно, агрегаты с разными интервалами группировки,
+# последнее значение, выборка по тегу и агрегаты по сериям
+DEFAULT_TEMPLATES = (
+    QueryTemplate('raw', _select('"{field}"'), weight=2, window=60),
+    QueryTemplate('mean_10s', _select('mean("{field}")', group_by=' GROUP BY time(10s)'), weight=3, window=60 * 60),
+    QueryTemplate('max_1m', _select('max("{field}")', group_by=' GROUP BY time(1m)'), weight=2, window=6 * 60 * 60),
+    QueryTemplate('last', _select('last("{field}")'), weight=2, window=60 * 60),
+    QueryTemplate('tag_filter', _select('"{field}"', condition='"{tag}" = \'{tag_value}\' AND '), weight=2,
+                  window=10 * 60),
+    QueryTemplate('multi_series', _select('mean("{field}")', group_by=' GROUP BY time(1m), "{tag}"'), weight=1,
+                  window=60 * 60),
+)
+
+
+class QueryMix:
+    """
+    Смесь запросов на чтение: шаблон выбирается случайно с учётом весов, временное окно запроса
+    располагается случайно внутри заданного периода, поэтому одновременно работающие узлы отправляют
+    разные запросы и кэш запросов СУБД не приукрашивает результаты
+    """
+    
+    def __init__(self,
+                 start_date: datetime,
+                 end_date: datetime,
+                 templates: Sequence[QueryTemplate] = DEFAULT_TEMPLATES,
+                 measurement: str = 'python_measurement',
+                 field: str = 'float',
+                 tag: str = 'thread',
+                 tag_values: Sequence[str] = ('1',)):
+        """
+        :param start_date: Начало периода, в котором располагаются окна запросов
+        :param end_date: Конец периода. Окно, которое длиннее периода, совпадает с периодом
+        :param templates: Шаблоны запросов (см. QueryTemplate). По умолчанию - DEFAULT_TEMPLATES
+        :param measurement: Измерение. По умолчанию - измерение данных write без схемы
+        :param field: Поле. По умолчанию - вещественные значения
+        :param tag: Тег для выборки по тегу и группировки по сериям. По умолчанию - тег узла записи thread
+        :param tag_values: Значения тега, из которых выбирается {tag_value}. По умолчанию - первый узел записи
+        """
+        if end_date <= start_date:
+            raise ValueError('Конец периода должен быть позже начала')
+        if not templates:
+            raise ValueError('Не заданы шаблоны запросов')
+        self.start_date = start_date
+        self.end_date = end_date
+        self.templates = list(templates)
+        self.measurement = measurement
+        self.field = field
+        self.tag = tag
+        self.tag_values = list(tag_values)
+    
+    def query(self, rng=random) -> Tuple[str, str]:
+        """
+        :param rng: Генератор случайных чисел
+        :return: Имя шаблона и запрос
+        """
+        template, = rng.choices(self.templates, weights=[template.weight for template in self.templates])
+        period = (self.end_date - self.start_date).total_seconds()
+        window = min(template.window, period)
+        start = self.start_date + timedelta(seconds=rng.uniform(0, period - window))
+        query = template.query.format(
+            measurement=self.measurement,
+            field=self.field,
+            tag=self.tag,
+            tag_value=rng.choice(self.tag_values),
+            start=f'{int(start.timestamp() * 1000)}ms',
+            end=f'{int((start + timedelta(seconds=window)).timestamp() * 1000)}ms'
+        )
+        return template.name, query
+
+
+def _statements(data: dict) -> Iterable[dict]:
+    return data.get('results', ())
+
+
+def count_rows(data: dict) -> int:
+    """
+    :param data: Ответ /query
+    :return: Количество строк во всех сериях всех выражений ответа
+    """
+    return sum(
+        len(series.get('values', ()))
+        for statement in _statements(data)
+        for series in statement.get('series', ())
+    )
+
+
+def has_error(data: dict) -> bool:
+    """
+    :param data: Ответ /query
+    :return: Завершилось ли ошибкой выполнение запроса или какого-либо выражения (InfluxDB сообщает об ошибке
+        выражения в теле ответа с кодом 200)
+    """
+    return 'error' in data or any('error' in statement for statement in _statements(data))
+
+
+def parse_content(content: bytes) -> Tuple[int, bool, dict]:
+    """
+    :param content: Тело ответа /query
+    :return: Количество строк, признак ошибки и разобранный ответ
+    """
+    try:
+        data = json.loads(content) if content else {}
+    except ValueError:
+        return 0, True, {}
+    return count_rows(data), has_error(data), data
+
+
+def read_response(response: requests.Response, chunked: bool = False,
+                  on_data: Callable[[dict], None] = None) -> Tuple[int, int, bool, dict]:
+    """
+    Чтение ответа /query
+
+    :param response: Ответ, полученный с stream=True при chunked
+    :param chunked: Передаётся ли ответ частями (запрос с chunked=true). Части читаются и разбираются по мере
+        получения, целиком ответ в памяти не хранится
+    :param on_data: Функция, вызываемая с каждой разобранной частью ответа (или с ответом целиком)
+    :return: Количество строк, количество байт, признак ошибки и разобранный ответ (для chunked - последняя часть)
+    """
+    if not chunked:
+        content = response.content
+        rows, error, data = parse_content(content)
+        if on_data is not None:
+            on_data(data)
+        return rows, len(content), error or not response.ok, data
+    
+    rows = 0
+    bytes_count = 0
+    error = not response.ok
+    data = {}
+    for line in response.iter_lines():
+        bytes_count += len(line) + 1
+        if not line:
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            error = True
+            continue
+        rows += count_rows(data)
+        error = error or has_error(data)
+        if on_data is not None:
+            on_data(data)
+    return rows, bytes_count, error, data
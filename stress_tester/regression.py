@@ -0,0 +1,160 @@
+import math
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .histogram import LatencyHistogram
+from .results_store import merged_latency
+
+
+def _incomplete_beta(a: float, b: float, x: float) -> float:
+    """
+    Регуляризованная неполная бета-функция I_x(a, b) (разложение в цепную дробь)
+    """
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    if x > (a + 1) / (a + b + 2):
+        return 1.0 - _incomplete_beta(b, a, 1 - x)
+    
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x)) / a
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    fraction = d
+    for m in range(1, 300):
+        for numerator in (
+                m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))
+        ):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            fraction *= c * d
+        if abs(c * d - 1.0) < 1e-12:
+            break
+    return front * fraction
+
+
+def welch_t_test(baseline: Sequence[float], candidate: Sequence[float]) -> Optional[float]:
+    """
+    Двусторонний t-критерий Уэлча для выборок с разными дисперсиями
+
+    :return: p-значение гипотезы о равенстве средних, либо None, если в какой-либо выборке меньше двух значений
+    """
+    if len(baseline) < 2 or len(candidate) < 2:
+        return None
+    mean_a = sum(baseline) / len(baseline)
+    mean_b = sum(candidate) / len(candidate)
+    var_a = sum((value - mean_a) ** 2 for value in baseline) / (len(baseline) - 1) / len(baseline)
+    var_b = sum((value - mean_b) ** 2 for value in candidate) / (len(candidate) - 1) / len(candidate)
+    if var_a + var_b == 0:
+        return 1.0 if mean_a == mean_b else 0.0
+    t = (mean_b - mean_a) / math.sqrt(var_a + var_b)
+    df = (var_a + var_b) ** 2 / (var_a ** 2 / (len(baseline) - 1) + var_b ** 2 / (len(candidate) - 1))
+    return _incomplete_beta(df / 2, 0.5, df / (df + t * t))
+
+
+def mann_whitney(baseline: LatencyHistogram, candidate: LatencyHistogram) -> Tuple[float, float]:
+    """
+    U-критерий Манна-Уитни по гистограммам (значения одного интервала гистограммы считаются равными)
+
+    :return: z-статистика (положительная, если значения candidate в целом больше) и двустороннее p-значение
+        в нормальном приближении
+    """
+    n_a, n_b = baseline.count, candidate.count
+    if not n_a or not n_b:
+        return 0.0, 1.0
+    total = n_a + n_b
+    rank = 0
+    rank_sum = 0.0
+    ties = 0.0
+    counts_a, counts_b = baseline.counts(), candidate.counts()
+    for index in sorted(counts_a.keys() | counts_b.keys()):
+        count_a, count_b = counts_a.get(index, 0), counts_b.get(index, 0)
+        group = count_a + count_b
+        rank_sum += count_b * (rank + (group + 1) / 2)
+        ties += group ** 3 - group
+        rank += group
+    u = rank_sum - n_b * (n_b + 1) / 2
+    variance = n_a * n_b / 12 * (total + 1 - ties / (total * (total - 1))) if total > 1 else 0.0
+    if variance <= 0:
+        return 0.0, 1.0
+    z = (u - n_a * n_b / 2) / math.sqrt(variance)
+    return z, math.erfc(abs(z) / math.sqrt(2))
+
+
+def _throughput(record: dict, part: str) -> Tuple[str, float]:
+    result = record['result'].get(part, record['result'])
+    if result['points']:
+        return 'points_per_second', result['points_per_second']
+    return 'requests_per_second', result['requests'] / result['duration'] if result['duration'] else 0.0
+
+
+def _change(baseline: float, candidate: float) -> Optional[float]:
+    return (candidate - baseline) / baseline if baseline else None
+
+
+def compare_runs(baseline: List[dict],
+                 candidate: List[dict],
+                 alpha: float = 0.01,
+                 threshold: float = 0.05) -> List[dict]:
+    """
+    Сравнение замеров по записям хранилища ResultsStore
+
+    Шаги сопоставляются по имени сценария и шага, результаты шагов с одинаковым именем (повторы в замере,
+    либо несколько замеров с одной меткой) объединяются. Скорость (точек в секунду, для чтения - запросов
+    в секунду) сравнивается t-критерием Уэлча по повторам, время выполнения запросов (p50, p99) - U-критерием
+    Манна-Уитни по объединённым гистограммам. Изменение считается регрессией или улучшением, если оно
+    статистически значимо (p-значение меньше alpha) и относительное изменение показателя больше threshold
+
+    :param baseline: Записи базового замера
+    :param candidate: Записи сравниваемого замера
+    :param alpha: Уровень значимости
+    :param threshold: Минимальное относительное изменение показателя
+    :return: Строки сравнения: сценарий, шаг, вид запросов, показатель, значения, относительное изменение,
+        p-значение (None, если повторов недостаточно) и вывод (regression, improvement, unchanged, insufficient)
+    """
+    def _group(records: List[dict]) -> Dict[Tuple[str, str], List[dict]]:
+        groups = defaultdict(list)
+        for record in records:
+            groups[(record['scenario'], record['step'])].append(record)
+        return groups
+    
+    baseline_groups = _group(baseline)
+    candidate_groups = _group(candidate)
+    
+    rows = []
+    
+    def _row(key, part, metric, baseline_value, candidate_value, p_value, higher_is_better):
+        change = _change(baseline_value, candidate_value)
+        if p_value is None:
+            verdict = 'insufficient'
+        elif p_value < alpha and change is not None and abs(change) > threshold:
+            verdict = 'improvement' if (change > 0) == higher_is_better else 'regression'
+        else:
+            verdict = 'unchanged'
+        rows.append(dict(scenario=key[0], step=key[1], part=part, metric=metric, baseline=baseline_value,
+                         candidate=candidate_value, change=change, p_value=p_value, verdict=verdict))
+    
+    for key, baseline_records in baseline_groups.items():
+        candidate_records = candidate_groups.get(key)
+        if not candidate_records:
+            continue
+        parts = [part for part in baseline_records[0]['latency'] if part in candidate_records[0]['latency']]
+        for part in parts:
+            metric, _ = _throughput(baseline_records[0], part)
+            baseline_rates = [_throughput(record, part)[1] for record in baseline_records]
+            candidate_rates = [_throughput(record, part)[1] for record in candidate_records]
+            _row(key, part, metric, sum(baseline_rates) / len(baseline_rates),
+                 sum(candidate_rates) / len(candidate_rates), welch_t_test(baseline_rates, candidate_rates), True)
+            
+            baseline_latency = merged_latency(baseline_records, part)
+            candidate_latency = merged_latency(candidate_records, part)
+            _, p_value = mann_whitney(baseline_latency, candidate_latency)
+            for percent in (50, 99):
+                _row(key, part, f'p{percent}', baseline_latency.percentile(percent),
+                     candidate_latency.percentile(percent), p_value, False)
+    
+    return rows
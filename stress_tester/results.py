@@ -0,0 +1,822 @@
+from datetime import datetime, timezone
+from typing import Optional, Union, Iterator, List, Dict, Sequence
+
+from .compression import CompressedBatch, CompressedStream
+from .histogram import LatencyHistogram
+from .live import LiveMetrics
+
+
+class CountingBody:
+    """
+    Тело запроса на запись, учитывающее количество переданных точек и байт
+
+    Тело, передаваемое по частям, учитывается по мере передачи частей. Для сжатого тела учитываются
+    и несжатый размер, и время сжатия
+    """
+    
+    def __init__(self, body: Union[bytes, Iterator[bytes], CompressedBatch, CompressedStream]):
+        """
+        :param body: Байты (строки line protocol без завершающего перевода строки), итератор по частям тела
+            (каждая часть завершается переводом строки), либо сжатое тело (см. compress_batches)
+        """
+        self._body = body
+        self._compressed = body if isinstance(body, (CompressedBatch, CompressedStream)) else None
+        self._points = 0
+        self.bytes = 0
+        if isinstance(body, bytes):
+            self._count(body)
+        elif isinstance(body, CompressedBatch):
+            self.bytes = len(body.data)
+    
+    def _count(self, chunk: bytes):
+        self.bytes += len(chunk)
+        if self._compressed is None and chunk:
+            self._points += chunk.count(b'\n') + (not chunk.endswith(b'\n'))
+    
+    def _chunks(self) -> Iterator[bytes]:
+        for chunk in self._body:
+            self._count(chunk)
+            yield chunk
+    
+    @property
+    def data(self) -> Union[bytes, Iterator[bytes]]:
+        """
+        :return: Тело для передачи в запрос
+        """
+        if isinstance(self._body, bytes):
+            return self._body
+        if isinstance(self._body, CompressedBatch):
+            return self._body.data
+        return self._chunks()
+    
+    @property
+    def headers(self) -> dict:
+        """
+        :return: Заголовки, описывающие тело запроса
+        """
+        if self._compressed is None:
+            return {}
+        return {'Content-Encoding': self._compressed.encoding}
+    
+    @property
+    def points(self) -> int:
+        if self._compressed is None:
+            return self._points
+        return self._compressed.points
+    
+    @property
+    def raw_bytes(self) -> int:
+        """
+        :return: Размер тела до сжатия
+        """
+        if self._compressed is None:
+            return self.bytes
+        return self._compressed.raw_bytes
+    
+    @property
+    def compress_time(self) -> float:
+        """
+        :return: Процессорное время (в секундах), затраченное на сжатие тела
+        """
+        if self._compressed is None:
+            return 0.0
+        return self._compressed.cpu_time
+    
+    @property
+    def replayable(self) -> bool:
+        """
+        :return: Можно ли отправить тело повторно. Тело, передаваемое по частям, генерируется по мере отправки
+            и повторно не отправляется
+        """
+        return isinstance(self._body, (bytes, CompressedBatch))
+
+
+class RunResult:
+    """
+    Результат одновременной записи или чтения
+
+    Объекты, собранные отдельными узлами (потоками, сопрограммами, процессами), объединяются методом merge.
+    Если задан объект LiveMetrics, запросы учитываются и в нём по мере выполнения. Показатели InfluxDB, снятые
+    во время нагрузки (ServerStats), назначаются атрибуту server, результат проверки записанных данных
+    (VerificationResult) - атрибуту verification
+    """
+    
+    _COUNTERS = ('requests', 'errors', 'points', 'rows', 'bytes', 'raw_bytes', 'compress_time', 'attempts',
+                 'attempted_points', 'attempted_bytes')
+    
+    def __init__(self, live: LiveMetrics = None):
+        """
+        :param live: Показатели хода нагрузки, в которых запросы учитываются по мере выполнения
+        """
+        self.live = live
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.errors = 0
+        self.points = 0
+        self.rows = 0
+        self.bytes = 0
+        self.raw_bytes = 0
+        self.compress_time = 0.0
+        self.attempts = 0
+        self.outcomes: Dict[str, int] = {}
+        self.attempted_points = 0
+        self.attempted_bytes = 0
+        self.concurrency: Optional[dict] = None
+        self.duration: Optional[float] = None
+        self.server = None
+        self.verification: Optional[VerificationResult] = None
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['live'] = None
+        return state
+    
+    def request_started(self):
+        """
+        Учёт начала выполнения запроса в показателях хода нагрузки
+        """
+        if self.live is not None:
+            self.live.request_started()
+    
+    def record(self, latency: float, points: int = 0, bytes_count: int = 0, error: bool = False,
+               raw_bytes: int = None, compress_time: float = 0.0, rows: int = 0, outcomes: Sequence[str] = None):
+        """
+        Учёт выполненного запроса
+
+        :param latency: Время выполнения запроса (в секундах)
+        :param points: Количество переданных точек
+        :param bytes_count: Количество переданных байт
+        :param error: Завершился ли запрос ошибкой
+        :param raw_bytes: Размер тела запроса до сжатия. По умолчанию совпадает с bytes_count
+        :param compress_time: Процессорное время (в секундах), затраченное на сжатие тела запроса
+        :param rows: Количество полученных строк (для запросов на чтение)
+        :param outcomes: Классы ответов на каждую попытку выполнения запроса, включая повторы (см. retry.OUTCOMES).
+            По умолчанию - одна попытка, ok или error
+        """
+        if outcomes is None:
+            outcomes = ('error' if error else 'ok',)
+        self.latency.record(latency)
+        self.requests += 1
+        self.compress_time += compress_time
+        self.attempts += len(outcomes)
+        for outcome in outcomes:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        self.attempted_points += points * len(outcomes)
+        self.attempted_bytes += bytes_count * len(outcomes)
+        if self.live is not None:
+            self.live.record(latency, points, bytes_count, error)
+        if error:
+            self.errors += 1
+        else:
+            self.points += points
+            self.rows += rows
+            self.bytes += bytes_count
+            self.raw_bytes += bytes_count if raw_bytes is None else raw_bytes
+    
+    def record_body(self, latency: float, body: CountingBody, error: bool = False, outcomes: Sequence[str] = None):
+        """
+        Учёт выполненного запроса на запись
+        """
+        self.record(latency, body.points, body.bytes, error, body.raw_bytes, body.compress_time, outcomes=outcomes)
+    
+    def merge(self, other: 'RunResult'):
+        """
+        Добавление запросов, учтённых другим объектом
+        """
+        self.latency.merge(other.latency)
+        self.requests += other.requests
+        self.errors += other.errors
+        self.points += other.points
+        self.rows += other.rows
+        self.bytes += other.bytes
+        self.raw_bytes += other.raw_bytes
+        self.compress_time += other.compress_time
+        self.attempts += other.attempts
+        for outcome, count in other.outcomes.items():
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + count
+        self.attempted_points += other.attempted_points
+        self.attempted_bytes += other.attempted_bytes
+        if other.concurrency is not None:
+            if self.concurrency is None:
+                self.concurrency = dict(other.concurrency)
+            else:
+                # Ограничения процессов действуют независимо, поэтому суммируются
+                for key, value in other.concurrency.items():
+                    self.concurrency[key] = self.concurrency.get(key, 0) + value
+        if other.verification is not None:
+            if self.verification is None:
+                self.verification = VerificationResult()
+            self.verification.merge(other.verification)
+    
+    @property
+    def points_per_second(self) -> float:
+        """
+        :return: Скорость передачи точек (без учёта запросов, завершившихся ошибкой)
+        """
+        return self.points / self.duration if self.duration else 0.0
+    
+    @property
+    def attempted_points_per_second(self) -> float:
+        """
+        :return: Скорость отправки точек с учётом повторов и запросов, завершившихся ошибкой. В отличие от
+            points_per_second (полезной скорости) показывает нагрузку, которую на самом деле получила СУБД
+        """
+        return self.attempted_points / self.duration if self.duration else 0.0
+    
+    @property
+    def retries(self) -> int:
+        """
+        :return: Количество повторных попыток выполнения запросов
+        """
+        return self.attempts - self.requests
+    
+    @property
+    def rows_per_second(self) -> float:
+        """
+        :return: Скорость получения строк ответов на запросы чтения (без учёта запросов, завершившихся ошибкой)
+        """
+        return self.rows / self.duration if self.duration else 0.0
+    
+    @property
+    def bytes_per_second(self) -> float:
+        """
+        :return: Скорость передачи данных в байтах (без учёта запросов, завершившихся ошибкой)
+        """
+        return self.bytes / self.duration if self.duration else 0.0
+    
+    @property
+    def compression_ratio(self) -> float:
+        """
+        :return: Отношение размера данных до сжатия к переданному размеру. 1 - данные передавались без сжатия
+        """
+        return self.raw_bytes / self.bytes if self.bytes else 1.0
+    
+    @property
+    def p50(self) -> float:
+        return self.latency.percentile(50)
+    
+    @property
+    def p90(self) -> float:
+        return self.latency.percentile(90)
+    
+    @property
+    def p99(self) -> float:
+        return self.latency.percentile(99)
+    
+    @property
+    def max(self) -> float:
+        return self.latency.max
+    
+    def as_dict(self) -> dict:
+        """
+        :return: Основные показатели результата
+        """
+        return dict(
+            duration=self.duration,
+            requests=self.requests,
+            errors=self.errors,
+            points=self.points,
+            bytes=self.bytes,
+            points_per_second=self.points_per_second,
+            bytes_per_second=self.bytes_per_second,
+            rows=self.rows,
+            rows_per_second=self.rows_per_second,
+            raw_bytes=self.raw_bytes,
+            compression_ratio=self.compression_ratio,
+            compress_time=self.compress_time,
+            attempts=self.attempts,
+            retries=self.retries,
+            outcomes=dict(self.outcomes),
+            attempted_points=self.attempted_points,
+            attempted_points_per_second=self.attempted_points_per_second,
+            concurrency=self.concurrency,
+            p50=self.p50,
+            p90=self.p90,
+            p99=self.p99,
+            max=self.max,
+            server=self.server.as_dict() if self.server is not None else None,
+            verification=self.verification.as_dict() if self.verification is not None else None
+        )
+    
+    def _summary(self) -> str:
+        summary = (
+            f'Время: {self.duration or 0:.2f} сек., запросов: {self.requests}, ошибок: {self.errors}\n'
+            f'Скорость: {self.points_per_second:.0f} точек/сек., {self.bytes_per_second / 1024 / 1024:.2f} МБ/сек.\n'
+            f'Время запроса: p50 {self.p50:.3f} сек., p90 {self.p90:.3f} сек., '
+            f'p99 {self.p99:.3f} сек., max {self.max:.3f} сек.'
+        )
+        if self.retries or set(self.outcomes) - {'ok'}:
+            outcomes = ', '.join(f'{outcome} {count}' for outcome, count in sorted(self.outcomes.items()))
+            summary += f'\nПопыток: {self.attempts}, повторов: {self.retries}, ответы: {outcomes}'
+            if self.attempted_points:
+                summary += (
+                    f'\nОтправлено: {self.attempted_points_per_second:.0f} точек/сек., '
+                    f'из них записано: {self.points_per_second:.0f} точек/сек.'
+                )
+        if self.concurrency is not None:
+            summary += (
+                f'\nОграничение одновременных запросов: в конце {self.concurrency["limit"]}, '
+                f'наименьшее {self.concurrency["lowest"]}, уменьшений {self.concurrency["decreases"]}'
+            )
+        if self.rows:
+            summary += f'\nПолучено строк: {self.rows} ({self.rows_per_second:.0f} строк/сек.)'
+        if self.compress_time:
+            raw_bytes_per_second = self.raw_bytes / self.duration if self.duration else 0.0
+            summary += (
+                f'\nСжатие: в {self.compression_ratio:.1f} раз, процессорное время {self.compress_time:.2f} сек., '
+                f'данные до сжатия {raw_bytes_per_second / 1024 / 1024:.2f} МБ/сек.'
+            )
+        return summary
+    
+    def to_dict(self) -> dict:
+        """
+        :return: Учтённые запросы в виде, пригодном для сериализации в JSON (в отличие от as_dict - с гистограммой
+            и без производных показателей). Показатели InfluxDB не сохраняются. Восстанавливается from_dict
+        """
+        return dict(
+            {name: getattr(self, name) for name in self._COUNTERS},
+            latency=self.latency.to_dict(),
+            outcomes=dict(self.outcomes),
+            concurrency=self.concurrency,
+            duration=self.duration,
+            verification=self.verification.to_dict() if self.verification is not None else None
+        )
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'RunResult':
+        """
+        :param data: Результат to_dict
+        :return: Восстановленный результат
+        """
+        result = cls()
+        result._load(data)
+        return result
+    
+    def _load(self, data: dict):
+        for name in self._COUNTERS:
+            setattr(self, name, data[name])
+        self.latency = LatencyHistogram.from_dict(data['latency'])
+        self.outcomes = dict(data['outcomes'])
+        self.concurrency = data['concurrency']
+        self.duration = data['duration']
+        if data.get('verification') is not None:
+            self.verification = VerificationResult.from_dict(data['verification'])
+    
+    def __str__(self):
+        parts = [self._summary()]
+        if self.verification is not None:
+            parts.append(str(self.verification))
+        if self.server is not None:
+            parts.append(str(self.server))
+        return '\n'.join(parts)
+
+
+class SustainedResult(RunResult):
+    """
+    Результат длительной нагрузки с заданной интенсивностью (open-loop)
+
+    Время выполнения запроса (latency) отсчитывается от запланированного момента отправки, а не от фактического,
+    поэтому задержки, вызванные тем, что все отправители заняты ожиданием ответов, не теряются
+    (поправка на coordinated omission). Время от фактической отправки до ответа учитывается в service_latency,
+    опоздание отправки относительно расписания - в send_lag
+    """
+    
+    def __init__(self, target_rate: float = 0.0, tolerance: float = 0.05, live: LiveMetrics = None):
+        """
+        :param target_rate: Заданная интенсивность (точек в секунду)
+        :param tolerance: Допустимое относительное отклонение достигнутой интенсивности от заданной
+        :param live: Показатели хода нагрузки
+        """
+        super().__init__(live)
+        self.target_rate = target_rate
+        self.tolerance = tolerance
+        self.service_latency = LatencyHistogram()
+        self.send_lag = LatencyHistogram()
+        self.windows: List[RunResult] = []
+        # Запланированные запросы, которые не были отправлены, потому что данные для них закончились
+        self.unsent = 0
+    
+    def record_scheduled(self, latency: float, service_latency: float, send_lag: float, **request):
+        """
+        Учёт запроса, выполненного по расписанию
+
+        :param latency: Время от запланированного момента отправки до получения ответа (в секундах)
+        :param service_latency: Время от фактической отправки до получения ответа (в секундах)
+        :param send_lag: Опоздание фактической отправки относительно запланированной (в секундах)
+        :param request: Остальные параметры record
+        """
+        self.record(latency, **request)
+        self.service_latency.record(service_latency)
+        self.send_lag.record(send_lag)
+    
+    def merge(self, other: 'RunResult'):
+        super().merge(other)
+        if isinstance(other, SustainedResult):
+            self.service_latency.merge(other.service_latency)
+            self.send_lag.merge(other.send_lag)
+            self.unsent += other.unsent
+    
+    @property
+    def target_reached(self) -> bool:
+        """
+        :return: Достигнута ли заданная интенсивность с учётом допустимого отклонения. Не достигнута, если часть
+            запланированных запросов не была отправлена
+        """
+        return not self.unsent and self.points_per_second >= self.target_rate * (1 - self.tolerance)
+    
+    def as_dict(self) -> dict:
+        return dict(
+            super().as_dict(),
+            target_rate=self.target_rate,
+            target_reached=self.target_reached,
+            service_p99=self.service_latency.percentile(99),
+            send_lag_p99=self.send_lag.percentile(99),
+            send_lag_max=self.send_lag.max,
+            unsent=self.unsent,
+            windows=[window.as_dict() for window in self.windows]
+        )
+    
+    def to_dict(self) -> dict:
+        return dict(
+            super().to_dict(),
+            target_rate=self.target_rate,
+            tolerance=self.tolerance,
+            service_latency=self.service_latency.to_dict(),
+            send_lag=self.send_lag.to_dict(),
+            unsent=self.unsent,
+            windows=[window.to_dict() for window in self.windows]
+        )
+    
+    def _load(self, data: dict):
+        super()._load(data)
+        self.target_rate = data['target_rate']
+        self.tolerance = data['tolerance']
+        self.service_latency = LatencyHistogram.from_dict(data['service_latency'])
+        self.send_lag = LatencyHistogram.from_dict(data['send_lag'])
+        self.unsent = data.get('unsent', 0)
+        self.windows = [RunResult.from_dict(window) for window in data['windows']]
+    
+    def _summary(self) -> str:
+        lines = [
+            super()._summary(),
+            f'Заданная интенсивность: {self.target_rate:.0f} точек/сек., '
+            f'{"достигнута" if self.target_reached else "не достигнута"}',
+            f'Опоздание отправки: p99 {self.send_lag.percentile(99):.3f} сек., max {self.send_lag.max:.3f} сек.'
+        ]
+        if self.unsent:
+            lines.append(f'Не отправлено запросов: {self.unsent} (данные закончились раньше расписания)')
+        window_start = 0.0
+        for window in self.windows:
+            lines.append(
+                f'{window_start:.1f}-{window_start + window.duration:.1f} сек.: '
+                f'{window.points_per_second:.0f} точек/сек., ошибок: {window.errors}, '
+                f'p50 {window.p50:.3f} сек., p99 {window.p99:.3f} сек.'
+            )
+            window_start += window.duration
+        return '\n'.join(lines)
+
+
+class ReadResult(RunResult):
+    """
+    Результат чтения смесью запросов (см. QueryMix)
+
+    Запросы учитываются как в общем результате, так и отдельно по шаблонам (queries). Длительность результата
+    каждого шаблона совпадает с общей, поэтому его скорость - вклад шаблона в общую скорость
+    """
+    
+    def __init__(self, live: LiveMetrics = None):
+        """
+        :param live: Показатели хода нагрузки
+        """
+        super().__init__(live)
+        self.queries: Dict[str, RunResult] = {}
+    
+    def record_query(self, name: str, latency: float, rows: int = 0, bytes_count: int = 0, error: bool = False):
+        """
+        Учёт выполненного запроса
+
+        :param name: Имя шаблона запроса
+        :param latency: Время выполнения запроса, включая получение всего ответа (в секундах)
+        :param rows: Количество полученных строк
+        :param bytes_count: Количество полученных байт
+        :param error: Завершился ли запрос ошибкой
+        """
+        self.record(latency, bytes_count=bytes_count, error=error, rows=rows)
+        self.queries.setdefault(name, RunResult()).record(latency, bytes_count=bytes_count, error=error, rows=rows)
+    
+    def merge(self, other: 'RunResult'):
+        super().merge(other)
+        if isinstance(other, ReadResult):
+            for name, query in other.queries.items():
+                self.queries.setdefault(name, RunResult()).merge(query)
+    
+    def set_duration(self, duration: float):
+        """
+        Назначение длительности общему результату и результатам шаблонов
+        """
+        self.duration = duration
+        for query in self.queries.values():
+            query.duration = duration
+    
+    def as_dict(self) -> dict:
+        return dict(
+            super().as_dict(),
+            queries={name: query.as_dict() for name, query in sorted(self.queries.items())}
+        )
+    
+    def to_dict(self) -> dict:
+        return dict(super().to_dict(), queries={name: query.to_dict() for name, query in self.queries.items()})
+    
+    def _load(self, data: dict):
+        super()._load(data)
+        self.queries = {name: RunResult.from_dict(query) for name, query in data['queries'].items()}
+    
+    def _summary(self) -> str:
+        lines = [super()._summary()]
+        for name, query in sorted(self.queries.items()):
+            lines.append(
+                f'{name}: запросов {query.requests}, ошибок {query.errors}, {query.rows_per_second:.0f} строк/сек., '
+                f'{query.bytes_per_second / 1024 / 1024:.2f} МБ/сек., p50 {query.p50:.3f} сек., '
+                f'p99 {query.p99:.3f} сек.'
+            )
+        return '\n'.join(lines)
+
+
+class BackfillResult(RunResult):
+    """
+    Результат записи исторических данных по группам шардов (см. StressTester.backfill)
+
+    Запросы учитываются как в общем результате, так и отдельно по группам шардов (shard_groups, ключ - начало
+    группы в секундах от начала эпохи). Длительность результата группы - время от отправки первого запроса
+    в группу до получения ответа на последний, поэтому его скорость - скорость записи в группу, пока она
+    записывалась
+    """
+    
+    def __init__(self, shard_duration: float = 0.0, order: str = None, live: LiveMetrics = None):
+        """
+        :param shard_duration: Длительность группы шардов (в секундах)
+        :param order: Порядок записи срезов
+        :param live: Показатели хода нагрузки
+        """
+        super().__init__(live)
+        self.shard_duration = shard_duration
+        self.order = order
+        self.shard_groups: Dict[int, RunResult] = {}
+    
+    def record_group(self, group: int, latency: float, body: CountingBody, error: bool = False,
+                     outcomes: Sequence[str] = None):
+        """
+        Учёт выполненного запроса на запись в группу шардов
+
+        :param group: Начало группы шардов (в секундах от начала эпохи)
+        """
+        self.record_body(latency, body, error, outcomes)
+        self.shard_groups.setdefault(group, RunResult()).record_body(latency, body, error, outcomes)
+    
+    def merge(self, other: 'RunResult'):
+        super().merge(other)
+        if isinstance(other, BackfillResult):
+            self.shard_duration = other.shard_duration
+            self.order = other.order
+            for start, group in other.shard_groups.items():
+                own = self.shard_groups.setdefault(start, RunResult())
+                own.merge(group)
+                if group.duration is not None:
+                    # Группу записывают одновременно (например, разные агенты), поэтому длительность - наибольшая
+                    own.duration = max(own.duration or 0.0, group.duration)
+    
+    def as_dict(self) -> dict:
+        return dict(
+            super().as_dict(),
+            shard_duration=self.shard_duration,
+            order=self.order,
+            shard_groups=[
+                dict(group.as_dict(), start=datetime.fromtimestamp(start, timezone.utc).isoformat())
+                for start, group in sorted(self.shard_groups.items())
+            ]
+        )
+    
+    def to_dict(self) -> dict:
+        return dict(
+            super().to_dict(),
+            shard_duration=self.shard_duration,
+            order=self.order,
+            shard_groups={str(start): group.to_dict() for start, group in self.shard_groups.items()}
+        )
+    
+    def _load(self, data: dict):
+        super()._load(data)
+        self.shard_duration = data['shard_duration']
+        self.order = data['order']
+        self.shard_groups = {int(start): RunResult.from_dict(group) for start, group in data['shard_groups'].items()}
+    
+    def _summary(self) -> str:
+        lines = [
+            super()._summary(),
+            f'Групп шардов: {len(self.shard_groups)} по {self.shard_duration / 3600:g} ч., порядок записи: {self.order}'
+        ]
+        for start, group in sorted(self.shard_groups.items()):
+            lines.append(
+                f'{datetime.fromtimestamp(start, timezone.utc):%Y-%m-%d %H:%M} UTC: точек {group.points}, '
+                f'{group.points_per_second:.0f} точек/сек. за {group.duration or 0:.2f} сек., '
+                f'ошибок {group.errors}, p50 {group.p50:.3f} сек., p99 {group.p99:.3f} сек.'
+            )
+        return '\n'.join(lines)
+
+
+class MixedResult:
+    """
+    Результат одновременных записи и чтения
+
+    Показатели записи и чтения учитываются отдельно, а интервалы обеих ролей совпадают по времени, что позволяет
+    сопоставить время ответа на запросы чтения со скоростью записи в тот же интервал
+    """
+    
+    def __init__(self, write: SustainedResult, read: SustainedResult):
+        """
+        :param write: Результат записи
+        :param read: Результат чтения
+        """
+        self.write = write
+        self.read = read
+        self.server = None
+    
+    @property
+    def duration(self) -> Optional[float]:
+        return self.write.duration
+    
+    @property
+    def steps(self) -> List[dict]:
+        """
+        :return: Показатели каждого интервала: скорость записи, время ответа на запросы записи и чтения,
+            а также отношение p99 времени чтения к p99 в первом интервале (read_slowdown)
+        """
+        steps = []
+        baseline = None
+        window_start = 0.0
+        for write_window, read_window in zip(self.write.windows, self.read.windows):
+            if baseline is None and read_window.requests:
+                baseline = read_window.p99
+            steps.append(dict(
+                start=window_start,
+                duration=write_window.duration,
+                write_points_per_second=write_window.points_per_second,
+                write_p99=write_window.p99,
+                write_errors=write_window.errors,
+                read_requests=read_window.requests,
+                read_p50=read_window.p50,
+                read_p99=read_window.p99,
+                read_errors=read_window.errors,
+                read_slowdown=read_window.p99 / baseline if baseline and read_window.requests else None
+            ))
+            window_start += write_window.duration
+        return steps
+    
+    def as_dict(self) -> dict:
+        return dict(
+            duration=self.duration,
+            write=self.write.as_dict(),
+            read=self.read.as_dict(),
+            steps=self.steps,
+            server=self.server.as_dict() if self.server is not None else None
+        )
+    
+    def __str__(self):
+        lines = [
+            'Запись:',
+            str(self.write),
+            'Чтение:',
+            RunResult._summary(self.read)
+        ]
+        for step in self.steps:
+            slowdown = '-' if step['read_slowdown'] is None else f'x{step["read_slowdown"]:.1f}'
+            lines.append(
+                f'{step["start"]:.1f}-{step["start"] + step["duration"]:.1f} сек.: '
+                f'запись {step["write_points_per_second"]:.0f} точек/сек. (p99 {step["write_p99"]:.3f} сек.), '
+                f'чтение p50 {step["read_p50"]:.3f} сек., p99 {step["read_p99"]:.3f} сек. ({slowdown}), '
+                f'ошибок записи: {step["write_errors"]}, чтения: {step["read_errors"]}'
+            )
+        if self.server is not None:
+            lines.append(str(self.server))
+        return '\n'.join(lines)
+
+
+class VerificationResult:
+    """
+    Результат проверки записанных данных (см. StressTester.write и verification)
+
+    Значение - значение одного поля серии с одной меткой времени. Ожидаемые значения подсчитываются по отправленным
+    данным, видимые - запросами count(*) по окнам времени. Подсчёт повторяется для окон, в которых видны
+    не все значения, пока они не станут видимы или не истечёт время ожидания. Время до видимости окна отсчитывается
+    от окончания записи до ответа, в котором окно впервые оказалось полным
+    """
+    
+    _COUNTERS = ('expected', 'visible', 'first_visible', 'extra', 'lines', 'acknowledged', 'windows',
+                 'incomplete_windows', 'unexpected_series', 'polls', 'first_pass')
+    
+    def __init__(self):
+        self.expected = 0
+        self.visible = 0
+        self.first_visible = 0
+        self.extra = 0
+        self.lines = 0
+        self.acknowledged = 0
+        self.windows = 0
+        self.incomplete_windows = 0
+        self.unexpected_series = 0
+        self.polls = 0
+        self.first_pass = 0.0
+        self.visibility = LatencyHistogram()
+        self.queries = RunResult()
+    
+    @property
+    def lost(self) -> int:
+        """
+        :return: Количество значений, так и не ставших видимыми
+        """
+        return self.expected - self.visible
+    
+    @property
+    def late(self) -> int:
+        """
+        :return: Количество значений, не видимых при первом подсчёте, но ставших видимыми позже
+        """
+        return self.visible - self.first_visible
+    
+    @property
+    def rejected(self) -> int:
+        """
+        :return: Количество строк в запросах на запись, завершившихся ошибкой. Их значения входят в lost
+        """
+        return self.lines - self.acknowledged
+    
+    @property
+    def values_per_second(self) -> float:
+        """
+        :return: Скорость проверки: ожидаемых значений, подсчитанных за секунду первого подсчёта
+        """
+        return self.expected / self.first_pass if self.first_pass else 0.0
+    
+    def merge(self, other: 'VerificationResult'):
+        """
+        Добавление результата проверки данных других узлов (например, другого агента)
+
+        Неожиданные серии каждый агент ищет среди серий всей нагрузки в одном и том же периоде, поэтому
+        объединяются наибольшим из количеств, а не суммой
+        """
+        for name in self._COUNTERS:
+            if name in ('polls', 'first_pass', 'unexpected_series'):
+                setattr(self, name, max(getattr(self, name), getattr(other, name)))
+            else:
+                setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.visibility.merge(other.visibility)
+        self.queries.merge(other.queries)
+        if other.queries.duration is not None:
+            self.queries.duration = max(self.queries.duration or 0.0, other.queries.duration)
+    
+    def as_dict(self) -> dict:
+        return dict(
+            {name: getattr(self, name) for name in self._COUNTERS},
+            lost=self.lost,
+            late=self.late,
+            rejected=self.rejected,
+            values_per_second=self.values_per_second,
+            visibility=dict(
+                p50=self.visibility.percentile(50),
+                p99=self.visibility.percentile(99),
+                max=self.visibility.max
+            ),
+            queries=self.queries.as_dict()
+        )
+    
+    def to_dict(self) -> dict:
+        return dict(
+            {name: getattr(self, name) for name in self._COUNTERS},
+            visibility=self.visibility.to_dict(),
+            queries=self.queries.to_dict()
+        )
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'VerificationResult':
+        result = cls()
+        for name in cls._COUNTERS:
+            setattr(result, name, data[name])
+        result.visibility = LatencyHistogram.from_dict(data['visibility'])
+        result.queries = RunResult.from_dict(data['queries'])
+        return result
+    
+    def __str__(self):
+        lines = [
+            f'Проверка записи: ожидалось значений {self.expected}, видимо {self.visible}, потеряно {self.lost}'
+            f'{f" (в том числе в запросах с ошибкой: строк {self.rejected})" if self.rejected else ""}, '
+            f'лишних {self.extra}, видимы с опозданием {self.late}',
+            f'Окон: {self.windows}, неполных: {self.incomplete_windows}, подсчётов: {self.polls}, '
+            f'время до видимости: p50 {self.visibility.percentile(50):.3f} сек., '
+            f'p99 {self.visibility.percentile(99):.3f} сек., max {self.visibility.max:.3f} сек.',
+            f'Скорость проверки: {self.values_per_second:.0f} значений/сек. '
+            f'({self.queries.requests} обращений к /query, {self.queries.rows} строк, первый подсчёт '
+            f'{self.first_pass:.2f} сек.)'
+        ]
+        if self.unexpected_series:
+            lines.append(f'Серий в проверенном периоде, не входящих в отправленные данные: {self.unexpected_series}')
+        return '\n'.join(lines)
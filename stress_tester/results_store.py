@@ -0,0 +1,155 @@
+import json
+import os
+import platform
+import sys
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import requests
+
+from .histogram import LatencyHistogram
+from .results import MixedResult, RunResult
+
+_PARTS = dict(write='write', sustain='write', backfill='write', read='read', read_mix='read')
+
+
+def environment(tester) -> dict:
+    """
+    Сведения об окружении замера: параметры подключения, версия InfluxDB и машина, с которой создаётся нагрузка
+
+    :param tester: Объект StressTester
+    :return: Словарь, пригодный для сериализации в JSON
+    """
+    try:
+        server = tester.server_info()
+    except requests.RequestException:
+        server = dict(version=None, build=None)
+    return dict(
+        tester.config,
+        influxdb_version=server['version'],
+        influxdb_build=server['build'],
+        client=platform.node(),
+        platform=platform.platform(),
+        python=sys.version.split()[0],
+        cpu_count=os.cpu_count()
+    )
+
+
+def result_parts(action: str, result: Union[RunResult, MixedResult]) -> Dict[str, RunResult]:
+    """
+    :param action: Метод StressTester, вернувший результат (write, read, sustain, backfill, mixed)
+    :param result: Результат
+    :return: Результаты по виду запросов (write, read)
+    """
+    if isinstance(result, MixedResult):
+        return dict(write=result.write, read=result.read)
+    return {_PARTS[action]: result}
+
+
+class ResultsStore:
+    """
+    Хранилище результатов замеров в файле JSON lines
+
+    Каждая строка файла - результат одного шага замера: идентификатор и метка замера, имя сценария и шага,
+    параметры шага, сведения об окружении, показатели (as_dict) и гистограммы времени выполнения запросов
+    по виду запросов. Результаты шагов с одинаковым именем сценария и шага в одном замере считаются
+    повторами и при сравнении замеров (см. compare_runs) объединяются
+    """
+    
+    def __init__(self, path: Union[str, Path]):
+        """
+        :param path: Путь к файлу. Создаётся при первой записи
+        """
+        self.path = Path(path)
+    
+    @staticmethod
+    def new_run() -> str:
+        """
+        :return: Идентификатор нового замера
+        """
+        return f'{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}'
+    
+    def save(self,
+             run: str,
+             scenario: str,
+             step: str,
+             action: str,
+             result: Union[RunResult, MixedResult],
+             params: dict = None,
+             environment: dict = None,
+             label: str = None) -> dict:
+        """
+        Сохранение результата шага замера
+
+        :param run: Идентификатор замера (см. new_run)
+        :param scenario: Имя сценария
+        :param step: Имя шага
+        :param action: Метод StressTester, вернувший результат (write, read, sustain, backfill, mixed)
+        :param result: Результат
+        :param params: Параметры шага
+        :param environment: Сведения об окружении (см. environment)
+        :param label: Метка замера (например, версия InfluxDB или имя изменения конфигурации), по которой
+            можно выбрать замеры для сравнения
+        :return: Сохранённая запись
+        """
+        record = dict(
+            run=run,
+            label=label,
+            created_at=datetime.now().isoformat(),
+            scenario=scenario,
+            step=step,
+            action=action,
+            params=params or {},
+            environment=environment or {},
+            result=result.as_dict(),
+            latency={part: part_result.latency.to_dict()
+                     for part, part_result in result_parts(action, result).items()}
+        )
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open(mode='a', encoding='utf-8') as fp:
+            fp.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        return record
+    
+    def records(self, selector: Optional[str] = None) -> List[dict]:
+        """
+        :param selector: Идентификатор или метка замера. Метка выбирает все замеры с этой меткой.
+            По умолчанию - все записи
+        :return: Записи в порядке сохранения
+        """
+        if not self.path.exists():
+            return []
+        with self.path.open(mode='r', encoding='utf-8') as fp:
+            records = [json.loads(line) for line in fp if line.strip()]
+        if selector is None:
+            return records
+        return [record for record in records if selector in (record['run'], record['label'])]
+    
+    def runs(self) -> List[dict]:
+        """
+        :return: Замеры в порядке сохранения: идентификатор, метка, время начала, сценарии и версия InfluxDB
+        """
+        runs = {}
+        for record in self.records():
+            run = runs.setdefault(record['run'], dict(
+                run=record['run'],
+                label=record['label'],
+                created_at=record['created_at'],
+                scenarios=[],
+                influxdb_version=record['environment'].get('influxdb_version')
+            ))
+            if record['scenario'] not in run['scenarios']:
+                run['scenarios'].append(record['scenario'])
+        return list(runs.values())
+
+
+def merged_latency(records: List[dict], part: str) -> LatencyHistogram:
+    """
+    :return: Объединённая гистограмма времени выполнения запросов вида part из записей хранилища
+    """
+    histogram = LatencyHistogram()
+    for record in records:
+        if part in record['latency']:
+            histogram.merge(LatencyHistogram.from_dict(record['latency'][part]))
+    return histogram
@@ -0,0 +1,239 @@
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from threading import Condition
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import requests
+
+# Классы ответов на запросы: ok - успешно, overload - СУБД сообщает о перегрузке, timeout - истекло время ожидания
+# ответа, connection - ошибка соединения, client - ошибка в запросе (повтор не поможет), server - прочие ошибки СУБД
+OUTCOMES = ('ok', 'overload', 'timeout', 'connection', 'client', 'server')
+
+# Признаки перегрузки в тексте ошибки InfluxDB, возвращённой с кодом 5xx
+_OVERLOAD_MARKERS = (
+    'hinted handoff queue full',
+    'cache-max-memory-size exceeded',
+    'max-concurrent-write-limit exceeded',
+    'write limit exceeded',
+    'timeout',
+)
+
+
+def classify(status: int, text: str = '') -> str:
+    """
+    :param status: Код ответа
+    :param text: Текст ответа (для ответов 5xx InfluxDB сообщает причину ошибки в теле)
+    :return: Класс ответа (см. OUTCOMES)
+    """
+    if 200 <= status < 300:
+        return 'ok'
+    if status in (429, 503):
+        return 'overload'
+    if status == 408:
+        return 'timeout'
+    if status < 500:
+        return 'client'
+    text = text.lower()
+    if any(marker in text for marker in _OVERLOAD_MARKERS):
+        return 'overload'
+    return 'server'
+
+
+def classify_exception(ex: BaseException) -> str:
+    """
+    :return: Класс ответа на запрос, завершившийся исключением requests
+    """
+    if isinstance(ex, requests.Timeout):
+        return 'timeout'
+    return 'connection'
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    :param value: Значение заголовка Retry-After: количество секунд или дата HTTP
+    :return: Через сколько секунд можно повторить запрос. None - заголовок не задан или не разобран
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max((date - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RetryPolicy:
+    """
+    Повтор запросов, завершившихся перегрузкой или ошибкой СУБД, с экспоненциально растущей паузой
+
+    Пауза перед повтором с номером n выбирается случайно из [0; min(max_backoff, backoff * 2^n)] (full jitter),
+    чтобы узлы, получившие отказ одновременно, не повторяли запросы тоже одновременно. Если ответ содержит
+    заголовок Retry-After, пауза не меньше указанной в нём
+    """
+    
+    def __init__(self,
+                 retries: int = 3,
+                 backoff: float = 0.1,
+                 max_backoff: float = 10.0,
+                 retry_on: Sequence[str] = ('overload', 'timeout', 'connection', 'server'),
+                 respect_retry_after: bool = True,
+                 seed: int = None):
+        """
+        :param retries: Максимальное количество повторов одного запроса
+        :param backoff: Начальная пауза перед повтором (в секундах)
+        :param max_backoff: Максимальная пауза перед повтором (в секундах)
+        :param retry_on: Классы ответов, при которых запрос повторяется (см. OUTCOMES)
+        :param respect_retry_after: Учитывать ли заголовок Retry-After
+        :param seed: Начальное значение генератора случайных пауз
+        """
+        if retries < 0:
+            raise ValueError('Количество повторов не может быть отрицательным')
+        if backoff < 0 or max_backoff < 0:
+            raise ValueError('Пауза перед повтором не может быть отрицательной')
+        unknown = set(retry_on) - set(OUTCOMES)
+        if unknown:
+            raise ValueError(f'Неизвестные классы ответов: {", ".join(sorted(unknown))}')
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_on = tuple(retry_on)
+        self.respect_retry_after = respect_retry_after
+        self._rng = random.Random(seed)
+    
+    def __repr__(self):
+        return (
+            f'RetryPolicy(retries={self.retries}, backoff={self.backoff}, max_backoff={self.max_backoff}, '
+            f'retry_on={self.retry_on!r}, respect_retry_after={self.respect_retry_after})'
+        )
+    
+    def should_retry(self, outcome: str, attempt: int) -> bool:
+        """
+        :param outcome: Класс ответа
+        :param attempt: Номер выполненной попытки (с нуля)
+        """
+        return outcome in self.retry_on and attempt < self.retries
+    
+    def delay(self, attempt: int, retry_after: float = None) -> float:
+        """
+        :param attempt: Номер выполненной попытки (с нуля)
+        :param retry_after: Пауза из заголовка Retry-After
+        :return: Пауза перед повтором (в секундах)
+        """
+        delay = self._rng.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if retry_after is not None and self.respect_retry_after:
+            delay = max(delay, retry_after)
+        return delay
+
+
+class AdaptiveLimiter:
+    """
+    Ограничение количества одновременных запросов, подстраивающееся под перегрузку СУБД (AIMD)
+
+    Каждый успешный ответ увеличивает ограничение на 1 / ограничение, то есть примерно на единицу за каждые
+    ограничение успешных ответов. Ответ о перегрузке (overload, timeout) уменьшает ограничение в decrease раз,
+    но не чаще раза в cooldown секунд, чтобы одна волна отказов не обрушила ограничение до минимума
+    """
+    
+    def __init__(self, limit: int, min_limit: int = 1, max_limit: int = None, decrease: float = 0.5,
+                 cooldown: float = 1.0):
+        """
+        :param limit: Начальное ограничение
+        :param min_limit: Минимальное ограничение
+        :param max_limit: Максимальное ограничение. По умолчанию - начальное
+        :param decrease: Множитель уменьшения ограничения при перегрузке
+        :param cooldown: Минимальный промежуток между уменьшениями ограничения (в секундах)
+        """
+        if limit < 1 or min_limit < 1:
+            raise ValueError('Ограничение количества одновременных запросов должно быть положительным')
+        if not 0 < decrease < 1:
+            raise ValueError('Множитель уменьшения ограничения должен быть в диапазоне (0; 1)')
+        self.max_limit = max_limit or limit
+        self.min_limit = min(min_limit, self.max_limit)
+        self.limit = float(min(limit, self.max_limit))
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.lowest = self.limit
+        self.decreases = 0
+        self.in_flight = 0
+        self._last_decrease = None
+        self._condition = Condition()
+    
+    def acquire(self):
+        """
+        Ожидание, пока количество выполняющихся запросов не станет меньше ограничения
+        """
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+    
+    def release(self, outcome: str):
+        """
+        :param outcome: Класс ответа на выполненный запрос
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if outcome in ('overload', 'timeout'):
+                now = time.monotonic()
+                if self._last_decrease is None or now - self._last_decrease >= self.cooldown:
+                    self._last_decrease = now
+                    self.limit = max(self.min_limit, self.limit * self.decrease)
+                    self.lowest = min(self.lowest, self.limit)
+                    self.decreases += 1
+            elif outcome == 'ok':
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+    
+    def as_dict(self) -> dict:
+        """
+        :return: Ограничение в конце нагрузки (limit), наименьшее ограничение (lowest), количество уменьшений
+        """
+        return dict(limit=int(self.limit), lowest=int(self.lowest), decreases=self.decreases)
+
+
+def send_with_retry(request: Callable[[], requests.Response],
+                    retry: RetryPolicy = None,
+                    limiter: AdaptiveLimiter = None,
+                    replayable: bool = True) -> Tuple[List[str], Optional[requests.Response]]:
+    """
+    Выполнение запроса с повторами
+
+    :param request: Функция, выполняющая запрос
+    :param retry: Правила повтора. None - запрос выполняется один раз
+    :param limiter: Ограничение количества одновременных запросов
+    :param replayable: Можно ли отправить тело запроса повторно (тело, генерируемое по мере отправки, нельзя)
+    :return: Классы ответов на каждую попытку и ответ на последнюю попытку (None, если она завершилась исключением)
+    """
+    outcomes = []
+    attempt = 0
+    while True:
+        response = None
+        retry_after = None
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            response = request()
+            outcome = classify(response.status_code, response.text if response.status_code >= 500 else '')
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        except requests.RequestException as ex:
+            outcome = classify_exception(ex)
+        except BaseException:
+            if limiter is not None:
+                limiter.release('connection')
+            raise
+        if limiter is not None:
+            limiter.release(outcome)
+        outcomes.append(outcome)
+        
+        if outcome == 'ok' or retry is None or not replayable or not retry.should_retry(outcome, attempt):
+            return outcomes, response
+        time.sleep(retry.delay(attempt, retry_after))
+        attempt += 1
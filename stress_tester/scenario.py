@@ -0,0 +1,221 @@
+import json
+import re
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, List, Union
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+from .payload_cache import PayloadCache
+from .queries import QueryTemplate
+from .results_store import ResultsStore, environment
+from .retry import RetryPolicy
+from .schema import Schema
+from .signals import Signals
+from .verification import Verification
+
+_SIMPLE_STEPS = ('drop_db', 'create_db', 'ping')
+_LOAD_STEPS = ('write', 'read', 'read_mix', 'sustain', 'mixed', 'backfill')
+
+_RELATIVE_DATE = re.compile(r'^now\s*(?:(?P<sign>[+-])\s*(?P<amount>\d+)\s*(?P<unit>[smhd]))?$')
+_UNITS = dict(s='seconds', m='minutes', h='hours', d='days')
+
+
+def load_scenario(path: Union[str, Path]) -> dict:
+    """
+    Загрузка сценария из файла YAML (.yaml, .yml) или JSON
+
+    :param path: Путь к файлу сценария
+    :return: Сценарий
+    """
+    path = Path(path)
+    with path.open(mode='r', encoding='utf-8') as fp:
+        if path.suffix in ('.yaml', '.yml'):
+            if yaml is None:
+                raise ImportError('Для сценариев в формате YAML необходим пакет pyyaml')
+            scenario = yaml.safe_load(fp)
+        else:
+            scenario = json.load(fp)
+    scenario.setdefault('name', path.stem)
+    return scenario
+
+
+def parse_date(value: str, influxql: bool = False) -> Union[datetime, str]:
+    """
+    :param value: Дата в формате ISO 8601 (например, 2020-06-26 19:26:25), либо относительно момента выполнения
+        шага: now, now-5m, now+1h (единицы s, m, h, d)
+    :param influxql: Допускается ли выражение InfluxQL (например, now() - 5m), которое передаётся как есть
+    :return: Дата
+    """
+    match = _RELATIVE_DATE.match(value.strip())
+    if match:
+        date = datetime.now()
+        if match['sign']:
+            delta = timedelta(**{_UNITS[match['unit']]: int(match['amount'])})
+            date = date + delta if match['sign'] == '+' else date - delta
+        return date
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        if influxql:
+            return value
+        raise ValueError(f'Неправильный формат даты: {value}')
+
+
+def step_params(action: str, params: dict) -> dict:
+    """
+    Преобразование параметров шага из файла сценария в параметры методов StressTester. Используется также
+    агентами распределённой нагрузки, которые получают параметры шага в том же виде
+
+    :param action: Действие шага (имя метода StressTester)
+    :param params: Параметры шага в виде, как в файле сценария
+    :return: Параметры метода
+    """
+    params = dict(params)
+    for key in ('start_date', 'end_date'):
+        if isinstance(params.get(key), str):
+            params[key] = parse_date(params[key], influxql=action in ('read', 'mixed'))
+    if isinstance(params.get('schema'), dict):
+        params['schema'] = Schema(**params['schema'])
+    if isinstance(params.get('retry'), dict):
+        params['retry'] = RetryPolicy(**params['retry'])
+    if isinstance(params.get('signals'), (str, dict)):
+        params['signals'] = Signals.from_config(params['signals'])
+    if params.get('verify') is True:
+        params['verify'] = Verification()
+    elif isinstance(params.get('verify'), dict):
+        params['verify'] = Verification(**params['verify'])
+    if isinstance(params.get('payload_cache'), str):
+        params['payload_cache'] = PayloadCache(params['payload_cache'])
+    if params.get('templates'):
+        params['templates'] = [
+            template if isinstance(template, QueryTemplate) else QueryTemplate(**template)
+            for template in params['templates']
+        ]
+    return params
+
+
+def _parse_step(step: Union[str, dict]):
+    """
+    :return: Действие, параметры и имя шага
+    """
+    if isinstance(step, str):
+        return step, {}, step
+    step = dict(step)
+    name = step.pop('name', None)
+    if 'repeat' in step:
+        return 'repeat', step, name or 'repeat'
+    if len(step) != 1:
+        raise ValueError(f'Шаг должен содержать ровно одно действие: {step}')
+    (action, params), = step.items()
+    return action, params if params is not None else {}, name or action
+
+
+def run_scenario(tester,
+                 scenario: dict,
+                 on_step: Callable[[dict], None] = None,
+                 store: ResultsStore = None,
+                 label: str = None,
+                 run: str = None) -> dict:
+    """
+    Выполнение сценария
+
+    Сценарий - словарь с ключами name (имя), repeat (количество повторов всех шагов, по умолчанию 1),
+    continue_on_error (продолжать ли выполнение после ошибки шага, по умолчанию false) и steps (шаги).
+    Шаг - либо строка drop_db, create_db или ping, либо словарь с одним действием и его параметрами:
+    write, read, read_mix, sustain, mixed, backfill (параметры одноимённых методов StressTester), sleep (пауза
+    в секундах), либо вложенный повтор {repeat: N, steps: [...]}. Шагу можно дать имя ключом name.
+
+    Даты (start_date, end_date) задаются в формате ISO 8601 или относительно момента выполнения шага
+    (now-5m), для read и mixed допускаются выражения InfluxQL. Схема (schema) задаётся словарём параметров
+    Schema, кэш данных (payload_cache) - каталогом, шаблоны запросов read_mix (templates) - списком словарей
+    параметров QueryTemplate, правила повтора запросов (retry) - словарём параметров RetryPolicy, модели значений
+    датчиков (signals) - именем набора или словарём (см. Signals.from_config), проверка записанных данных
+    (verify) - true или словарём параметров Verification
+
+    :param tester: Объект StressTester, либо Coordinator для распределённой нагрузки
+    :param scenario: Сценарий (например, результат load_scenario)
+    :param on_step: Функция, вызываемая с результатом каждого выполненного шага
+    :param store: Хранилище, в которое сохраняются результаты шагов write, read, read_mix, sustain и mixed вместе
+        со сведениями об окружении. Повторы шага сохраняются под одним именем
+    :param label: Метка замера в хранилище
+    :param run: Идентификатор замера в хранилище, например, общий для нескольких сценариев. По умолчанию - новый
+    :return: Результат сценария: имя, идентификатор замера, время начала и окончания, результаты шагов
+        и признак ошибки
+    """
+    continue_on_error = scenario.get('continue_on_error', False)
+    run = run or ResultsStore.new_run()
+    run_environment = environment(tester) if store is not None else None
+    steps_results = []
+    failed = False
+    
+    def _run_steps(steps: List[Union[str, dict]], iteration: List[int]) -> bool:
+        nonlocal failed
+        for index, step in enumerate(steps):
+            action, params, name = _parse_step(step)
+            
+            if action == 'repeat':
+                for repetition in range(params['repeat']):
+                    if not _run_steps(params['steps'], iteration + [index, repetition]):
+                        return False
+                continue
+            
+            record = dict(name=name, action=action, iteration=iteration + [index],
+                          params=params, started_at=datetime.now().isoformat())
+            try:
+                record['result'], result = _run_step(tester, action, params)
+                if store is not None and result is not None:
+                    store.save(run, scenario.get('name'), name, action, result, params, run_environment, label)
+            except Exception as ex:
+                record['error'] = f'{type(ex).__name__}: {ex}'
+                failed = True
+            steps_results.append(record)
+            if on_step is not None:
+                on_step(record)
+            if 'error' in record and not continue_on_error:
+                return False
+        return True
+    
+    started_at = datetime.now().isoformat()
+    for repetition in range(scenario.get('repeat', 1)):
+        if not _run_steps(scenario['steps'], [repetition]):
+            break
+    
+    return dict(
+        name=scenario.get('name'),
+        run=run,
+        started_at=started_at,
+        finished_at=datetime.now().isoformat(),
+        failed=failed,
+        steps=steps_results
+    )
+
+
+def _run_step(tester, action: str, params: Union[dict, float]):
+    """
+    :return: Результат шага в виде, пригодном для сериализации в JSON, и результат метода StressTester
+        (None для шагов без нагрузки)
+    """
+    if action in _SIMPLE_STEPS:
+        getattr(tester, action)()
+        return dict(duration=tester.time_diff), None
+    if action == 'sleep':
+        time.sleep(params)
+        return dict(duration=params), None
+    if action not in _LOAD_STEPS:
+        raise ValueError(f'Неизвестное действие: {action}')
+    
+    if hasattr(tester, 'run_step'):
+        # Распределённая нагрузка (см. distributed.Coordinator): параметры передаются агентам как есть
+        result = tester.run_step(action, params)
+        return result.as_dict(), result
+    result = getattr(tester, action)(**step_params(action, params))
+    if action == 'read':
+        result, response = result
+        return dict(result.as_dict(), series=sum(len(statement.get('series', ()))
+                                                 for statement in response.get('results', ()))), result
+    return result.as_dict(), result
@@ -0,0 +1,189 @@
+import hashlib
+import math
+import random
+from typing import Callable, Iterator, List, Sequence, Tuple
+
+from .line_protocol import escape_measurement
+
+
+class Schema:
+    """
+    Схема данных для записи: измерения, иерархия тегов и датчики
+
+    Иерархия тегов задаётся списком пар (тег, количество значений на каждое значение родительского тега),
+    например [('site', 10), ('line', 20), ('device', 50)] - 10 площадок по 20 линий по 50 устройств, всего
+    10000 устройств. Каждое устройство - набор значений всех тегов иерархии. Устройства распределяются между
+    пишущими узлами по кругу, поэтому количество устройств не ограничено количеством узлов.
+
+    Датчики устройства (количество каждого типа задаётся параметрами write) распределяются по измерениям
+    по кругу. Каждому датчику соответствует собственное поле (например, float_3), либо, при sensor_tag=True,
+    собственный тег sensor - тогда каждый датчик является отдельной серией, а поле называется по типу датчика
+    (float, int, str, bool), чтобы типы значений одного поля измерения не конфликтовали
+    """
+    
+    def __init__(self,
+                 tags: Sequence[Tuple[str, int]] = (('device', 1),),
+                 measurements: int = 1,
+                 measurement_template: str = 'measurement_{}',
+                 sensor_tag: bool = False,
+                 density: float = 1.0,
+                 jitter: float = 0.0):
+        """
+        :param tags: Иерархия тегов: пары (тег, количество значений на каждое значение родительского тега)
+        :param measurements: Количество измерений
+        :param measurement_template: Шаблон имени измерения, подставляется номер измерения
+        :param sensor_tag: Выделять ли каждый датчик в отдельную серию тегом sensor. По умолчанию датчику
+            соответствует поле в серии устройства
+        :param density: Вероятность того, что датчик передаёт значение в очередной момент опроса (по умолчанию
+            раз в секунду, см. sample_interval метода write). По умолчанию 1 - каждый датчик передаёт значение
+            при каждом опросе. Меньшие значения моделируют разреженные данные
+        :param jitter: Максимальное случайное смещение (в долях интервала опроса) метки времени значения
+            относительно момента опроса. По умолчанию 0 - значения передаются ровно в моменты опроса
+        """
+        if not tags:
+            raise ValueError('Иерархия тегов не может быть пустой')
+        if any(cardinality <= 0 for _, cardinality in tags):
+            raise ValueError('Количество значений тега должно быть положительным')
+        if measurements <= 0:
+            raise ValueError('Количество измерений должно быть положительным')
+        if not 0 < density <= 1:
+            raise ValueError('Вероятность передачи значения должна быть в диапазоне (0; 1]')
+        if not 0 <= jitter < 1:
+            raise ValueError('Смещение метки времени должно быть в диапазоне [0; 1)')
+        
+        self.tags = tuple((key, cardinality) for key, cardinality in tags)
+        self.measurements = measurements
+        self.measurement_template = measurement_template
+        self.sensor_tag = sensor_tag
+        self.density = density
+        self.jitter = jitter
+    
+    def __repr__(self):
+        return (
+            f'Schema(tags={list(self.tags)!r}, measurements={self.measurements}, '
+            f'measurement_template={self.measurement_template!r}, sensor_tag={self.sensor_tag}, '
+            f'density={self.density}, jitter={self.jitter})'
+        )
+    
+    @property
+    def key(self) -> str:
+        """
+        :return: Короткий идентификатор схемы (например, для имени каталога с данными в PayloadCache)
+        """
+        return hashlib.sha1(repr(self).encode()).hexdigest()[:12]
+    
+    @property
+    def devices_count(self) -> int:
+        """
+        :return: Количество устройств (наборов значений тегов)
+        """
+        return math.prod(cardinality for _, cardinality in self.tags)
+    
+    def series_count(self, sensors: int) -> int:
+        """
+        :param sensors: Количество датчиков устройства (всех типов)
+        :return: Количество серий, в которые записываются данные
+        """
+        if self.sensor_tag:
+            return self.devices_count * sensors
+        return self.devices_count * min(self.measurements, sensors)
+    
+    def _devices(self, node_index: int, nodes_count: int) -> Iterator[str]:
+        """
+        :return: Теги устройств, данные которых записывает узел
+        """
+        tag_values = [
+            [f'{key}={key}_{value:0>{len(str(cardinality))}}' for value in range(1, cardinality + 1)]
+            for key, cardinality in self.tags
+        ]
+        for device_index in range(node_index, self.devices_count, nodes_count):
+            device_tags = []
+            for values in reversed(tag_values):
+                device_index, value_index = divmod(device_index, len(values))
+                device_tags.append(values[value_index])
+            yield ','.join(reversed(device_tags))
+    
+    def _sensors(self, float_sensors: int, int_sensors: int, str_sensors: int,
+                 bool_sensors: int) -> List[Tuple[str, str, int]]:
+        """
+        :return: Тип датчика, имя датчика и его номер среди датчиков этого типа (с нуля) для всех датчиков устройства
+        """
+        return [
+            (sensor_type, f'{sensor_type}_{number}', number - 1)
+            for sensor_type, count in (('float', float_sensors), ('int', int_sensors),
+                                       ('str', str_sensors), ('bool', bool_sensors))
+            for number in range(1, count + 1)
+        ]
+    
+    def node_lines(self,
+                   node_index: int,
+                   nodes_count: int,
+                   float_sensors: int,
+                   int_sensors: int,
+                   str_sensors: int,
+                   bool_sensors: int,
+                   steps: int,
+                   start_timestamp: int,
+                   step: int,
+                   values: Callable[[str, int], Callable[[], str]],
+                   rng=random) -> Iterator[bytes]:
+        """
+        Генерация строк line protocol одного узла
+
+        :param node_index: Номер узла (с нуля)
+        :param nodes_count: Количество узлов
+        :param float_sensors: Количество вещественных датчиков на устройстве
+        :param int_sensors: Количество целочисленных датчиков на устройстве
+        :param str_sensors: Количество строковых датчиков на устройстве
+        :param bool_sensors: Количество булевых датчиков на устройстве
+        :param steps: Количество значений каждого датчика
+        :param start_timestamp: Метка времени первой точки
+        :param step: Интервал между значениями датчика в единицах метки времени
+        :param values: Функция, создающая генератор значений датчика по типу датчика (float, int, str, bool)
+            и его номеру среди датчиков этого типа на устройстве (с нуля). У каждой серии свой генератор
+        :param rng: Генератор случайных чисел
+        :return: Итератор по закодированным строкам (без завершающего перевода строки), упорядоченным по времени
+        """
+        series = []
+        for device in self._devices(node_index, nodes_count):
+            for number, (sensor_type, sensor_name, type_number) in enumerate(
+                    self._sensors(float_sensors, int_sensors, str_sensors, bool_sensors)
+            ):
+                key = self._series_key(device, number, sensor_name)
+                prefix = f'{key} {sensor_type}=' if self.sensor_tag else f'{key} {sensor_name}='
+                series.append((prefix, values(sensor_type, type_number)))
+        
+        return self._lines(series, steps, start_timestamp, step, rng)
+    
+    def node_series(self, node_index: int, nodes_count: int, float_sensors: int, int_sensors: int,
+                    str_sensors: int, bool_sensors: int) -> List[str]:
+        """
+        :return: Ключи серий line protocol (с экранированием), в которые записывает данные узел
+        """
+        keys = {
+            self._series_key(device, number, sensor_name)
+            for device in self._devices(node_index, nodes_count)
+            for number, (_, sensor_name, _) in enumerate(
+                self._sensors(float_sensors, int_sensors, str_sensors, bool_sensors)
+            )
+        }
+        return sorted(keys)
+    
+    def _series_key(self, device: str, number: int, sensor_name: str) -> str:
+        """
+        :return: Ключ серии датчика устройства с порядковым номером number среди датчиков устройства
+        """
+        measurement = escape_measurement(self.measurement_template.format(number % self.measurements + 1))
+        return f'{measurement},{device},sensor={sensor_name}' if self.sensor_tag else f'{measurement},{device}'
+    
+    
+    def _lines(self, series: List[Tuple[str, Callable]], steps: int, start_timestamp: int, step: int,
+               rng) -> Iterator[bytes]:
+        density = self.density
+        jitter = int(self.jitter * step)
+        for timestamp in range(start_timestamp, start_timestamp + steps * step, step):
+            for prefix, value in series:
+                if density < 1 and rng.random() >= density:
+                    continue
+                offset = rng.randrange(jitter + 1) if jitter else 0
+                yield f'{prefix}{value()} {timestamp + offset}'.encode()
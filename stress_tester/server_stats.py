@@ -0,0 +1,285 @@
+import time
+from collections import defaultdict
+from threading import Event, Lock, Thread
+from typing import Dict, List, Optional
+
+import requests
+
+from .results import RunResult
+
+# Показатели InfluxDB, которые сохраняются в замерах: (статистика, поле) -> накопительный ли показатель.
+# Значения статистик с тегами (например, tsm1_cache каждого шарда) суммируются
+SERVER_METRICS = {
+    ('httpd', 'pointsWrittenOK'): True,
+    ('httpd', 'writeReq'): True,
+    ('httpd', 'queryReq'): True,
+    ('httpd', 'reqActive'): False,
+    ('write', 'pointReq'): True,
+    ('write', 'writeError'): True,
+    ('write', 'writeDrop'): True,
+    ('write', 'writeTimeout'): True,
+    ('shard', 'seriesCreate'): True,
+    ('shard', 'diskBytes'): False,
+    ('tsm1_cache', 'memBytes'): False,
+    ('tsm1_cache', 'snapshotCount'): True,
+    ('tsm1_cache', 'writeDropped'): True,
+    ('tsm1_wal', 'currentSegmentDiskBytes'): False,
+    ('tsm1_wal', 'oldSegmentsDiskBytes'): False,
+    ('tsm1_wal', 'writeErr'): True,
+    ('tsm1_engine', 'cacheCompactions'): True,
+    ('tsm1_engine', 'tsmLevel1Compactions'): True,
+    ('tsm1_engine', 'tsmLevel2Compactions'): True,
+    ('tsm1_engine', 'tsmLevel3Compactions'): True,
+    ('tsm1_engine', 'tsmOptimizeCompactions'): True,
+    ('tsm1_engine', 'tsmFullCompactions'): True,
+    ('memstats', 'HeapAlloc'): False,
+    ('memstats', 'HeapInuse'): False,
+    ('memstats', 'NumGC'): True,
+    ('memstats', 'PauseTotalNs'): True,
+}
+
+_COMPACTIONS = ('cacheCompactions', 'tsmLevel1Compactions', 'tsmLevel2Compactions', 'tsmLevel3Compactions',
+                'tsmOptimizeCompactions', 'tsmFullCompactions')
+
+
+def _metrics(stats: Dict[str, Dict[str, float]]) -> Dict[str, float]:
+    """
+    :param stats: Значения полей по именам статистик
+    :return: Сохраняемые показатели по ключам вида статистика.поле
+    """
+    return {
+        f'{name}.{field}': stats[name][field]
+        for name, field in SERVER_METRICS
+        if field in stats.get(name, {})
+    }
+
+
+def _client_metrics(result: RunResult) -> dict:
+    metrics = result.as_dict()
+    del metrics['server']
+    return metrics
+
+
+def _parse_debug_vars(data: dict) -> Dict[str, Dict[str, float]]:
+    stats = defaultdict(lambda: defaultdict(float))
+    for key, value in data.items():
+        if key == 'memstats' and isinstance(value, dict):
+            for field, field_value in value.items():
+                if isinstance(field_value, (int, float)):
+                    stats['memstats'][field] = field_value
+        elif isinstance(value, dict) and 'name' in value and isinstance(value.get('values'), dict):
+            for field, field_value in value['values'].items():
+                if isinstance(field_value, (int, float)):
+                    stats[value['name']][field] += field_value
+    return stats
+
+
+def _parse_show_stats(data: dict) -> Dict[str, Dict[str, float]]:
+    stats = defaultdict(lambda: defaultdict(float))
+    for statement in data.get('results', ()):
+        for series in statement.get('series', ()):
+            name = 'memstats' if series.get('name') == 'runtime' else series.get('name')
+            for row in series.get('values', ())[:1]:
+                for field, field_value in zip(series.get('columns', ()), row):
+                    if isinstance(field_value, (int, float)):
+                        stats[name][field] += field_value
+    return stats
+
+
+class ServerStats:
+    """
+    Показатели InfluxDB, снятые во время нагрузки, и показатели клиента за те же интервалы
+
+    Замер i содержит время (в секундах от начала нагрузки), показатели сервера на этот момент и показатели
+    запросов клиента, завершившихся между замерами i-1 и i. Первый замер сделан до начала нагрузки
+    """
+    
+    def __init__(self, interval: float, samples: List[dict]):
+        """
+        :param interval: Интервал замеров (в секундах)
+        :param samples: Замеры: time, server (показатели по ключам вида статистика.поле), client (RunResult.as_dict)
+        """
+        self.interval = interval
+        self.samples = samples
+    
+    def _values(self, key: str) -> List[float]:
+        return [sample['server'][key] for sample in self.samples if key in sample['server']]
+    
+    @property
+    def deltas(self) -> Dict[str, dict]:
+        """
+        :return: Изменения показателей сервера за время нагрузки: для накопительных показателей - прирост (delta),
+            для остальных - значения в начале (start), максимальное (max) и в конце (end)
+        """
+        deltas = {}
+        for (name, field), cumulative in SERVER_METRICS.items():
+            values = self._values(f'{name}.{field}')
+            if not values:
+                continue
+            if cumulative:
+                deltas[f'{name}.{field}'] = dict(delta=values[-1] - values[0])
+            else:
+                deltas[f'{name}.{field}'] = dict(start=values[0], max=max(values), end=values[-1])
+        return deltas
+    
+    def _delta(self, key: str, start: int = 0, end: int = -1) -> float:
+        first, last = self.samples[start]['server'], self.samples[end]['server']
+        return last.get(key, 0) - first.get(key, 0)
+    
+    @property
+    def slowest_interval(self) -> Optional[int]:
+        """
+        :return: Номер замера, в интервале перед которым p99 времени выполнения запросов клиента наибольшее
+        """
+        intervals = [index for index in range(1, len(self.samples)) if self.samples[index]['client']['requests']]
+        if not intervals:
+            return None
+        return max(intervals, key=lambda index: self.samples[index]['client']['p99'])
+    
+    def as_dict(self) -> dict:
+        return dict(interval=self.interval, deltas=self.deltas, samples=self.samples)
+    
+    def __str__(self):
+        deltas = self.deltas
+        lines = [f'Показатели сервера (замеров: {len(self.samples)}, интервал {self.interval:g} сек.):']
+        
+        def _delta(key: str) -> float:
+            return deltas.get(key, {}).get('delta', 0)
+        
+        def _megabytes(key: str) -> str:
+            if key not in deltas:
+                return '-'
+            return '/'.join(f'{deltas[key][value] / 1024 / 1024:.1f}' for value in ('start', 'max', 'end'))
+        
+        lines.append(
+            f'Записано точек: {_delta("httpd.pointsWrittenOK") or _delta("write.pointReq"):.0f}, '
+            f'ошибок записи: {_delta("write.writeError"):.0f}, отброшено: {_delta("write.writeDrop"):.0f}, '
+            f'новых серий: {_delta("shard.seriesCreate"):.0f}'
+        )
+        lines.append(
+            f'Сжатий: кэша {_delta("tsm1_engine.cacheCompactions"):.0f}, TSM уровней 1/2/3 '
+            f'{_delta("tsm1_engine.tsmLevel1Compactions"):.0f}/{_delta("tsm1_engine.tsmLevel2Compactions"):.0f}/'
+            f'{_delta("tsm1_engine.tsmLevel3Compactions"):.0f}, оптимизаций '
+            f'{_delta("tsm1_engine.tsmOptimizeCompactions"):.0f}, полных {_delta("tsm1_engine.tsmFullCompactions"):.0f}'
+        )
+        lines.append(
+            f'Кэш (начало/максимум/конец): {_megabytes("tsm1_cache.memBytes")} МБ, '
+            f'куча: {_megabytes("memstats.HeapAlloc")} МБ, сборок мусора: {_delta("memstats.NumGC"):.0f} '
+            f'(паузы {_delta("memstats.PauseTotalNs") / 1e6:.1f} мс)'
+        )
+        
+        slowest = self.slowest_interval
+        if slowest is not None:
+            sample = self.samples[slowest]
+            interval_start = max(self.samples[slowest - 1]['time'], 0.0)
+            compactions = sum(self._delta(f'tsm1_engine.{field}', slowest - 1, slowest) for field in _COMPACTIONS)
+            lines.append(
+                f'Наибольшее p99 клиента {sample["client"]["p99"]:.3f} сек. в интервале '
+                f'{interval_start:.1f}-{sample["time"]:.1f} сек.: сжатий {compactions:.0f}, '
+                f'кэш {sample["server"].get("tsm1_cache.memBytes", 0) / 1024 / 1024:.1f} МБ, сборок мусора '
+                f'{self._delta("memstats.NumGC", slowest - 1, slowest):.0f}'
+            )
+        return '\n'.join(lines)
+
+
+class ServerStatsSampler:
+    """
+    Периодическое снятие показателей InfluxDB (/debug/vars, либо SHOW STATS) во время нагрузки
+
+    Учитывает запросы клиента так же, как LiveMetrics, чтобы сопоставить показатели сервера и клиента
+    по интервалам. Если сервер не отдаёт показатели, замеры не выполняются
+    """
+    
+    def __init__(self, influxdb_url: str, headers: dict, interval: float = 1.0):
+        """
+        :param influxdb_url: Адрес InfluxDB
+        :param headers: Заголовки запросов к InfluxDB
+        :param interval: Интервал замеров (в секундах)
+        """
+        self._influxdb_url = influxdb_url
+        self._headers = headers
+        self.interval = interval
+        self._session: Optional[requests.Session] = None
+        self._lock = Lock()
+        self._current = RunResult()
+        self._samples: List[dict] = []
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+        self._source = None
+    
+    def request_started(self):
+        pass
+    
+    def record(self, latency: float, points: int = 0, bytes_count: int = 0, error: bool = False):
+        with self._lock:
+            self._current.record(latency, points, bytes_count, error)
+    
+    def _fetch(self, source: str) -> Dict[str, float]:
+        if source == 'debug_vars':
+            response = self._session.get(self._influxdb_url + '/debug/vars', timeout=self.interval * 5)
+            response.raise_for_status()
+            return _metrics(_parse_debug_vars(response.json()))
+        response = self._session.get(self._influxdb_url + '/query', params=dict(q='SHOW STATS'),
+                                     timeout=self.interval * 5)
+        response.raise_for_status()
+        return _metrics(_parse_show_stats(response.json()))
+    
+    def _sample(self):
+        try:
+            server = self._fetch(self._source)
+        except (requests.RequestException, ValueError):
+            server = {}
+        now = time.time()
+        with self._lock:
+            client, self._current = self._current, RunResult()
+        previous = self._samples[-1]['wall_time'] if self._samples else now
+        client.duration = now - previous
+        self._samples.append(dict(wall_time=now, server=server, client=_client_metrics(client)))
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+    
+    def start(self) -> bool:
+        """
+        Первый замер и запуск периодических замеров
+
+        :return: Отдаёт ли сервер показатели
+        """
+        self._session = requests.Session()
+        self._session.headers.update(self._headers)
+        for source in ('debug_vars', 'show_stats'):
+            try:
+                if self._fetch(source):
+                    self._source = source
+                    break
+            except (requests.RequestException, ValueError):
+                pass
+        if self._source is None:
+            self._session.close()
+            return False
+        self._sample()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return True
+    
+    def stop(self, start_time: float) -> ServerStats:
+        """
+        Последний замер и остановка замеров
+
+        :param start_time: Время начала нагрузки (time.time())
+        :return: Замеры от последнего перед началом нагрузки до последнего
+        """
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        self._session.close()
+        
+        first = max([index for index, sample in enumerate(self._samples) if sample['wall_time'] <= start_time],
+                    default=0)
+        samples = [
+            dict(time=sample['wall_time'] - start_time, server=sample['server'], client=sample['client'])
+            for sample in self._samples[first:]
+        ]
+        samples[0]['client'] = _client_metrics(RunResult())
+        return ServerStats(self.interval, samples)
@@ -0,0 +1,113 @@
+from threading import Lock
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.connection import HTTPConnection, HTTPSConnection
+
+
+class ConnectionStats:
+    """
+    Счётчик запросов и открытых для них соединений
+
+    Запрос, для которого не было открыто нового соединения, выполнен через повторно использованное соединение
+    """
+    
+    def __init__(self):
+        self._lock = Lock()
+        self.requests = 0
+        self.opened = 0
+    
+    def __getstate__(self):
+        return dict(requests=self.requests, opened=self.opened)
+    
+    def __setstate__(self, state):
+        self.__init__()
+        self.requests = state['requests']
+        self.opened = state['opened']
+    
+    @property
+    def reused(self) -> int:
+        """
+        :return: Количество запросов, выполненных через повторно использованное соединение
+        """
+        return self.requests - self.opened
+    
+    def add_request(self):
+        with self._lock:
+            self.requests += 1
+    
+    def add_connection(self):
+        with self._lock:
+            self.opened += 1
+    
+    def merge(self, other: 'ConnectionStats'):
+        """
+        Добавление счётчиков другого объекта (например, полученного из другого процесса)
+        """
+        with self._lock:
+            self.requests += other.requests
+            self.opened += other.opened
+    
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.opened = 0
+
+
+class _CountingAdapter(HTTPAdapter):
+    """
+    HTTPAdapter, учитывающий запросы и открытые соединения в ConnectionStats
+    """
+    
+    def __init__(self, stats: ConnectionStats, **kwargs):
+        self._stats = stats
+        super().__init__(**kwargs)
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        
+        stats = self._stats
+        
+        class _HTTPConnection(HTTPConnection):
+            def connect(self):
+                stats.add_connection()
+                super().connect()
+        
+        class _HTTPSConnection(HTTPSConnection):
+            def connect(self):
+                stats.add_connection()
+                super().connect()
+        
+        class _HTTPPool(HTTPConnectionPool):
+            ConnectionCls = _HTTPConnection
+        
+        class _HTTPSPool(HTTPSConnectionPool):
+            ConnectionCls = _HTTPSConnection
+        
+        self.poolmanager.pool_classes_by_scheme = dict(http=_HTTPPool, https=_HTTPSPool)
+    
+    def send(self, *args, **kwargs):
+        self._stats.add_request()
+        return super().send(*args, **kwargs)
+
+
+def new_session(stats: ConnectionStats, pool_size: int, keep_alive: bool, headers: dict) -> requests.Session:
+    """
+    :param stats: Счётчик запросов и открытых соединений
+    :param pool_size: Максимальное количество соединений, хранимых в пуле для повторного использования
+    :param keep_alive: Использовать ли соединения повторно. Если нет, соединение закрывается после каждого запроса
+    :param headers: Заголовки всех запросов сессии
+    :return: Сессия с пулом соединений
+    """
+    session = requests.Session()
+    session.headers.update(headers)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    
+    adapter = _CountingAdapter(stats, pool_connections=1, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    
+    return session
+
@@ -0,0 +1,432 @@
+"""
+Модели значений датчиков
+
+Равномерно распределённые случайные значения почти не сжимаются, поэтому кодирование InfluxDB (Gorilla
+для вещественных чисел, simple8b для целых, RLE для булевых, snappy для строк) работает на них намного хуже,
+чем на показаниях настоящих датчиков, и замеры объёма хранения и скорости записи искажаются. Модели
+воспроизводят типичное поведение датчиков: плавное блуждание, периодический сигнал с шумом, редкие
+переключения уровня, состояния из небольшого набора и редко меняющиеся флаги
+"""
+import hashlib
+import math
+import random
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .line_protocol import escape_string
+
+TYPES = ('float', 'int', 'str', 'bool')
+
+
+def _format_numbers(values: 'np.ndarray', decimals: int, integer: bool) -> 'np.ndarray':
+    """
+    :return: Запись значений в формате line protocol
+    """
+    if integer:
+        return np.char.add(np.rint(values).astype(np.int64).astype(bytes), b'i')
+    return np.char.mod(f'%.{decimals}f', values).astype(bytes)
+
+
+def _reflect(values, low: float, high: float):
+    """
+    :return: Значения, отражённые от границ диапазона [low; high] (число или массив NumPy)
+    """
+    width = high - low
+    folded = (values - low) % (2 * width)
+    return low + width - abs(folded - width)
+
+
+def _hold(changes: 'np.ndarray', candidates: 'np.ndarray') -> 'np.ndarray':
+    """
+    Значения, которые сохраняются до следующего изменения
+
+    :param changes: Признаки изменения значения на каждом шаге (шаги x датчики)
+    :param candidates: Значения до блока (первая строка) и новые значения на каждом шаге ((шаги + 1) x датчики)
+    :return: Значения на каждом шаге (шаги x датчики)
+    """
+    steps = np.arange(1, changes.shape[0] + 1)[:, None]
+    index = np.maximum.accumulate(np.where(changes, steps, 0), axis=0)
+    return np.take_along_axis(candidates, index, axis=0)
+
+
+class Signal(ABC):
+    """
+    Модель значений датчика
+
+    sensor создаёт генератор значений одного датчика для построчной генерации, columns - генератор значений
+    нескольких датчиков блоками для генерации средствами NumPy. Состояние (текущее значение, фаза) хранится
+    в генераторе, поэтому следующие значения датчика продолжают предыдущие, а датчики не зависят друг от друга
+    """
+    
+    type = 'float'
+    
+    @abstractmethod
+    def sensor(self, rng: random.Random, interval: float) -> Callable[[], str]:
+        """
+        :param rng: Генератор случайных чисел узла
+        :param interval: Интервал между значениями датчика (в секундах)
+        :return: Функция, возвращающая следующее значение датчика в формате line protocol
+        """
+        pass
+    
+    @abstractmethod
+    def columns(self, rng: 'np.random.Generator', sensors: int, interval: float) -> Callable[[int], 'np.ndarray']:
+        """
+        :param rng: Генератор случайных чисел NumPy узла
+        :param sensors: Количество датчиков
+        :param interval: Интервал между значениями датчика (в секундах)
+        :return: Функция, возвращающая следующие steps значений каждого датчика в формате line protocol
+            (массив шаги x датчики)
+        """
+        pass
+    
+    def __repr__(self):
+        params = ', '.join(f'{key}={value!r}' for key, value in vars(self).items())
+        return f'{type(self).__name__}({params})'
+
+
+class RandomWalk(Signal):
+    """
+    Случайное блуждание: каждое значение отличается от предыдущего на нормально распределённую величину.
+    Значения отражаются от границ диапазона [low; high]. Подходит для температуры, давления, уровня
+    """
+    
+    def __init__(self, low: float = 0.0, high: float = 1000.0, step: float = 1.0, start: float = None,
+                 decimals: int = 2, integer: bool = False):
+        """
+        :param low: Нижняя граница значений
+        :param high: Верхняя граница значений
+        :param step: Стандартное отклонение изменения за один шаг
+        :param start: Начальное значение. По умолчанию - случайное в диапазоне у каждого датчика
+        :param decimals: Количество знаков после запятой
+        :param integer: Целочисленный датчик (тип int)
+        """
+        if low >= high:
+            raise ValueError('Нижняя граница должна быть меньше верхней')
+        self.low = low
+        self.high = high
+        self.step = step
+        self.start = start
+        self.decimals = decimals
+        self.integer = integer
+        self.type = 'int' if integer else 'float'
+    
+    def sensor(self, rng: random.Random, interval: float) -> Callable[[], str]:
+        value = self.start if self.start is not None else rng.uniform(self.low, self.high)
+        low, high, step, decimals = self.low, self.high, self.step, self.decimals
+        
+        def _next() -> str:
+            nonlocal value
+            value = _reflect(value + rng.gauss(0.0, step), low, high)
+            return f'{round(value)}i' if self.integer else f'{value:.{decimals}f}'
+        
+        return _next
+    
+    def columns(self, rng: 'np.random.Generator', sensors: int, interval: float) -> Callable[[int], 'np.ndarray']:
+        last = np.full(sensors, self.start, dtype=float) if self.start is not None else \
+            rng.uniform(self.low, self.high, sensors)
+        
+        def _next(steps: int) -> 'np.ndarray':
+            nonlocal last
+            # Отражение от границ не зависит от того, когда граница была пересечена, поэтому применяется
+            # к накопленной сумме изменений сразу для всего блока
+            values = _reflect(last + np.cumsum(rng.normal(0.0, self.step, (steps, sensors)), axis=0),
+                              self.low, self.high)
+            last = values[-1]
+            return _format_numbers(values, self.decimals, self.integer)
+        
+        return _next
+
+
+class Sine(Signal):
+    """
+    Периодический сигнал с шумом: offset + amplitude * sin(2 * pi * t / period + фаза) + шум.
+    Фаза у каждого датчика случайная. Подходит для суточных и сменных циклов нагрузки, вибрации
+    """
+    
+    def __init__(self, offset: float = 500.0, amplitude: float = 100.0, period: float = 24 * 60 * 60,
+                 noise: float = 1.0, decimals: int = 2):
+        """
+        :param offset: Среднее значение
+        :param amplitude: Амплитуда
+        :param period: Период (в секундах)
+        :param noise: Стандартное отклонение нормально распределённого шума
+        :param decimals: Количество знаков после запятой
+        """
+        if period <= 0:
+            raise ValueError('Период должен быть положительным')
+        self.offset = offset
+        self.amplitude = amplitude
+        self.period = period
+        self.noise = noise
+        self.decimals = decimals
+    
+    def sensor(self, rng: random.Random, interval: float) -> Callable[[], str]:
+        phase = rng.uniform(0.0, 2 * math.pi)
+        increment = 2 * math.pi * interval / self.period
+        offset, amplitude, noise, decimals = self.offset, self.amplitude, self.noise, self.decimals
+        
+        def _next() -> str:
+            nonlocal phase
+            value = offset + amplitude * math.sin(phase) + (rng.gauss(0.0, noise) if noise else 0.0)
+            phase += increment
+            return f'{value:.{decimals}f}'
+        
+        return _next
+    
+    def columns(self, rng: 'np.random.Generator', sensors: int, interval: float) -> Callable[[int], 'np.ndarray']:
+        phase = rng.uniform(0.0, 2 * math.pi, sensors)
+        increment = 2 * math.pi * interval / self.period
+        
+        def _next(steps: int) -> 'np.ndarray':
+            nonlocal phase
+            phases = phase + np.arange(steps)[:, None] * increment
+            phase = phase + steps * increment
+            values = self.offset + self.amplitude * np.sin(phases)
+            if self.noise:
+                values += rng.normal(0.0, self.noise, (steps, sensors))
+            return _format_numbers(values, self.decimals, False)
+        
+        return _next
+
+
+class Steps(Signal):
+    """
+    Уровень, который держится постоянным и изредка переключается на новый случайный уровень из [low; high].
+    С change_probability=0 - константа. Подходит для уставок, режимов работы, счётчиков оборудования
+    """
+    
+    def __init__(self, low: float = 0.0, high: float = 100.0, change_probability: float = 0.01,
+                 decimals: int = 0, integer: bool = True):
+        """
+        :param low: Нижняя граница уровня
+        :param high: Верхняя граница уровня
+        :param change_probability: Вероятность переключения уровня на каждом шаге
+        :param decimals: Количество знаков после запятой вещественного уровня
+        :param integer: Целочисленный датчик (тип int)
+        """
+        if not 0 <= change_probability <= 1:
+            raise ValueError('Вероятность переключения должна быть в диапазоне [0; 1]')
+        self.low = low
+        self.high = high
+        self.change_probability = change_probability
+        self.decimals = decimals
+        self.integer = integer
+        self.type = 'int' if integer else 'float'
+    
+    def _format(self, value: float) -> str:
+        return f'{round(value)}i' if self.integer else f'{value:.{self.decimals}f}'
+    
+    def sensor(self, rng: random.Random, interval: float) -> Callable[[], str]:
+        current = self._format(rng.uniform(self.low, self.high))
+        
+        def _next() -> str:
+            nonlocal current
+            if rng.random() < self.change_probability:
+                current = self._format(rng.uniform(self.low, self.high))
+            return current
+        
+        return _next
+    
+    def columns(self, rng: 'np.random.Generator', sensors: int, interval: float) -> Callable[[int], 'np.ndarray']:
+        last = rng.uniform(self.low, self.high, sensors)
+        
+        def _next(steps: int) -> 'np.ndarray':
+            nonlocal last
+            candidates = np.vstack([last, rng.uniform(self.low, self.high, (steps, sensors))])
+            values = _hold(rng.random((steps, sensors)) < self.change_probability, candidates)
+            last = values[-1]
+            return _format_numbers(values, self.decimals, self.integer)
+        
+        return _next
+
+
+class Enum(Signal):
+    """
+    Строковое состояние из небольшого набора, изредка сменяющееся на другое (с учётом весов).
+    Подходит для статусов оборудования, режимов, кодов аварий
+    """
+    
+    type = 'str'
+    
+    def __init__(self, values: Sequence[str] = ('ok', 'warning', 'alarm', 'maintenance'),
+                 weights: Sequence[float] = None, change_probability: float = 0.05):
+        """
+        :param values: Возможные значения
+        :param weights: Веса значений. По умолчанию - равные
+        :param change_probability: Вероятность смены состояния на каждом шаге
+        """
+        if not values:
+            raise ValueError('Не заданы значения')
+        if weights is not None and len(weights) != len(values):
+            raise ValueError('Количество весов должно совпадать с количеством значений')
+        if not 0 <= change_probability <= 1:
+            raise ValueError('Вероятность смены состояния должна быть в диапазоне [0; 1]')
+        self.values = list(values)
+        self.weights = list(weights) if weights is not None else None
+        self.change_probability = change_probability
+    
+    def _encoded(self) -> list:
+        return [f'"{escape_string(value)}"' for value in self.values]
+    
+    def sensor(self, rng: random.Random, interval: float) -> Callable[[], str]:
+        encoded = self._encoded()
+        
+        def _choice() -> str:
+            return rng.choices(encoded, self.weights)[0]
+        
+        current = _choice()
+        
+        def _next() -> str:
+            nonlocal current
+            if rng.random() < self.change_probability:
+                current = _choice()
+            return current
+        
+        return _next
+    
+    def columns(self, rng: 'np.random.Generator', sensors: int, interval: float) -> Callable[[int], 'np.ndarray']:
+        encoded = np.array([value.encode() for value in self._encoded()])
+        probabilities = None
+        if self.weights is not None:
+            probabilities = np.array(self.weights, dtype=float) / sum(self.weights)
+        last = rng.choice(len(encoded), sensors, p=probabilities)
+        
+        def _next(steps: int) -> 'np.ndarray':
+            nonlocal last
+            candidates = np.vstack([last, rng.choice(len(encoded), (steps, sensors), p=probabilities)])
+            indexes = _hold(rng.random((steps, sensors)) < self.change_probability, candidates)
+            last = indexes[-1]
+            return encoded[indexes]
+        
+        return _next
+
+
+class Flag(Signal):
+    """
+    Булево значение, изредка переключающееся на противоположное. Подходит для признаков работы, дискретных
+    входов, аварийных флагов
+    """
+    
+    type = 'bool'
+    
+    def __init__(self, change_probability: float = 0.01, true_probability: float = 0.5):
+        """
+        :param change_probability: Вероятность переключения на каждом шаге
+        :param true_probability: Вероятность того, что начальное значение - true
+        """
+        if not 0 <= change_probability <= 1:
+            raise ValueError('Вероятность переключения должна быть в диапазоне [0; 1]')
+        self.change_probability = change_probability
+        self.true_probability = true_probability
+    
+    def sensor(self, rng: random.Random, interval: float) -> Callable[[], str]:
+        current = rng.random() < self.true_probability
+        
+        def _next() -> str:
+            nonlocal current
+            if rng.random() < self.change_probability:
+                current = not current
+            return 't' if current else 'f'
+        
+        return _next
+    
+    def columns(self, rng: 'np.random.Generator', sensors: int, interval: float) -> Callable[[int], 'np.ndarray']:
+        last = rng.random(sensors) < self.true_probability
+        
+        def _next(steps: int) -> 'np.ndarray':
+            nonlocal last
+            toggles = np.cumsum(rng.random((steps, sensors)) < self.change_probability, axis=0) % 2 == 1
+            values = last ^ toggles
+            last = values[-1]
+            return np.where(values, b't', b'f')
+        
+        return _next
+
+
+# Модели по именам для описания в файле сценария
+MODELS = dict(random_walk=RandomWalk, sine=Sine, steps=Steps, enum=Enum, flag=Flag)
+
+
+class Signals:
+    """
+    Модели значений датчиков каждого типа
+
+    Датчикам одного типа модели назначаются по кругу: датчик с номером k получает модель k % (количество моделей
+    типа). Датчики типов без модели получают равномерно распределённые случайные значения, как без моделей
+    """
+    
+    def __init__(self, models: Dict[str, Union[Signal, Sequence[Signal]]]):
+        """
+        :param models: Модели по типу датчика (float, int, str, bool): модель или список моделей
+        """
+        self.models: Dict[str, list] = {}
+        for sensor_type, type_models in models.items():
+            if sensor_type not in TYPES:
+                raise ValueError(f'Неизвестный тип датчика: {sensor_type}')
+            type_models = [type_models] if isinstance(type_models, Signal) else list(type_models)
+            for model in type_models:
+                if model.type != sensor_type:
+                    raise ValueError(f'Модель {model!r} создаёт значения типа {model.type}, а не {sensor_type}')
+            if type_models:
+                self.models[sensor_type] = type_models
+    
+    @classmethod
+    def realistic(cls) -> 'Signals':
+        """
+        :return: Модели, близкие к показаниям датчиков производства: вещественные датчики - попеременно
+            периодический сигнал с шумом и случайное блуждание, целочисленные - редко переключающийся уровень,
+            строковые - состояния из небольшого набора, булевы - редко переключающиеся флаги
+        """
+        return cls(dict(float=[Sine(), RandomWalk()], int=Steps(), str=Enum(), bool=Flag()))
+    
+    @classmethod
+    def from_config(cls, config: Union[str, dict]) -> 'Signals':
+        """
+        :param config: Имя набора моделей (realistic), либо словарь: тип датчика - описание модели или список
+            описаний. Описание - словарь с именем модели (model: random_walk, sine, steps, enum, flag)
+            и её параметрами
+        :return: Модели значений датчиков
+        """
+        if isinstance(config, str):
+            if config != 'realistic':
+                raise ValueError(f'Неизвестный набор моделей значений: {config}')
+            return cls.realistic()
+        models = {}
+        for sensor_type, descriptions in config.items():
+            if isinstance(descriptions, dict):
+                descriptions = [descriptions]
+            models[sensor_type] = []
+            for description in descriptions:
+                params = dict(description)
+                name = params.pop('model')
+                if name not in MODELS:
+                    raise ValueError(f'Неизвестная модель значений: {name}')
+                models[sensor_type].append(MODELS[name](**params))
+        return cls(models)
+    
+    def __repr__(self):
+        return f'Signals({self.models!r})'
+    
+    @property
+    def key(self) -> str:
+        """
+        :return: Краткий ключ моделей для имени каталога кэша данных
+        """
+        return hashlib.sha1(repr(self).encode()).hexdigest()[:8]
+    
+    def model(self, sensor_type: str, number: int) -> Optional[Signal]:
+        """
+        :param sensor_type: Тип датчика
+        :param number: Номер датчика среди датчиков этого типа (с нуля)
+        :return: Модель датчика. None - равномерно распределённые случайные значения
+        """
+        type_models = self.models.get(sensor_type)
+        if not type_models:
+            return None
+        return type_models[number % len(type_models)]
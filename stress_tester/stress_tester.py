@@ -1,48 +1,204 @@
+import bisect
+import math
+import os
 import random
 import string
 import time
+import zlib
 from contextlib import contextmanager
-from datetime import datetime
-from functools import partial
-from itertools import chain
-from operator import mul
-from threading import Barrier, Thread, current_thread
-from typing import Union, Tuple
+from datetime import datetime, timedelta
+from functools import partial, wraps
+from itertools import islice
+from pathlib import Path
+from threading import Barrier, BrokenBarrierError, Lock, Thread
+from typing import Union, Tuple, Iterable, Iterator, List, Optional, Callable, Sequence, Dict, Set
 
 import requests
 
+from . import async_engine, backfill, line_protocol, multiprocess, queries, sustained, verification
+from .compression import compress_batches
+from .live import LiveGroup, LiveMetrics, LiveReporter
+from .payload_cache import PayloadCache
+from .queries import DEFAULT_TEMPLATES, QueryMix, QueryTemplate
+from .results import (RunResult, CountingBody, SustainedResult, MixedResult, ReadResult, BackfillResult,
+                      VerificationResult)
+from .retry import AdaptiveLimiter, RetryPolicy, send_with_retry
+from .schema import Schema
+from .server_stats import ServerStatsSampler
+from .signals import Signals
+from .sessions import ConnectionStats, new_session
+from .vectorized import vectorized_node_lines
+from .verification import Verification
+
+_STREAM_CHUNK_POINTS = 1000
+
+
+def _with_server_stats(method):
+    """
+    Снятие показателей InfluxDB во время выполнения метода StressTester. Показатели назначаются атрибуту server
+    возвращённого результата
+    """
+    @wraps(method)
+    def _wrapper(self, *args, **kwargs):
+        sampler = self.server_stats_sampler()
+        if sampler is None or not sampler.start():
+            return method(self, *args, **kwargs)
+        
+        self._live_listeners.append(sampler)
+        try:
+            returned = method(self, *args, **kwargs)
+        finally:
+            self._live_listeners.remove(sampler)
+            server_stats = sampler.stop(self._start_time)
+        
+        result = returned[0] if isinstance(returned, tuple) else returned
+        result.server = server_stats
+        return returned
+    
+    return _wrapper
+
+
+def _split_batches(lines: Iterable[bytes],
+                   batch_size: Optional[int] = None,
+                   max_batch_bytes: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Разбиение строк line protocol на пакеты для отдельных запросов на запись
+
+    :param lines: Закодированные строки line protocol (без завершающего перевода строки)
+    :param batch_size: Максимальное количество точек в пакете. None - без ограничения
+    :param max_batch_bytes: Максимальный размер пакета в байтах. None - без ограничения.
+        Строка, которая сама по себе превышает ограничение, отправляется отдельным пакетом
+    :return: Итератор по телам запросов
+    """
+    batch = []
+    # Размер пакета вместе с переводом строки после каждой строки: тело с ещё одной строкой займёт
+    # batch_bytes + len(line) байт
+    batch_bytes = 0
+    for line in lines:
+        if batch and (
+                (batch_size is not None and len(batch) >= batch_size) or
+                (max_batch_bytes is not None and batch_bytes + len(line) > max_batch_bytes)
+        ):
+            yield b'\n'.join(batch)
+            batch = []
+            batch_bytes = 0
+        batch.append(line)
+        batch_bytes += len(line) + 1
+    if batch:
+        yield b'\n'.join(batch)
+
+
+def _stream_body(lines: Iterable[bytes], chunk_points: int = _STREAM_CHUNK_POINTS) -> Iterator[bytes]:
+    """
+    Тело запроса, передаваемое по частям (chunked transfer encoding) по мере генерации строк
+
+    :param lines: Закодированные строки line protocol (без завершающего перевода строки)
+    :param chunk_points: Количество точек в одной части
+    :return: Итератор по частям тела запроса
+    """
+    lines = iter(lines)
+    chunk = list(islice(lines, chunk_points))
+    while chunk:
+        yield b'\n'.join(chunk) + b'\n'
+        chunk = list(islice(lines, chunk_points))
+
 
 class StressTester:
-    def __init__(self, host, port=8086, db='stress', precision='ms', headers=None):
+    def __init__(self, host, port=8086, db='stress', precision='ms', headers=None,
+                 pool_size=100, keep_alive=True, session_scope='shared', server_stats_interval=1.0, timeout=None):
+        """
+        :param host: Адрес InfluxDB
+        :param port: Порт InfluxDB
+        :param db: Имя БД
+        :param precision: Точность меток времени: ns, us, ms (по умолчанию) или s. Определяет метки времени
+            записываемых данных и формат меток времени в ответах на запросы чтения
+        :param headers: Заголовки всех запросов к InfluxDB
+        :param pool_size: Максимальное количество соединений, хранимых в пуле для повторного использования
+        :param keep_alive: Использовать ли соединения повторно. Если нет, соединение закрывается после каждого запроса
+        :param session_scope: Область действия пула соединений при одновременных записи и чтении:
+            shared - общий пул для всех узлов, node - собственный пул у каждого узла
+        :param server_stats_interval: Интервал (в секундах) снятия показателей InfluxDB (/debug/vars, SHOW STATS)
+            во время write, read, sustain и mixed. 0 или None - показатели не снимаются
+        :param timeout: Время ожидания ответа на запросы записи и чтения под нагрузкой (в секундах).
+            По умолчанию - без ограничения. Запрос, не получивший ответа вовремя, учитывается как ошибка timeout
+        """
         self._influxdb_url = f'http://{host}:{port}'
+        self._config = dict(host=host, port=port, db=db, precision=precision, pool_size=pool_size,
+                            keep_alive=keep_alive, session_scope=session_scope,
+                            server_stats_interval=server_stats_interval, timeout=timeout)
         
         self._ping_endpoint = self._influxdb_url + '/ping'
         
         self._write_endpoint = self._influxdb_url + '/write'
-        self._write_params = dict(db=db, precision=precision)
+        self._precision = precision
+        self._precision_multiplier = line_protocol.precision_multiplier(precision)
+        self._write_params = dict(db=db, precision=line_protocol.API_PRECISIONS[precision])
         
         self._query_endpoint = self._influxdb_url + '/query'
         self._create_db_params = dict(q=f'CREATE DATABASE "{db}"')
         self._drop_db_params = dict(q=f'DROP DATABASE "{db}"')
-        self._default_read_params = dict(db=db, epoch=precision)
-        
-        if precision == 'ms':
-            self._second_multiplier = partial(mul, 1000)
-        else:
-            raise NotImplementedError('Не реализована точность, отличная от ms')
+        self._default_read_params = dict(db=db, epoch=line_protocol.API_PRECISIONS[precision])
         
         if headers is None:
             self._headers = {}
         else:
             self._headers = headers
         
+        if session_scope not in ('shared', 'node'):
+            raise ValueError(f'Неизвестная область действия пула соединений: {session_scope}')
+        
+        self._pool_size = pool_size
+        self._keep_alive = keep_alive
+        self._session_scope = session_scope
+        self._server_stats_interval = server_stats_interval
+        self._timeout = timeout
+        self._connection_stats = ConnectionStats()
+        self._session = self._new_session()
+        
         self._start_time = None
         self._end_time = None
+        
+        # Распределённая нагрузка (см. as_agent): узлы, доставшиеся агенту (срез имён всех узлов),
+        # и согласованный момент начала нагрузки всеми агентами (time.time() агента)
+        self._node_share: Optional[Tuple[int, int]] = None
+        self._start_at: Optional[float] = None
+        
+        self._result = RunResult()
+        self._live_listeners = []
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_session']
+        state['_live_listeners'] = []
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._session = self._new_session()
+    
+    def _new_session(self) -> requests.Session:
+        """
+        :return: Сессия с пулом соединений, учитывающая запросы и открытые соединения в connection_stats
+        """
+        return new_session(self._connection_stats, self._pool_size, self._keep_alive, self._headers)
+    
+    def _node_session(self) -> requests.Session:
+        """
+        :return: Сессия узла при одновременных записи и чтении
+        """
+        if self._session_scope == 'shared':
+            return self._session
+        return self._new_session()
     
     def _set_start_time(self):
         """
-        Служебный метод для того, чтобы засечь время начала операции над InfluxDB
+        Служебный метод для того, чтобы засечь время начала операции над InfluxDB. При распределённой нагрузке
+        сначала дожидается согласованного момента начала
         """
+        if self._start_at is not None:
+            delay = self._start_at - time.time()
+            if delay > 0:
+                time.sleep(delay)
         self._start_time = time.time()
     
     def _set_end_time(self):
@@ -56,6 +212,7 @@ class StressTester:
         """
         Служебный контекстный менеджер для засекания времени выполнения однопоточных операций
         """
+        self._connection_stats.reset()
         try:
             self._set_start_time()
             yield
@@ -71,54 +228,459 @@ class StressTester:
         return self._end_time - self._start_time
     
     @property
-    def _random_float(self) -> str:
+    def start_time(self) -> Optional[float]:
         """
-        :return: Случайное вещественное число из диапазона [0;1000) для записи в InfluxDB
+        :return: Момент (time.time()) начала последней операции над InfluxDB
         """
-        return '{:.5e}'.format(random.random() * 1000)
+        return self._start_time
     
     @property
-    def _random_int(self) -> str:
+    def end_time(self) -> Optional[float]:
         """
-        :return: Случайное целое число из диапазона [0; 10000) для записи в InfluxDB
+        :return: Момент (time.time()) окончания последней операции над InfluxDB
         """
-        return f'{random.randrange(1000)}i'
+        return self._end_time
     
     @property
-    def _random_str(self) -> str:
+    def connection_stats(self) -> ConnectionStats:
         """
-        :return: Случайная строка длина 60 для записи в InfluxDB
+        :return: Количество запросов последней операции над InfluxDB (requests), открытых для них соединений (opened)
+            и запросов, выполненных через повторно использованное соединение (reused)
         """
-        return '"{}"'.format(''.join(random.choices(string.ascii_letters, k=60)))
+        return self._connection_stats
     
     @property
-    def _random_bool(self) -> str:
+    def config(self) -> dict:
+        """
+        :return: Параметры подключения к InfluxDB (кроме заголовков, которые могут содержать учётные данные)
+        """
+        return dict(self._config)
+    
+    def server_stats_sampler(self) -> Optional[ServerStatsSampler]:
+        """
+        :return: Объект снятия показателей InfluxDB с интервалом server_stats_interval, заданным при создании
+            объекта. None, если показатели не снимаются
+        """
+        if not self._server_stats_interval:
+            return None
+        return ServerStatsSampler(self._influxdb_url, self._headers, self._server_stats_interval)
+    
+    @contextmanager
+    def as_agent(self, node_share: Tuple[int, int] = None, start_at: float = None):
+        """
+        Выполнение операций внутри блока with как доли распределённой нагрузки (см. distributed.Agent)
+
+        :param node_share: Узлы, доставшиеся агенту: начало и конец среза имён всех узлов нагрузки (см. node_names).
+            Учитывается write, sustain и backfill. None - все узлы
+        :param start_at: Согласованный момент начала нагрузки всеми агентами (time.time() агента). Операция
+            дожидается его перед началом запросов. None - без ожидания
+        """
+        if node_share is not None:
+            node_share = tuple(node_share)
+            if len(node_share) != 2 or not 0 <= node_share[0] < node_share[1]:
+                raise ValueError(f'Неверная доля узлов: {node_share}')
+        previous = self._node_share, self._start_at
+        self._node_share, self._start_at = node_share, start_at
+        try:
+            yield self
+        finally:
+            self._node_share, self._start_at = previous
+    
+    @contextmanager
+    def listen(self, listener):
+        """
+        Учёт запросов операций внутри блока with по мере их выполнения
+
+        :param listener: Объект, в котором учитываются запросы (например, LiveMetrics)
+        """
+        self._live_listeners.append(listener)
+        try:
+            yield listener
+        finally:
+            self._live_listeners.remove(listener)
+    
+    @contextmanager
+    def live_progress(self,
+                      interval: float = 5.0,
+                      window: float = 10.0,
+                      exporters: Iterable = (),
+                      output: Optional[Callable[[str], None]] = print):
+        """
+        Периодический отчёт о ходе нагрузки во время выполнения write, read, sustain и mixed внутри блока with:
+        скорость, количество выполняющихся запросов, доля ошибок и процентили времени выполнения запросов
+        за скользящее окно. При записи движком processes запросы дочерних процессов не учитываются
+
+        :param interval: Интервал отчёта (в секундах)
+        :param window: Длительность скользящего окна (в секундах)
+        :param exporters: Объекты экспорта показателей (см. LineProtocolExporter, PrometheusExporter)
+        :param output: Функция вывода строки отчёта. None - без вывода в консоль
+        :return: Показатели хода нагрузки LiveMetrics
+        """
+        live = LiveMetrics(window)
+        reporter = LiveReporter(live, interval, exporters, output)
+        reporter.start()
+        try:
+            with self.listen(live):
+                yield live
+        finally:
+            reporter.stop()
+    
+    @property
+    def _live(self) -> Optional[LiveGroup]:
+        """
+        :return: Объекты, в которых запросы учитываются по мере выполнения (ход нагрузки, показатели сервера)
+        """
+        return LiveGroup(self._live_listeners) if self._live_listeners else None
+    
+    @property
+    def result(self) -> Union[RunResult, MixedResult]:
+        """
+        :return: Результат последнего вызова write, read, sustain или mixed
+        """
+        return self._result
+    
+    @staticmethod
+    def _random_float(rng=random) -> str:
+        """
+        :param rng: Генератор случайных чисел. По умолчанию - глобальный генератор модуля random
+        :return: Случайное вещественное число из диапазона [0;1000) для записи в InfluxDB
         """
+        return '{:.5e}'.format(rng.random() * 1000)
+    
+    @staticmethod
+    def _random_int(rng=random) -> str:
+        """
+        :param rng: Генератор случайных чисел. По умолчанию - глобальный генератор модуля random
+        :return: Случайное целое число из диапазона [0; 10000) для записи в InfluxDB
+        """
+        return f'{rng.randrange(1000)}i'
+    
+    @staticmethod
+    def _random_str(rng=random) -> str:
+        """
+        :param rng: Генератор случайных чисел. По умолчанию - глобальный генератор модуля random
+        :return: Случайная строка длина 60 для записи в InfluxDB
+        """
+        return '"{}"'.format(''.join(rng.choices(string.ascii_letters, k=60)))
+    
+    @staticmethod
+    def _random_bool(rng=random) -> str:
+        """
+        :param rng: Генератор случайных чисел. По умолчанию - глобальный генератор модуля random
         :return: Случайное булево значение для записи в InfluxDB
         """
-        return random.choice('tf')
+        return rng.choice('tf')
+    
+    def node_names(self, nodes_count: int, whole_run: bool = False) -> List[str]:
+        """
+        :param nodes_count: Количество узлов
+        :param whole_run: Вернуть все узлы нагрузки, в том числе доставшиеся другим агентам
+        :return: Имена узлов, дополненные нулями до одинаковой длины. При распределённой нагрузке (см. as_agent) -
+            только узлы, доставшиеся агенту
+        """
+        nodes_count_digits = len(str(nodes_count))
+        name_string = f'{{:0>{nodes_count_digits}}}'
+        node_names = [name_string.format(i + 1) for i in range(nodes_count)]
+        if self._node_share is not None and not whole_run:
+            start, stop = self._node_share
+            node_names = node_names[start:stop]
+        return node_names
+    
+    def _sampling(self, duration: float, sample_interval: float) -> Tuple[int, int]:
+        """
+        :param duration: На протяжении скольки секунд копились данные
+        :param sample_interval: Интервал между значениями датчика (в секундах)
+        :return: Количество значений каждого датчика и интервал между ними в единицах метки времени
+        """
+        if sample_interval <= 0:
+            raise ValueError('Интервал между значениями датчика должен быть положительным')
+        step = sample_interval * self._precision_multiplier
+        if round(step) < 1 or abs(step - round(step)) > 1e-6 * step:
+            raise ValueError(f'Интервал между значениями датчика {sample_interval} сек. не кратен '
+                             f'точности меток времени {self._precision}')
+        return int(duration / sample_interval + 1e-9), round(step)
+    
+    def _node_lines(self,
+                    node_name: str,
+                    float_sensors: int,
+                    int_sensors: int,
+                    str_sensors: int,
+                    bool_sensors: int,
+                    duration: int,
+                    start_timestamp: int,
+                    seed: int = None,
+                    generator: str = 'python',
+                    schema: Schema = None,
+                    nodes_count: int = 1,
+                    sample_interval: float = 1.0,
+                    signals: Signals = None) -> Iterator[bytes]:
+        """
+        Генерация строк line protocol одного узла
+
+        :param node_name: Имя узла (значение тега thread)
+        :param float_sensors: Количество вещественных датчиков на узле
+        :param int_sensors: Количество целочисленных датчиков на узле
+        :param str_sensors: Количество строковых датчиков на узле
+        :param bool_sensors: Количество булевых датчиков на узле
+        :param duration: На протяжении скольки секунд копились данные
+        :param start_timestamp: Метка времени первой точки в точности, заданной при создании объекта
+        :param seed: Начальное значение генератора случайных чисел. Генератор узла инициализируется парой
+            (seed, node_name), поэтому данные узла не зависят от остальных узлов.
+            None - используется глобальный генератор модуля random
+        :param generator: Способ генерации: python - построчно средствами стандартной библиотеки,
+            numpy - целыми столбцами средствами NumPy (см. vectorized_node_lines)
+        :param schema: Схема данных. По умолчанию - измерение python_measurement с тегом thread и полями
+            float, int, str, bool
+        :param nodes_count: Количество узлов, между которыми распределяются устройства схемы
+        :param sample_interval: Интервал между значениями датчика (в секундах). Должен быть кратен точности
+            меток времени
+        :param signals: Модели значений датчиков. По умолчанию - равномерно распределённые случайные значения
+        :return: Итератор по закодированным строкам (без завершающего перевода строки)
+        """
+        steps, step = self._sampling(duration, sample_interval)
+        if schema is not None:
+            if generator != 'python':
+                raise ValueError('Данные по схеме генерируются только способом python')
+            rng = random if seed is None else random.Random(f'{seed}:{node_name}')
+            return schema.node_lines(int(node_name) - 1, nodes_count, float_sensors, int_sensors, str_sensors,
+                                     bool_sensors, steps, start_timestamp, step,
+                                     self._sensor_values(rng, signals, sample_interval), rng)
+        
+        if generator == 'numpy':
+            return vectorized_node_lines(node_name, float_sensors, int_sensors, str_sensors, bool_sensors,
+                                         steps, start_timestamp, step, seed, signals, sample_interval)
+        if generator != 'python':
+            raise ValueError(f'Неизвестный способ генерации данных: {generator}')
+        
+        rng = random if seed is None else random.Random(f'{seed}:{node_name}')
+        values = self._sensor_values(rng, signals, sample_interval)
+        
+        # Ключ серии и ключи полей экранируются один раз, для каждой точки форматируются только значение
+        # и метка времени
+        key = line_protocol.series_key('python_measurement', dict(thread=node_name))
+        sensors = [
+            (f'{key} {line_protocol.escape_key(field)}=', values(field, number))
+            for field, count in (('float', float_sensors), ('int', int_sensors),
+                                 ('str', str_sensors), ('bool', bool_sensors))
+            for number in range(count)
+        ]
+        timestamps = range(start_timestamp, start_timestamp + steps * step, step)
+        
+        return (
+            f'{prefix}{value()}{suffix}'.encode()
+            for suffix in (f',q=0 {timestamp}' for timestamp in timestamps)
+            for prefix, value in sensors
+        )
+    
+    def _sensor_values(self,
+                       rng: random.Random,
+                       signals: Optional[Signals],
+                       sample_interval: float) -> Callable[[str, int], Callable[[], str]]:
+        """
+        :param rng: Генератор случайных чисел узла
+        :param signals: Модели значений датчиков
+        :param sample_interval: Интервал между значениями датчика (в секундах)
+        :return: Функция, создающая генератор значений датчика по типу датчика и его номеру среди датчиков
+            этого типа (с нуля)
+        """
+        uniform = dict(float=self._random_float, int=self._random_int, str=self._random_str, bool=self._random_bool)
+        
+        def _values(sensor_type: str, number: int) -> Callable[[], str]:
+            model = signals.model(sensor_type, number) if signals is not None else None
+            if model is None:
+                return partial(uniform[sensor_type], rng)
+            return model.sensor(rng, sample_interval)
+        
+        return _values
     
     def ping(self):
         """
         Проверка доступности InfluxDB
         """
         with self._timeit():
-            requests.get(self._ping_endpoint, headers=self._headers).raise_for_status()
+            self._session.get(self._ping_endpoint).raise_for_status()
+    
+    def server_info(self) -> dict:
+        """
+        :return: Версия и сборка InfluxDB из заголовков ответа на /ping
+        """
+        response = self._session.get(self._ping_endpoint)
+        response.raise_for_status()
+        return dict(
+            version=response.headers.get('X-Influxdb-Version'),
+            build=response.headers.get('X-Influxdb-Build')
+        )
+    
+    def shard_group_duration(self) -> Optional[float]:
+        """
+        :return: Длительность группы шардов (в секундах) политики хранения БД по умолчанию. None - не удалось
+            узнать (например, БД ещё не создана)
+        """
+        try:
+            response = self._session.get(self._query_endpoint, params=dict(
+                self._default_read_params, q=f'SHOW RETENTION POLICIES ON "{self._config["db"]}"'
+            ))
+            response.raise_for_status()
+            series = response.json()['results'][0]['series'][0]
+            for values in series['values']:
+                policy = dict(zip(series['columns'], values))
+                if policy.get('default'):
+                    return backfill.parse_duration(policy['shardGroupDuration'])
+        except (requests.RequestException, ValueError, KeyError, IndexError):
+            pass
+        return None
     
     def create_db(self):
         """
         Создание БД
         """
         with self._timeit():
-            requests.post(self._query_endpoint, params=self._create_db_params, headers=self._headers)
+            self._session.post(self._query_endpoint, params=self._create_db_params)
     
     def drop_db(self):
         """
         Удаление БД
         """
         with self._timeit():
-            requests.post(self._query_endpoint, params=self._drop_db_params, headers=self._headers)
+            self._session.post(self._query_endpoint, params=self._drop_db_params)
+    
+    def _node_batches(self,
+                      node_name: str,
+                      float_sensors: int,
+                      int_sensors: int,
+                      str_sensors: int,
+                      bool_sensors: int,
+                      duration: int,
+                      start_timestamp: int,
+                      seed: int = None,
+                      generator: str = 'python',
+                      schema: Schema = None,
+                      nodes_count: int = 1,
+                      corpus: Path = None,
+                      batch_size: int = None,
+                      max_batch_bytes: int = None,
+                      stream: bool = False,
+                      compression: str = None,
+                      compresslevel: int = 6,
+                      parallel_compression: bool = False,
+                      sample_interval: float = 1.0,
+                      signals: Signals = None) -> Iterable[Union[bytes, Iterator[bytes]]]:
+        """
+        Подготовка тел запросов на запись одного узла
+
+        Параметры совпадают с параметрами write, corpus - каталог с данными из PayloadCache.prepare
+        :return: Тела запросов. Тело запроса - либо байты, либо итератор по частям тела для передачи по частям
+            (chunked transfer encoding), либо сжатое тело. При stream=False все тела запросов сгенерированы
+            (и сжаты) заранее
+        """
+        if corpus is not None:
+            lines = PayloadCache.replay(corpus, node_name, start_timestamp)
+        else:
+            lines = self._node_lines(node_name, float_sensors, int_sensors, str_sensors, bool_sensors,
+                                     duration, start_timestamp, seed, generator, schema, nodes_count, sample_interval,
+                                     signals)
+        
+        if not stream:
+            batches = list(_split_batches(lines, batch_size, max_batch_bytes))
+        elif batch_size is None and max_batch_bytes is None:
+            batches = (_stream_body(lines),)
+        else:
+            batches = _split_batches(lines, batch_size, max_batch_bytes)
+        
+        if compression is not None:
+            batches = compress_batches(batches, compression, compresslevel, parallel_compression)
+        
+        return batches
+    
+    def _send_write(self,
+                    session: requests.Session,
+                    body: CountingBody,
+                    retry: RetryPolicy = None,
+                    limiter: AdaptiveLimiter = None) -> List[str]:
+        """
+        Отправка запроса на запись с повторами
+
+        :return: Классы ответов на каждую попытку (см. retry.OUTCOMES). Запрос выполнен успешно, если последний - ok
+        """
+        outcomes, _ = send_with_retry(
+            lambda: session.post(self._write_endpoint, params=self._write_params, data=body.data,
+                                 headers=body.headers, timeout=self._timeout),
+            retry, limiter, body.replayable
+        )
+        return outcomes
+    
+    def _threaded_write(self,
+                        node_names: List[str],
+                        node_batches: Callable[[str], Iterable[Union[bytes, Iterator[bytes]]]],
+                        start_action: Callable[[], None] = None,
+                        retry: RetryPolicy = None,
+                        adaptive_concurrency: bool = False) -> RunResult:
+        """
+        Одновременная запись потоком на каждый узел
+
+        :param node_names: Имена узлов
+        :param node_batches: Функция, возвращающая тела запросов узла
+        :param start_action: Функция, вызываемая в момент одновременного начала записи всеми узлами.
+            По умолчанию засекается время начала операции
+        :param retry: Правила повтора запросов, завершившихся перегрузкой или ошибкой. None - без повторов
+        :param adaptive_concurrency: Подстраивать ли количество одновременных запросов под перегрузку СУБД
+        :return: Объединённый результат запросов всех узлов (без длительности операции)
+
+        Исключение в одном из потоков (например, при генерации тела запроса по мере отправки) прерывает запись:
+        остальные потоки перестают отправлять запросы, а исключение вызывается повторно
+        """
+        start_writing = Barrier(len(node_names), action=start_action or self._set_start_time)
+        end_writing = Barrier(len(node_names), action=self._set_end_time)
+        
+        node_results = [RunResult(self._live) for _ in node_names]
+        limiter = AdaptiveLimiter(len(node_names)) if adaptive_concurrency else None
+        errors = []
+        
+        def _thread_func(node_name, node_result):
+            session = self._node_session()
+            try:
+                batches = node_batches(node_name)
+                
+                start_writing.wait()
+                for batch in batches:
+                    if errors:
+                        break
+                    body = CountingBody(batch)
+                    node_result.request_started()
+                    request_start = time.perf_counter()
+                    outcomes = self._send_write(session, body, retry, limiter)
+                    node_result.record_body(time.perf_counter() - request_start, body, outcomes[-1] != 'ok', outcomes)
+                end_writing.wait()
+            except BaseException as ex:
+                # Остальные потоки не должны бесконечно ожидать этот поток на барьере
+                errors.append(ex)
+                start_writing.abort()
+                end_writing.abort()
+            finally:
+                if session is not self._session:
+                    session.close()
+        
+        threads = [
+            Thread(target=_thread_func, args=(node_name, node_result), name=node_name)
+            for node_name, node_result in zip(node_names, node_results)
+        ]
+        
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        if errors:
+            raise next((ex for ex in errors if not isinstance(ex, BrokenBarrierError)), errors[0])
+        
+        result = RunResult()
+        for node_result in node_results:
+            result.merge(node_result)
+        if limiter is not None:
+            result.concurrency = limiter.as_dict()
+        return result
     
+    @_with_server_stats
     def write(self,
               nodes_count: int,
               float_sensors: int = 1,
@@ -126,7 +688,25 @@ class StressTester:
               str_sensors: int = 1,
               bool_sensors: int = 1,
               duration: int = 1,
-              start_date: datetime = None) -> float:
+              start_date: datetime = None,
+              batch_size: int = None,
+              max_batch_bytes: int = None,
+              stream: bool = False,
+              seed: int = None,
+              payload_cache: PayloadCache = None,
+              generator: str = 'python',
+              engine: str = 'threads',
+              connections: int = None,
+              workers: int = None,
+              compression: str = None,
+              compresslevel: int = 6,
+              parallel_compression: bool = False,
+              schema: Schema = None,
+              sample_interval: float = 1.0,
+              retry: RetryPolicy = None,
+              adaptive_concurrency: bool = False,
+              signals: Signals = None,
+              verify: Verification = None) -> RunResult:
         """
         Одновременная запись несколькими потоками
 
@@ -137,67 +717,787 @@ class StressTester:
         :param bool_sensors: Количество булевых датчиков на узле
         :param duration: На протяжении скольки секунд копились данные для записи каждым узлом
         :param start_date: Начиная с какой даты вести запись. По умолчанию - локальная дата запуска метода
-        :return: Время (в секундах), прошедшее с момента одновременного начала отправки данных каждым потоком
-            до момента получения ответа каждым из потоков
+        :param batch_size: Максимальное количество точек в одном запросе. По умолчанию - без ограничения
+        :param max_batch_bytes: Максимальный размер тела одного запроса в байтах. По умолчанию - без ограничения
+        :param stream: Генерировать данные по мере отправки, а не заранее
+        :param seed: Начальное значение генератора случайных чисел. По умолчанию - данные не воспроизводимы
+        :param payload_cache: Кэш заранее сгенерированных данных (см. PayloadCache)
+        :param generator: Способ генерации данных: python или numpy
+        :param engine: Способ одновременной записи: threads - поток на узел, asyncio - сопрограмма на узел,
+            processes - узлы распределяются между процессами
+        :param connections: Размер пула соединений для engine='asyncio'. По умолчанию - pool_size
+        :param workers: Количество процессов для engine='processes'. По умолчанию - количество ядер процессора
+        :param compression: Способ сжатия тел запросов: gzip или deflate. По умолчанию - без сжатия
+        :param compresslevel: Степень сжатия (1-9)
+        :param parallel_compression: При stream=True сжимать следующий пакет в фоновом потоке
+        :param schema: Схема данных (см. Schema). По умолчанию - измерение python_measurement с тегом thread
+        :param sample_interval: Интервал между значениями датчика (в секундах)
+        :param retry: Правила повтора запросов (см. RetryPolicy). По умолчанию запросы не повторяются
+        :param adaptive_concurrency: Подстраивать ли количество одновременных запросов под перегрузку СУБД
+        :param signals: Модели значений датчиков (см. Signals). По умолчанию - равномерно распределённые значения
+        :param verify: Параметры проверки записанных данных (см. Verification). По умолчанию данные не проверяются
+        :return: Результат записи. Длительность (duration) - время (в секундах), прошедшее с момента
+            одновременного начала отправки данных каждым потоком до момента получения ответа каждым из потоков
 
-        Примечание: Каждый поток подготавливает и держит свои данные для отправки в памяти. При генерации больших
-        объемов будет много времени затрачено на саму генерацию и много памяти будет отведено под хранение, пока
-        остальные потоки не подготовят свои данные
+        Примечание: Без stream каждый поток подготавливает и держит свои данные для отправки в памяти. При генерации
+        больших объемов будет много времени затрачено на саму генерацию и много памяти будет отведено под хранение,
+        пока остальные потоки не подготовят свои данные. При stream=True данные генерируются (или читаются
+        из payload_cache) по мере отправки и в памяти не накапливаются, а payload_cache исключает время генерации
+        из времени записи
+
+        Режимы записи, сжатие, повторы, модели значений и проверка записанных данных описаны с примерами
+        в docs/source/scenarios.rst
         """
+        if batch_size is not None and batch_size <= 0:
+            raise ValueError('Размер пакета должен быть положительным')
+        if max_batch_bytes is not None and max_batch_bytes <= 0:
+            raise ValueError('Размер пакета в байтах должен быть положительным')
+        if generator not in ('python', 'numpy'):
+            raise ValueError(f'Неизвестный способ генерации данных: {generator}')
+        if schema is not None and generator != 'python':
+            raise ValueError('Данные по схеме генерируются только способом python')
+        self._sampling(duration, sample_interval)
+        if engine not in ('threads', 'asyncio', 'processes'):
+            raise ValueError(f'Неизвестный способ одновременной записи: {engine}')
+        if compression not in (None, 'gzip', 'deflate'):
+            raise ValueError(f'Неизвестный способ сжатия: {compression}')
+        if adaptive_concurrency and engine == 'asyncio':
+            raise ValueError('Подстройка количества одновременных запросов не поддерживается при engine=asyncio')
+        if verify is not None and seed is None and schema is not None and (schema.density < 1 or schema.jitter):
+            raise ValueError('Для проверки данных по схеме с пропусками или разбросом меток времени необходим seed')
+        
+        self._connection_stats.reset()
+        
         if start_date is None:
             start_date = datetime.now()
         
-        start_writing = Barrier(nodes_count, action=self._set_start_time)
-        end_writing = Barrier(nodes_count, action=self._set_end_time)
+        start_timestamp = line_protocol.to_timestamp(start_date, self._precision)
+        
+        node_names = self.node_names(nodes_count)
+        
+        corpus = None
+        if payload_cache is not None:
+            corpus = payload_cache.prepare(self, node_names, float_sensors, int_sensors, str_sensors, bool_sensors,
+                                           duration, seed, generator, schema, sample_interval, signals,
+                                           nodes_count)
         
-        start_timestamp_ms = int(self._second_multiplier(start_date.timestamp()))
+        node_batches = partial(
+            self._node_batches,
+            float_sensors=float_sensors,
+            int_sensors=int_sensors,
+            str_sensors=str_sensors,
+            bool_sensors=bool_sensors,
+            duration=duration,
+            start_timestamp=start_timestamp,
+            seed=seed,
+            generator=generator,
+            schema=schema,
+            nodes_count=nodes_count,
+            corpus=corpus,
+            batch_size=batch_size,
+            max_batch_bytes=max_batch_bytes,
+            stream=stream,
+            compression=compression,
+            compresslevel=compresslevel,
+            parallel_compression=parallel_compression,
+            sample_interval=sample_interval,
+            signals=signals
+        )
         
-        def _thread_func():
-            dot_template = 'python_measurement,thread={} {{{{}}}}={{{{}}}},q=0 {{}}'.format(current_thread().name)
+        expected = None
+        if verify is not None:
+            def _sent_lines(node_name: str) -> Iterable[bytes]:
+                if corpus is not None:
+                    return PayloadCache.replay(corpus, node_name, start_timestamp)
+                return self._node_lines(node_name, float_sensors, int_sensors, str_sensors, bool_sensors, duration,
+                                        start_timestamp, seed, generator, schema, nodes_count, sample_interval,
+                                        signals)
             
-            payload = '\n'.join(
-                '\n'.join(
-                    chain(
-                        (time_template.format('float', self._random_float) for _ in range(float_sensors)),
-                        (time_template.format('int', self._random_int) for _ in range(int_sensors)),
-                        (time_template.format('str', self._random_str) for _ in range(str_sensors)),
-                        (time_template.format('bool', self._random_bool) for _ in range(bool_sensors)),
-                    )
-                )
-                for time_template in map(
-                    dot_template.format,
-                    map(
-                        start_timestamp_ms.__add__,
-                        map(
-                            self._second_multiplier,
-                            range(duration)
-                        )
-                    )
-                )
-            ).encode()
+            # Ожидаемые значения подсчитываются до записи, чтобы время до видимости не включало их подсчёт
+            expected = verification.ExpectedCounts(max(round(verify.window * self._precision_multiplier), 1))
+            for node_name in node_names:
+                expected.add(_sent_lines(node_name))
+            run_series = self._run_series(nodes_count, float_sensors, int_sensors, str_sensors, bool_sensors, schema)
+        
+        if engine == 'asyncio':
+            result = async_engine.run_write(self._write_endpoint, self._write_params, self._headers,
+                                            node_names, node_batches,
+                                            self._set_start_time, self._set_end_time,
+                                            connections or self._pool_size, self._keep_alive,
+                                            self._session_scope == 'shared', self._connection_stats, self._live,
+                                            self._timeout, retry)
+        elif engine == 'processes':
+            result = multiprocess.run_write(self, node_names, node_batches, workers or os.cpu_count(), retry,
+                                            adaptive_concurrency)
+        else:
+            result = self._threaded_write(node_names, node_batches, retry=retry,
+                                          adaptive_concurrency=adaptive_concurrency)
+        
+        result.duration = self.time_diff
+        
+        if verify is not None:
+            result.verification = self._verify_write(verify, expected, run_series, result.points)
+        
+        self._result = result
+        return result
+    
+    def _run_series(self,
+                    nodes_count: int,
+                    float_sensors: int,
+                    int_sensors: int,
+                    str_sensors: int,
+                    bool_sensors: int,
+                    schema: Schema = None) -> Set[verification.Series]:
+        """
+        :return: Серии, в которые записывают данные все узлы нагрузки (при распределённой нагрузке - узлы всех
+            агентов, а не только доставшиеся этому)
+        """
+        if schema is not None:
+            keys = [key for node_index in range(nodes_count)
+                    for key in schema.node_series(node_index, nodes_count, float_sensors, int_sensors, str_sensors,
+                                                  bool_sensors)]
+        elif float_sensors or int_sensors or str_sensors or bool_sensors:
+            keys = [line_protocol.series_key('python_measurement', dict(thread=node_name))
+                    for node_name in self.node_names(nodes_count, whole_run=True)]
+        else:
+            keys = []
+        return {verification.parse_series_key(key) for key in keys}
+    
+    def _verify_write(self,
+                      verify: Verification,
+                      expected: verification.ExpectedCounts,
+                      run_series: Set[verification.Series],
+                      acknowledged: int) -> VerificationResult:
+        """
+        Проверка записанных данных
+
+        Видимые значения подсчитываются запросами count(*) с группировкой по всем тегам и окнам
+        (см. verification.count_statements): statements_per_query запросов за одно обращение к /query, ответ
+        передаётся частями и разбирается по мере получения. Периоды, в которых видны не все значения,
+        подсчитываются повторно каждые poll_interval секунд, пока не истечёт timeout с момента окончания записи
+
+        :param verify: Параметры проверки
+        :param expected: Количество значений каждого поля каждой серии по окнам времени в отправленных данных
+        :param run_series: Серии всех узлов нагрузки. При распределённой нагрузке серии других агентов
+            не считаются неожиданными, а их значения не учитываются
+        :param acknowledged: Количество строк в успешно выполненных запросах на запись
+        :return: Результат проверки
+        """
+        write_end = self._end_time
+        window = expected.window
+        
+        result = VerificationResult()
+        result.lines = expected.lines
+        result.acknowledged = acknowledged
+        if not expected.counts:
+            return result
+        
+        statements = verification.count_statements(
+            expected.measurements, expected.start, expected.end, window,
+            round(verify.query_span * self._precision_multiplier), 1_000_000_000 // self._precision_multiplier
+        )
+        statement_starts = [low for low, _, _ in statements]
+        # Ожидаемое количество значений в каждом окне каждой ячейки (серия, поле) и окна, пока видимые не полностью,
+        # по номеру запроса, который их подсчитывает
+        windows = {}
+        incomplete: Dict[int, set] = {}
+        for cell, cell_windows in expected.counts.items():
+            for window_start, count in cell_windows.items():
+                windows[cell, window_start] = count
+                index = bisect.bisect_right(statement_starts, window_start) - 1
+                incomplete.setdefault(index, set()).add((cell, window_start))
+        result.expected = sum(windows.values())
+        result.windows = len(windows)
+        
+        visible = {}
+        unexpected = set()
+        
+        def _on_data(data: dict):
+            for cell, window_start, count in verification.visible_counts(data):
+                if cell in expected.counts:
+                    visible[cell, window_start] = count
+                elif cell[0] not in run_series:
+                    unexpected.add(cell[0])
+        
+        params = dict(self._default_read_params, chunked='true', chunk_size=verify.chunk_size)
+        started = time.perf_counter()
+        pending = sorted(incomplete)
+        while True:
+            result.polls += 1
+            for batch_start in range(0, len(pending), verify.statements_per_query):
+                batch = pending[batch_start:batch_start + verify.statements_per_query]
+                query = ';'.join(statements[index][2] for index in batch)
+                request_start = time.perf_counter()
+                try:
+                    with self._session.get(self._query_endpoint, params=dict(params, q=query), stream=True,
+                                           timeout=self._timeout) as response:
+                        rows, bytes_count, error, _ = queries.read_response(response, True, _on_data)
+                except requests.RequestException:
+                    rows, bytes_count, error = 0, 0, True
+                result.queries.record(time.perf_counter() - request_start, bytes_count=bytes_count, error=error,
+                                      rows=rows)
+                
+                seen = time.time() - write_end
+                for index in batch:
+                    complete = {key for key in incomplete[index] if visible.get(key, 0) >= windows[key]}
+                    for _ in complete:
+                        result.visibility.record(seen)
+                    incomplete[index] -= complete
             
-            start_writing.wait()
-            requests.post(self._write_endpoint, params=self._write_params, data=payload, headers=self._headers)
-            end_writing.wait()
+            if result.polls == 1:
+                result.first_pass = time.perf_counter() - started
+                result.first_visible = sum(min(visible.get(key, 0), count) for key, count in windows.items())
+            pending = [index for index in pending if incomplete[index]]
+            if not pending or time.time() + verify.poll_interval > write_end + verify.timeout:
+                break
+            time.sleep(verify.poll_interval)
         
-        nodes_count_digits = len(str(nodes_count))
-        name_string = f'{{:0>{nodes_count_digits}}}'
-        threads = [Thread(target=_thread_func, name=name_string.format(i + 1)) for i in range(nodes_count)]
+        result.queries.duration = time.perf_counter() - started
+        result.visible = sum(min(visible.get(key, 0), count) for key, count in windows.items())
+        result.extra = sum(max(count - windows.get(key, 0), 0) for key, count in visible.items())
+        result.incomplete_windows = sum(len(keys) for keys in incomplete.values())
+        result.unexpected_series = len(unexpected)
+        return result
+    
+    @_with_server_stats
+    def sustain(self,
+                nodes_count: int,
+                rate: float,
+                run_duration: float,
+                rate_unit: str = 'points',
+                batch_size: int = 1000,
+                float_sensors: int = 1,
+                int_sensors: int = 1,
+                str_sensors: int = 1,
+                bool_sensors: int = 1,
+                seed: int = None,
+                generator: str = 'python',
+                connections: int = None,
+                report_interval: float = 10,
+                tolerance: float = 0.05,
+                compression: str = None,
+                compresslevel: int = 6,
+                parallel_compression: bool = False,
+                schema: Schema = None,
+                sample_interval: float = 1.0,
+                retry: RetryPolicy = None,
+                adaptive_concurrency: bool = False,
+                signals: Signals = None) -> SustainedResult:
+        """
+        Длительная запись с заданной интенсивностью
+
+        :param nodes_count: Количество узлов, между которыми по кругу распределяются запросы
+        :param rate: Заданная интенсивность записи
+        :param run_duration: Время записи (в секундах)
+        :param rate_unit: Единица интенсивности: points (по умолчанию) - точек в секунду,
+            requests - запросов в секунду
+        :param batch_size: Количество точек в одном запросе. По умолчанию 1000
+        :param float_sensors: Количество вещественных датчиков на узле
+        :param int_sensors: Количество целочисленных датчиков на узле
+        :param str_sensors: Количество строковых датчиков на узле
+        :param bool_sensors: Количество булевых датчиков на узле
+        :param seed: Начальное значение генератора случайных чисел для воспроизводимых данных
+        :param generator: Способ генерации данных: python (по умолчанию) или numpy
+        :param connections: Максимальное количество одновременных запросов (отправляющих потоков).
+            По умолчанию - pool_size, заданный при создании объекта
+        :param report_interval: Длительность интервала (в секундах), за который показатели учитываются отдельно.
+            По умолчанию 10 секунд
+        :param tolerance: Допустимое относительное отклонение достигнутой интенсивности от заданной.
+            По умолчанию 5%
+        :param compression: Способ сжатия тел запросов: gzip или deflate. По умолчанию - без сжатия
+        :param compresslevel: Степень сжатия (1-9). По умолчанию 6
+        :param parallel_compression: Сжимать следующий пакет в фоновом потоке, пока отправляется текущий
+        :param schema: Схема данных (см. write). По умолчанию - измерение python_measurement с тегом thread
+        :param sample_interval: Интервал между значениями датчика (в секундах, см. write). По умолчанию 1
+        :param retry: Правила повтора запросов (см. write). По умолчанию запросы не повторяются
+        :param adaptive_concurrency: Подстраивать ли количество одновременных запросов под перегрузку СУБД
+            (см. write). Ограничение не превышает connections
+        :param signals: Модели значений датчиков (см. write). По умолчанию - равномерно распределённые значения
+        :return: Результат записи с показателями по интервалам. Длительность (duration) - время (в секундах)
+            с момента начала записи до получения ответа на последний запрос
+
+        В отличие от write, запросы отправляются не одновременно всеми узлами, а по расписанию (open-loop):
+        запрос с номером i планируется на момент i / интенсивность запросов от начала записи, независимо от того,
+        получены ли ответы на предыдущие. Время выполнения запроса отсчитывается от запланированного момента,
+        поэтому при перегрузке СУБД рост времени ответа не маскируется тем, что запросы отправляются реже
+        (поправка на coordinated omission).
+
+        Метки времени каждого узла начинаются с момента запуска и идут с шагом sample_interval, поэтому при
+        интенсивности выше nodes_count * (количество датчиков узла) / sample_interval точек в секунду данные
+        уходят в будущее.
+        Данные генерируются по мере отправки, в промежутках между запросами
+
+        Заданная интенсивность считается достигнутой, если скорость записи успешно выполненных запросов
+        отличается от неё не более чем на tolerance. Изменение времени ответа в ходе записи видно по показателям
+        интервалов (windows)
+        """
+        if rate <= 0:
+            raise ValueError('Интенсивность должна быть положительной')
+        if run_duration <= 0:
+            raise ValueError('Время записи должно быть положительным')
+        if batch_size <= 0:
+            raise ValueError('Размер пакета должен быть положительным')
+        if rate_unit not in ('points', 'requests'):
+            raise ValueError(f'Неизвестная единица интенсивности: {rate_unit}')
+        if compression not in (None, 'gzip', 'deflate'):
+            raise ValueError(f'Неизвестный способ сжатия: {compression}')
+        if generator not in ('python', 'numpy'):
+            raise ValueError(f'Неизвестный способ генерации данных: {generator}')
+        if schema is not None and generator != 'python':
+            raise ValueError('Данные по схеме генерируются только способом python')
+        self._sampling(run_duration, sample_interval)
+        
+        if rate_unit == 'points':
+            requests_rate = rate / batch_size
+        else:
+            requests_rate = rate
+        
+        self._connection_stats.reset()
+        
+        offsets = sustained.schedule([requests_rate], run_duration)
+        node_names = self.node_names(nodes_count)
+        node_batches = self._scheduled_node_batches(nodes_count, len(offsets), batch_size, float_sensors,
+                                                    int_sensors, str_sensors, bool_sensors, seed, generator,
+                                                    compression, compresslevel, parallel_compression, schema,
+                                                    sample_interval, signals)
+        
+        result = SustainedResult(requests_rate * batch_size, tolerance)
+        role = sustained.write_role(self, node_names, node_batches, offsets, connections or self._pool_size, result,
+                                    retry, adaptive_concurrency)
+        sustained.run_roles(self, [role], report_interval)
+        
+        self._result = result
+        return result
+    
+    def _scheduled_node_batches(self,
+                                nodes_count: int,
+                                requests_count: int,
+                                batch_size: int,
+                                float_sensors: int,
+                                int_sensors: int,
+                                str_sensors: int,
+                                bool_sensors: int,
+                                seed: int,
+                                generator: str,
+                                compression: str,
+                                compresslevel: int,
+                                parallel_compression: bool,
+                                schema: Optional[Schema],
+                                sample_interval: float,
+                                signals: Optional[Signals]) -> Callable[[str], Iterable[Union[bytes, Iterator[bytes]]]]:
+        """
+        Тела запросов узлов для записи по расписанию
+
+        Данные узла генерируются по мере отправки, метки времени начинаются с текущего момента. Данных каждого узла
+        хватает на requests_count запросов, распределённых между узлами по кругу
+        :return: Функция, возвращающая тела запросов узла
+        """
+        node_points = float_sensors + int_sensors + str_sensors + bool_sensors
+        if schema is not None:
+            node_devices = schema.devices_count // nodes_count
+            if not node_devices:
+                raise ValueError('Устройств схемы должно быть не меньше, чем узлов')
+            # Запас на случай, если датчики передали значения реже ожидаемого
+            node_points *= node_devices * schema.density * 0.9
+        node_requests = math.ceil(requests_count / len(self.node_names(nodes_count)))
+        
+        return partial(
+            self._node_batches,
+            float_sensors=float_sensors,
+            int_sensors=int_sensors,
+            str_sensors=str_sensors,
+            bool_sensors=bool_sensors,
+            duration=(math.ceil(node_requests * batch_size / node_points) + 1) * sample_interval,
+            start_timestamp=time.time_ns() * self._precision_multiplier // 1_000_000_000,
+            seed=seed,
+            generator=generator,
+            schema=schema,
+            nodes_count=nodes_count,
+            batch_size=batch_size,
+            stream=True,
+            compression=compression,
+            compresslevel=compresslevel,
+            parallel_compression=parallel_compression,
+            sample_interval=sample_interval,
+            signals=signals
+        )
+    
+    @_with_server_stats
+    def backfill(self,
+                 nodes_count: int,
+                 start_date: datetime,
+                 end_date: datetime = None,
+                 shard_duration: Union[str, float] = None,
+                 slice_duration: Union[str, float] = None,
+                 order: str = 'chronological',
+                 connections: int = None,
+                 batch_size: int = 5000,
+                 float_sensors: int = 1,
+                 int_sensors: int = 1,
+                 str_sensors: int = 1,
+                 bool_sensors: int = 1,
+                 seed: int = None,
+                 generator: str = 'python',
+                 compression: str = None,
+                 compresslevel: int = 6,
+                 schema: Schema = None,
+                 sample_interval: float = 1.0,
+                 retry: RetryPolicy = None,
+                 signals: Signals = None) -> BackfillResult:
+        """
+        Запись исторических данных за длительный период срезами, выровненными по группам шардов
+
+        :param nodes_count: Количество узлов
+        :param start_date: Начало периода
+        :param end_date: Конец периода (не включая его). По умолчанию - момент вызова
+        :param shard_duration: Длительность группы шардов: в секундах, либо строкой (7d, 1h, 168h0m0s).
+            По умолчанию - длительность группы шардов политики хранения БД по умолчанию, а если её не удалось
+            узнать - 7 дней
+        :param slice_duration: Длительность среза (в секундах или строкой). По умолчанию - длительность группы
+            шардов. Более короткие срезы позволяют записывать одну группу одновременно несколькими потоками
+        :param order: Порядок записи срезов: chronological (по умолчанию) - от ранних к поздним, reverse -
+            от поздних к ранним, interleaved - по кругу между группами шардов, так что одновременные запросы
+            попадают в разные группы
+        :param connections: Количество одновременно записывающих потоков. По умолчанию - pool_size, заданный
+            при создании объекта
+        :param batch_size: Количество точек в одном запросе. По умолчанию 5000
+        :param float_sensors: Количество вещественных датчиков на узле
+        :param int_sensors: Количество целочисленных датчиков на узле
+        :param str_sensors: Количество строковых датчиков на узле
+        :param bool_sensors: Количество булевых датчиков на узле
+        :param seed: Начальное значение генератора случайных чисел для воспроизводимых данных
+        :param generator: Способ генерации данных: python (по умолчанию) или numpy
+        :param compression: Способ сжатия тел запросов: gzip или deflate. По умолчанию - без сжатия
+        :param compresslevel: Степень сжатия (1-9). По умолчанию 6
+        :param schema: Схема данных (см. write). По умолчанию - измерение python_measurement с тегом thread
+        :param sample_interval: Интервал между значениями датчика (в секундах, см. write). По умолчанию 1
+        :param retry: Правила повтора запросов (см. write). По умолчанию запросы не повторяются
+        :param signals: Модели значений датчиков (см. write). Состояние моделей начинается заново в каждом срезе.
+            По умолчанию - равномерно распределённые значения
+        :return: Результат записи с показателями по группам шардов (shard_groups). Длительность (duration) -
+            время (в секундах) от одновременного начала записи всеми потоками до ответа на последний запрос
+
+        Период делится на срезы, не пересекающие границы групп шардов (см. backfill.shard_slices), а каждый
+        срез - на задачи записи данных одного узла за срез. Потоки выполняют задачи в порядке order. Данные
+        задачи генерируются по мере отправки, поэтому длительность периода не ограничена памятью. Метки времени
+        всех срезов лежат на общей сетке с шагом sample_interval от start_date, так что срезы стыкуются
+        без пропусков и повторов, а значения среза генерируются от пары (seed, начало среза). Исключение в одном
+        из потоков (например, при генерации данных задачи) прерывает запись: остальные потоки перестают брать
+        задачи, а исключение вызывается повторно.
+
+        В отличие от write, где каждый узел пишет свой период одним потоком, запись в InfluxDB 1.x по группам
+        шардов в разном порядке показывает, как СУБД справляется с данными вне порядка и с записью во много
+        групп одновременно, и сколько времени займёт восстановление истории
+        """
+        if batch_size is None or batch_size <= 0:
+            raise ValueError('Размер пакета должен быть положительным')
+        if compression not in (None, 'gzip', 'deflate'):
+            raise ValueError(f'Неизвестный способ сжатия: {compression}')
+        if generator not in ('python', 'numpy'):
+            raise ValueError(f'Неизвестный способ генерации данных: {generator}')
+        if schema is not None and generator != 'python':
+            raise ValueError('Данные по схеме генерируются только способом python')
+        _, step = self._sampling(sample_interval, sample_interval)
+        
+        if end_date is None:
+            end_date = datetime.now()
+        start = line_protocol.to_timestamp(start_date, self._precision)
+        end = line_protocol.to_timestamp(end_date, self._precision)
+        if end <= start:
+            raise ValueError('Конец периода должен быть позже начала')
+        
+        if shard_duration is None:
+            shard_duration = self.shard_group_duration() or backfill.DEFAULT_SHARD_DURATION
+        shard_seconds = backfill.parse_duration(shard_duration)
+        shard = round(shard_seconds * self._precision_multiplier)
+        slice_length = shard
+        if slice_duration is not None:
+            slice_length = round(backfill.parse_duration(slice_duration) * self._precision_multiplier)
+        if shard <= 0 or slice_length <= 0:
+            raise ValueError('Длительность группы шардов и среза должна быть положительной')
+        
+        self._connection_stats.reset()
+        
+        tasks = backfill.order_tasks(backfill.shard_slices(start, end, shard, slice_length),
+                                     self.node_names(nodes_count), order)
+        pending = iter(tasks)
+        lock = Lock()
+        # Время отправки первого запроса в группу шардов и получения ответа на последний (perf_counter)
+        spans: Dict[int, List[float]] = {}
+        
+        def _task_batches(slice_start: int, slice_end: int, node_name: str) -> Iterable[bytes]:
+            first = start + -(-(slice_start - start) // step) * step
+            steps = -(-(slice_end - first) // step)
+            if steps <= 0:
+                return ()
+            return self._node_batches(
+                node_name,
+                float_sensors=float_sensors,
+                int_sensors=int_sensors,
+                str_sensors=str_sensors,
+                bool_sensors=bool_sensors,
+                duration=steps * sample_interval,
+                start_timestamp=first,
+                seed=None if seed is None else zlib.crc32(f'{seed}:{slice_start}'.encode()),
+                generator=generator,
+                schema=schema,
+                nodes_count=nodes_count,
+                batch_size=batch_size,
+                stream=True,
+                compression=compression,
+                compresslevel=compresslevel,
+                sample_interval=sample_interval,
+                signals=signals
+            )
+        
+        workers = max(1, min(connections or self._pool_size, len(tasks)))
+        start_writing = Barrier(workers, action=self._set_start_time)
+        end_writing = Barrier(workers, action=self._set_end_time)
+        worker_results = [BackfillResult(shard_seconds, order, self._live) for _ in range(workers)]
+        errors = []
+        
+        def _thread_func(worker_result: BackfillResult):
+            session = self._node_session()
+            try:
+                start_writing.wait()
+                while not errors:
+                    with lock:
+                        task = next(pending, None)
+                    if task is None:
+                        break
+                    (group, slice_start, slice_end), node_name = task
+                    group //= self._precision_multiplier
+                    for batch in _task_batches(slice_start, slice_end, node_name):
+                        body = CountingBody(batch)
+                        worker_result.request_started()
+                        request_start = time.perf_counter()
+                        outcomes = self._send_write(session, body, retry)
+                        request_end = time.perf_counter()
+                        worker_result.record_group(group, request_end - request_start, body, outcomes[-1] != 'ok',
+                                                   outcomes)
+                        with lock:
+                            span = spans.setdefault(group, [request_start, request_end])
+                            span[0] = min(span[0], request_start)
+                            span[1] = max(span[1], request_end)
+                end_writing.wait()
+            except BaseException as ex:
+                # Остальные потоки не должны бесконечно ожидать этот поток на барьере
+                errors.append(ex)
+                start_writing.abort()
+                end_writing.abort()
+            finally:
+                if session is not self._session:
+                    session.close()
+        
+        threads = [Thread(target=_thread_func, args=(worker_result,)) for worker_result in worker_results]
         
         for thread in threads:
             thread.start()
         for thread in threads:
             thread.join()
         
-        return self.time_diff
+        if errors:
+            raise next((ex for ex in errors if not isinstance(ex, BrokenBarrierError)), errors[0])
+        
+        result = BackfillResult(shard_seconds, order)
+        for worker_result in worker_results:
+            result.merge(worker_result)
+        for group, (first_request, last_response) in spans.items():
+            result.shard_groups[group].duration = last_response - first_request
+        result.duration = self.time_diff
+        self._result = result
+        return result
     
+    @_with_server_stats
+    def mixed(self,
+              write_nodes: int,
+              read_nodes: int,
+              write_rates: Union[float, Sequence[float]],
+              read_rates: Union[float, Sequence[float]],
+              step_duration: float,
+              batch_size: int = 1000,
+              float_sensors: int = 1,
+              int_sensors: int = 1,
+              str_sensors: int = 1,
+              bool_sensors: int = 1,
+              seed: int = None,
+              generator: str = 'python',
+              compression: str = None,
+              compresslevel: int = 6,
+              aggregation: str = 'mean',
+              type: str = 'float',
+              start_date: Union[datetime, str] = 'now() - 5m',
+              end_date: Union[datetime, str] = 'now()',
+              time_interval: str = '5s',
+              tolerance: float = 0.05,
+              schema: Schema = None,
+              sample_interval: float = 1.0,
+              retry: RetryPolicy = None,
+              adaptive_concurrency: bool = False,
+              signals: Signals = None) -> MixedResult:
+        """
+        Одновременные запись и чтение пулами узлов с заданной интенсивностью
+
+        :param write_nodes: Количество пишущих узлов, то есть максимальное количество одновременных запросов записи
+        :param read_nodes: Количество читающих узлов, то есть максимальное количество одновременных запросов чтения
+        :param write_rates: Интенсивность записи (точек в секунду) на каждом шаге, либо одна на все шаги
+        :param read_rates: Интенсивность чтения (запросов в секунду) на каждом шаге, либо одна на все шаги
+        :param step_duration: Длительность шага (в секундах)
+        :param batch_size: Количество точек в одном запросе на запись. По умолчанию 1000
+        :param float_sensors: Количество вещественных датчиков на узле
+        :param int_sensors: Количество целочисленных датчиков на узле
+        :param str_sensors: Количество строковых датчиков на узле
+        :param bool_sensors: Количество булевых датчиков на узле
+        :param seed: Начальное значение генератора случайных чисел для воспроизводимых данных
+        :param generator: Способ генерации данных: python (по умолчанию) или numpy
+        :param compression: Способ сжатия тел запросов на запись: gzip или deflate. По умолчанию - без сжатия
+        :param compresslevel: Степень сжатия (1-9). По умолчанию 6
+        :param aggregation: Функция агрегации запроса на чтение. Остальные параметры запроса на чтение
+            (type, start_date, end_date, time_interval) совпадают с параметрами read
+        :param tolerance: Допустимое относительное отклонение достигнутой интенсивности записи от заданной
+        :param schema: Схема записываемых данных (см. write). Запрос на чтение от схемы не зависит
+        :param sample_interval: Интервал между значениями датчика (в секундах, см. write). По умолчанию 1
+        :param retry: Правила повтора запросов на запись (см. write). По умолчанию запросы не повторяются
+        :param adaptive_concurrency: Подстраивать ли количество одновременных запросов на запись под перегрузку
+            СУБД (см. write). Ограничение не превышает write_nodes
+        :param signals: Модели значений записываемых датчиков (см. write). По умолчанию - равномерно распределённые
+            значения
+        :return: Результаты записи и чтения с показателями по шагам
+
+        Запись и чтение выполняются по расписанию (см. sustain) с общим началом отсчёта. Задавая интенсивность
+        записи по шагам (например, [0, 10000, 50000, 100000]) при постоянной интенсивности чтения, можно оценить,
+        как растёт время ответа на запросы чтения (например, панелей Grafana) с ростом нагрузки на запись.
+        Соотношение нагрузок задаётся количеством узлов и интенсивностью каждой роли. Показатели по шагам
+        доступны через steps результата
+        """
+        if isinstance(write_rates, (int, float)):
+            write_rates = [write_rates]
+        if isinstance(read_rates, (int, float)):
+            read_rates = [read_rates]
+        steps = max(len(write_rates), len(read_rates))
+        if len(write_rates) == 1:
+            write_rates = list(write_rates) * steps
+        if len(read_rates) == 1:
+            read_rates = list(read_rates) * steps
+        if len(write_rates) != len(read_rates):
+            raise ValueError('Количество шагов интенсивности записи и чтения должно совпадать')
+        if step_duration <= 0:
+            raise ValueError('Длительность шага должна быть положительной')
+        if batch_size <= 0:
+            raise ValueError('Размер пакета должен быть положительным')
+        if compression not in (None, 'gzip', 'deflate'):
+            raise ValueError(f'Неизвестный способ сжатия: {compression}')
+        if generator not in ('python', 'numpy'):
+            raise ValueError(f'Неизвестный способ генерации данных: {generator}')
+        if schema is not None and generator != 'python':
+            raise ValueError('Данные по схеме генерируются только способом python')
+        self._sampling(step_duration, sample_interval)
+        
+        self._connection_stats.reset()
+        
+        write_offsets = sustained.schedule([rate / batch_size for rate in write_rates], step_duration)
+        read_offsets = sustained.schedule(read_rates, step_duration)
+        
+        node_names = self.node_names(write_nodes)
+        node_batches = self._scheduled_node_batches(write_nodes, len(write_offsets), batch_size, float_sensors,
+                                                    int_sensors, str_sensors, bool_sensors, seed, generator,
+                                                    compression, compresslevel, False, schema, sample_interval,
+                                                    signals)
+        params = self._read_params(aggregation, type, start_date, end_date, time_interval)
+        
+        result = MixedResult(SustainedResult(sum(write_rates) / steps, tolerance), SustainedResult())
+        roles = []
+        if write_offsets:
+            roles.append(sustained.write_role(self, node_names, node_batches, write_offsets, write_nodes, result.write,
+                                              retry, adaptive_concurrency))
+        if read_offsets:
+            roles.append(sustained.read_role(self, params, read_offsets, read_nodes, result.read))
+        if not roles:
+            raise ValueError('Интенсивность записи и чтения не может быть нулевой на всех шагах')
+        sustained.run_roles(self, roles, step_duration)
+        
+        self._result = result
+        return result
+    
+    def _threaded_read(self, nodes_count: int, params: dict) -> Tuple[RunResult, dict]:
+        """
+        Одновременное чтение потоком на каждый узел
+
+        :param nodes_count: Количество одновременно читающих узлов
+        :param params: Параметры запроса на чтение
+        :return: Объединённый результат запросов всех узлов (без длительности операции) и ответ,
+            полученный первым узлом
+        """
+        ready_to_read = Barrier(nodes_count, action=self._set_start_time)
+        finished_reading = Barrier(nodes_count, action=self._set_end_time)
+        
+        node_results = [RunResult(self._live) for _ in range(nodes_count)]
+        responses = [{} for _ in range(nodes_count)]
+        
+        def _thread_func(index, node_result):
+            session = self._node_session()
+            
+            ready_to_read.wait()
+            node_result.request_started()
+            request_start = time.perf_counter()
+            try:
+                response = session.get(self._query_endpoint, params=params, timeout=self._timeout)
+                rows, error, responses[index] = queries.parse_content(response.content)
+                node_result.record(time.perf_counter() - request_start, bytes_count=len(response.content),
+                                   error=error or not response.ok, rows=rows)
+            except requests.RequestException:
+                node_result.record(time.perf_counter() - request_start, error=True)
+            finished_reading.wait()
+            
+            if session is not self._session:
+                session.close()
+        
+        threads = [Thread(target=_thread_func, args=args) for args in enumerate(node_results)]
+        
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        result = RunResult()
+        for node_result in node_results:
+            result.merge(node_result)
+        return result, responses[0]
+    
+    def _read_params(self,
+                     aggregation: str,
+                     type: str,
+                     start_date: Union[datetime, str],
+                     end_date: Union[datetime, str],
+                     time_interval: str) -> dict:
+        """
+        Параметры запроса на чтение
+
+        Параметры совпадают с параметрами read
+        """
+        unit = line_protocol.API_PRECISIONS[self._precision]
+        if isinstance(start_date, datetime):
+            start_date = f'{line_protocol.to_timestamp(start_date, self._precision)}{unit}'
+        
+        if isinstance(end_date, datetime):
+            end_date = f'{line_protocol.to_timestamp(end_date, self._precision)}{unit}'
+        
+        query = f'SELECT {aggregation}("{type}") FROM "autogen"."python_measurement" ' \
+                f'WHERE {start_date} <= time AND time <= {end_date} ' \
+                f'GROUP BY time({time_interval})'
+        
+        return dict(self._default_read_params, q=query)
+    
+    @_with_server_stats
     def read(self,
              nodes_count: int,
              aggregation: str = 'mean',
              type: str = 'float',
              start_date: Union[datetime, str] = 'now() - 5m',
              end_date: Union[datetime, str] = 'now()',
-             time_interval: str = '5s') -> Tuple[float, dict]:
+             time_interval: str = '5s',
+             engine: str = 'threads',
+             connections: int = None) -> Tuple[RunResult, dict]:
         """
         Одновременное чтение несколькими потоками
 
@@ -212,41 +1512,132 @@ class StressTester:
             (см. https://docs.influxdata.com/influxdb/v1.8/query_language/explore-data/#time-syntax)
         :param time_interval: Временной интервал для группировки. Задаётся строкой по правилам синтаксиса Influxdb
             (см. https://docs.influxdata.com/influxdb/v1.8/query_language/spec/#durations)
-        :return: Время (в секундах), прошедшее с момента одновременного начала чтения данных каждым потоком
-            до момента получения ответа каждым из потоков и результат выборки
+        :param engine: Способ одновременного чтения: threads (по умолчанию) - поток на каждый узел,
+            asyncio - сопрограмма на каждый узел в одном потоке (требует установленного пакета aiohttp)
+        :param connections: Размер пула соединений для engine='asyncio'. 0 - без ограничения.
+            По умолчанию - pool_size, заданный при создании объекта
+        :return: Результат чтения и результат выборки (ответ первого узла). Длительность (duration) - время
+            (в секундах), прошедшее с момента одновременного начала чтения данных каждым потоком до момента
+            получения ответа каждым из потоков
 
         Примечание: выбираются записи с любыми тегами
         """
+        if engine not in ('threads', 'asyncio'):
+            raise ValueError(f'Неизвестный способ одновременного чтения: {engine}')
         
-        ready_to_read = Barrier(nodes_count, action=self._set_start_time)
-        finished_reading = Barrier(nodes_count, action=self._set_end_time)
+        self._connection_stats.reset()
         
-        if isinstance(start_date, datetime):
-            start_date = int(self._second_multiplier(start_date.timestamp()))
-            start_date = f'{start_date}ms'
+        params = self._read_params(aggregation, type, start_date, end_date, time_interval)
         
-        if isinstance(end_date, datetime):
-            end_date = int(self._second_multiplier(end_date.timestamp()))
-            end_date = f'{end_date}ms'
+        if engine == 'asyncio':
+            result, response = async_engine.run_read(self._query_endpoint, params, self._headers, nodes_count,
+                                                     self._set_start_time, self._set_end_time,
+                                                     connections or self._pool_size, self._keep_alive,
+                                                     self._session_scope == 'shared', self._connection_stats,
+                                                     self._live, self._timeout)
+        else:
+            result, response = self._threaded_read(nodes_count, params)
         
-        query = f'SELECT {aggregation}("{type}") FROM "autogen"."python_measurement" ' \
-                f'WHERE {start_date} <= time AND time <= {end_date} ' \
-                f'GROUP BY time({time_interval})'
+        result.duration = self.time_diff
+        self._result = result
         
-        params = dict(self._default_read_params, q=query)
+        return result, response
+    
+    @_with_server_stats
+    def read_mix(self,
+                 nodes_count: int,
+                 queries_per_node: int = 10,
+                 start_date: datetime = None,
+                 end_date: datetime = None,
+                 templates: Sequence[QueryTemplate] = DEFAULT_TEMPLATES,
+                 measurement: str = 'python_measurement',
+                 field: str = 'float',
+                 tag: str = 'thread',
+                 tag_values: Sequence[str] = None,
+                 chunked: bool = True,
+                 chunk_size: int = 10000,
+                 seed: int = None) -> ReadResult:
+        """
+        Одновременное чтение смесью запросов несколькими потоками
+
+        :param nodes_count: Количество одновременно читающих узлов (потоков)
+        :param queries_per_node: Количество запросов, последовательно выполняемых каждым узлом
+        :param start_date: Начало периода, в котором располагаются временные окна запросов.
+            По умолчанию - за час до end_date
+        :param end_date: Конец периода. По умолчанию - момент вызова
+        :param templates: Шаблоны запросов с весами и длительностью окон (см. QueryTemplate).
+            По умолчанию - сырые данные, агрегаты с разными интервалами группировки, последнее значение,
+            выборка по тегу и агрегаты по сериям
+        :param measurement: Измерение, подставляемое в шаблоны. По умолчанию - измерение данных write без схемы
+        :param field: Поле, подставляемое в шаблоны. По умолчанию float
+        :param tag: Тег, подставляемый в шаблоны. По умолчанию - тег узла записи thread
+        :param tag_values: Значения тега для выборки по тегу. По умолчанию - имена nodes_count узлов записи
+        :param chunked: Запрашивать ли ответ частями (chunked=true). Части разбираются по мере получения
+        :param chunk_size: Количество строк в одной части ответа
+        :param seed: Начальное значение генератора случайных чисел. Генератор узла инициализируется парой
+            (seed, номер узла), поэтому последовательность запросов узла воспроизводима
+        :return: Результат чтения с показателями по шаблонам (queries). Длительность (duration) - время
+            (в секундах) от одновременного начала чтения всеми узлами до выполнения всех запросов. Время запроса
+            включает получение всего ответа
+
+        Каждый узел выбирает шаблон запроса случайно с учётом весов и располагает временное окно случайно внутри
+        периода, поэтому узлы отправляют разные запросы и кэш запросов СУБД не приукрашивает результат.
+        Учитываются полученные строки (rows) и байты ответов
+        """
+        if queries_per_node <= 0:
+            raise ValueError('Количество запросов узла должно быть положительным')
+        if chunk_size <= 0:
+            raise ValueError('Размер части ответа должен быть положительным')
+        
+        if end_date is None:
+            end_date = datetime.now()
+        if start_date is None:
+            start_date = end_date - timedelta(hours=1)
+        mix = QueryMix(start_date, end_date, templates, measurement, field, tag,
+                       tag_values or self.node_names(nodes_count))
+        
+        self._connection_stats.reset()
         
-        def _thread_func():
+        read_params = dict(self._default_read_params)
+        if chunked:
+            read_params.update(chunked='true', chunk_size=chunk_size)
+        
+        ready_to_read = Barrier(nodes_count, action=self._set_start_time)
+        finished_reading = Barrier(nodes_count, action=self._set_end_time)
+        
+        node_results = [ReadResult(self._live) for _ in range(nodes_count)]
+        
+        def _thread_func(index, node_result):
+            session = self._node_session()
+            rng = random.Random() if seed is None else random.Random(f'{seed}:{index}')
+            
             ready_to_read.wait()
-            requests.get(self._query_endpoint, params=params, headers=self._headers)
+            for _ in range(queries_per_node):
+                name, query = mix.query(rng)
+                node_result.request_started()
+                request_start = time.perf_counter()
+                try:
+                    with session.get(self._query_endpoint, params=dict(read_params, q=query),
+                                     stream=chunked, timeout=self._timeout) as response:
+                        rows, bytes_count, error, _ = queries.read_response(response, chunked)
+                    node_result.record_query(name, time.perf_counter() - request_start, rows, bytes_count, error)
+                except requests.RequestException:
+                    node_result.record_query(name, time.perf_counter() - request_start, error=True)
             finished_reading.wait()
+            
+            if session is not self._session:
+                session.close()
         
-        threads = [Thread(target=_thread_func) for _ in range(nodes_count)]
+        threads = [Thread(target=_thread_func, args=args) for args in enumerate(node_results)]
         
         for thread in threads:
             thread.start()
         for thread in threads:
             thread.join()
         
-        result = requests.get(self._query_endpoint, params=params, headers=self._headers).json()
-        
-        return self.time_diff, result
+        result = ReadResult()
+        for node_result in node_results:
+            result.merge(node_result)
+        result.set_duration(self.time_diff)
+        self._result = result
+        return result
@@ -0,0 +1,251 @@
+import math
+import time
+from collections import defaultdict
+from itertools import count
+from threading import Barrier, BrokenBarrierError, Lock, Thread
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Union, Sequence
+
+import requests
+
+from .queries import parse_content
+from .results import CountingBody, RunResult, SustainedResult
+from .retry import AdaptiveLimiter, RetryPolicy
+
+
+def schedule(rates: Sequence[float], step_duration: float) -> List[float]:
+    """
+    Расписание запросов с кусочно-постоянной интенсивностью
+
+    :param rates: Интенсивность запросов (запросов в секунду) на каждом шаге. 0 - на шаге запросов нет
+    :param step_duration: Длительность шага (в секундах)
+    :return: Моменты отправки запросов (в секундах от начала нагрузки)
+    """
+    offsets = []
+    for step, rate in enumerate(rates):
+        if rate > 0:
+            step_start = step * step_duration
+            offsets.extend(step_start + i / rate for i in range(math.ceil(step_duration * rate)))
+    return offsets
+
+
+class Role:
+    """
+    Пул узлов, отправляющих запросы одного вида (например, запись или чтение) по расписанию
+
+    Запрос с номером i отправляется в момент offsets[i] от начала нагрузки вне зависимости от того, получены ли
+    ответы на предыдущие запросы. Запросы отправляются workers потоками: поток берёт очередной запрос,
+    дожидается запланированного момента и отправляет его. Если все потоки заняты, запрос уходит с опозданием,
+    которое входит во время его выполнения
+    """
+    
+    def __init__(self,
+                 offsets: List[float],
+                 prepare: Callable[[int], Any],
+                 perform: Callable[[requests.Session, Any], dict],
+                 workers: int,
+                 result: SustainedResult,
+                 limiter: AdaptiveLimiter = None):
+        """
+        :param offsets: Моменты отправки запросов (в секундах от начала нагрузки), по возрастанию
+        :param prepare: Функция, подготавливающая запрос по его номеру до наступления момента отправки.
+            Вызывается потоками по очереди
+        :param perform: Функция, выполняющая подготовленный запрос через сессию. Возвращает параметры
+            RunResult.record (кроме времени выполнения)
+        :param workers: Количество отправляющих потоков, то есть максимальное количество одновременных запросов
+        :param result: Результат, в котором учитываются запросы
+        :param limiter: Ограничение количества одновременных запросов, используемое perform. Его состояние
+            в конце нагрузки назначается атрибуту concurrency результата
+        """
+        self.offsets = offsets
+        self.prepare = prepare
+        self.perform = perform
+        self.workers = max(1, min(workers, len(offsets)))
+        self.result = result
+        self.limiter = limiter
+        self._slots = count()
+        self._lock = Lock()
+        self._exhausted = False
+    
+    def next_request(self):
+        """
+        :return: Номер и подготовленный запрос, либо None, если запросы закончились. Запросы заканчиваются
+            и тогда, когда prepare вызывает StopIteration (данные для запросов закончились раньше расписания)
+        """
+        with self._lock:
+            slot = next(self._slots)
+            if self._exhausted or slot >= len(self.offsets):
+                return None
+            try:
+                return slot, self.prepare(slot)
+            except StopIteration:
+                self._exhausted = True
+                return None
+
+
+def run_roles(tester, roles: List[Role], report_interval: float):
+    """
+    Одновременная нагрузка несколькими пулами узлов с общим началом отсчёта
+
+    Запросы учитываются в результате роли (время выполнения отсчитывается от запланированного момента отправки)
+    и в интервалах report_interval по моменту получения ответа, поэтому интервалы после окончания расписания
+    показывают, сколько времени СУБД разбирала накопившиеся запросы. Результату каждой роли назначаются
+    длительность (от начала нагрузки до получения ответа на последний запрос всех ролей), интервалы
+    и количество запросов, не отправленных из-за того, что данные для них закончились.
+    Исключение в одном из потоков прерывает нагрузку: остальные потоки перестают отправлять запросы,
+    а исключение вызывается повторно
+
+    :param tester: Объект StressTester, от имени которого выполняются запросы
+    :param roles: Пулы узлов
+    :param report_interval: Длительность интервала (в секундах), за который показатели учитываются отдельно
+    """
+    parties = sum(role.workers for role in roles)
+    
+    perf_start = None
+    perf_end = None
+    
+    def _start():
+        nonlocal perf_start
+        tester._set_start_time()
+        perf_start = time.perf_counter()
+    
+    def _end():
+        nonlocal perf_end
+        tester._set_end_time()
+        perf_end = time.perf_counter()
+    
+    start_barrier = Barrier(parties, action=_start)
+    end_barrier = Barrier(parties, action=_end)
+    errors = []
+    
+    def _thread_func(role: Role, result: SustainedResult, windows: Dict[int, RunResult]):
+        session = tester._node_session()
+        try:
+            start_barrier.wait()
+            while not errors:
+                request = role.next_request()
+                if request is None:
+                    break
+                slot, payload = request
+                
+                scheduled = perf_start + role.offsets[slot]
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                
+                result.request_started()
+                request_start = time.perf_counter()
+                record = role.perform(session, payload)
+                request_end = time.perf_counter()
+                
+                result.record_scheduled(request_end - scheduled, request_end - request_start,
+                                        max(request_start - scheduled, 0.0), **record)
+                windows[int((request_end - perf_start) / report_interval)].record(request_end - scheduled, **record)
+            end_barrier.wait()
+        except BaseException as ex:
+            # Остальные потоки не должны бесконечно ожидать этот поток на барьере
+            errors.append(ex)
+            start_barrier.abort()
+            end_barrier.abort()
+        finally:
+            if session is not tester._session:
+                session.close()
+    
+    workers = [
+        (role, SustainedResult(live=tester._live), defaultdict(RunResult))
+        for role in roles
+        for _ in range(role.workers)
+    ]
+    
+    threads = [Thread(target=_thread_func, args=worker) for worker in workers]
+    
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    if errors:
+        raise next((ex for ex in errors if not isinstance(ex, BrokenBarrierError)), errors[0])
+    
+    total_duration = perf_end - perf_start
+    windows_count = max(math.ceil(total_duration / report_interval), 1)
+    
+    for role in roles:
+        role_workers = [(result, windows) for worker_role, result, windows in workers if worker_role is role]
+        for result, _ in role_workers:
+            role.result.merge(result)
+        role.result.unsent = len(role.offsets) - sum(result.requests for result, _ in role_workers)
+        if role.limiter is not None:
+            role.result.concurrency = role.limiter.as_dict()
+        
+        role.result.windows = []
+        for index in range(windows_count):
+            window = RunResult()
+            for _, windows in role_workers:
+                if index in windows:
+                    window.merge(windows[index])
+            window.duration = min(report_interval, total_duration - index * report_interval)
+            role.result.windows.append(window)
+        
+        role.result.duration = tester.time_diff
+
+
+def write_role(tester,
+               node_names: List[str],
+               node_batches: Callable[[str], Iterable[Union[bytes, Iterator[bytes]]]],
+               offsets: List[float],
+               workers: int,
+               result: SustainedResult,
+               retry: RetryPolicy = None,
+               adaptive_concurrency: bool = False) -> Role:
+    """
+    Пул узлов, записывающих данные по расписанию
+
+    Время выполнения запроса включает повторы и паузы перед ними. Ограничение одновременных запросов
+    (adaptive_concurrency) действует внутри пула workers потоков: при перегрузке СУБД часть потоков ожидает,
+    запросы уходят с опозданием, и это опоздание учитывается во времени их выполнения
+
+    :param tester: Объект StressTester, от имени которого выполняется запись
+    :param node_names: Имена узлов. Запросы распределяются между узлами по кругу
+    :param node_batches: Функция, возвращающая тела запросов узла. Если тела какого-либо узла закончатся раньше
+        расписания, оставшиеся запросы пула не отправляются и учитываются в атрибуте unsent результата
+    :param offsets: Моменты отправки запросов (в секундах от начала нагрузки)
+    :param workers: Количество отправляющих потоков
+    :param result: Результат, в котором учитываются запросы
+    :param retry: Правила повтора запросов, завершившихся перегрузкой или ошибкой. None - без повторов
+    :param adaptive_concurrency: Подстраивать ли количество одновременных запросов под перегрузку СУБД
+    """
+    node_bodies = [iter(node_batches(node_name)) for node_name in node_names]
+    
+    def _prepare(slot: int) -> CountingBody:
+        return CountingBody(next(node_bodies[slot % len(node_bodies)]))
+    
+    role_workers = max(1, min(workers, len(offsets)))
+    limiter = AdaptiveLimiter(role_workers) if adaptive_concurrency else None
+    
+    def _perform(session: requests.Session, body: CountingBody) -> dict:
+        outcomes = tester._send_write(session, body, retry, limiter)
+        return dict(points=body.points, bytes_count=body.bytes, error=outcomes[-1] != 'ok', raw_bytes=body.raw_bytes,
+                    compress_time=body.compress_time, outcomes=outcomes)
+    
+    return Role(offsets, _prepare, _perform, role_workers, result, limiter)
+
+
+def read_role(tester, params: dict, offsets: List[float], workers: int, result: SustainedResult) -> Role:
+    """
+    Пул узлов, выполняющих запрос на чтение по расписанию
+
+    :param tester: Объект StressTester, от имени которого выполняется чтение
+    :param params: Параметры запроса на чтение
+    :param offsets: Моменты отправки запросов (в секундах от начала нагрузки)
+    :param workers: Количество отправляющих потоков
+    :param result: Результат, в котором учитываются запросы
+    """
+    def _perform(session: requests.Session, request_params: dict) -> dict:
+        try:
+            response = session.get(tester._query_endpoint, params=request_params, timeout=tester._timeout)
+        except requests.RequestException:
+            return dict(error=True)
+        rows, error, _ = parse_content(response.content)
+        return dict(bytes_count=len(response.content), error=error or not response.ok, rows=rows)
+    
+    return Role(offsets, lambda slot: params, _perform, workers, result)
@@ -0,0 +1,222 @@
+import zlib
+from itertools import chain
+from typing import Callable, Iterator, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .signals import Signals
+
+_BLOCK_STEPS = 1024
+
+_LETTERS = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+_tables = {}
+
+
+def _table(name: str) -> 'np.ndarray':
+    """
+    Таблицы для преобразования случайных чисел в текст без форматирования каждого значения по отдельности
+
+    :param name: Имя таблицы:
+        numbers - десятичная запись чисел [0;1000),
+        fractions - дробная часть из 5 знаков с точкой (.00000 - .99999),
+        digits - десятичная запись чисел [0;1000), дополненная нулями до 3 знаков,
+        letters - латинская буква для каждого значения байта
+    :return: Таблица
+    """
+    if name not in _tables:
+        if name == 'numbers':
+            _tables[name] = np.array([str(i).encode() for i in range(1000)])
+        elif name == 'fractions':
+            _tables[name] = np.array([f'.{i:05}'.encode() for i in range(100000)])
+        elif name == 'digits':
+            _tables[name] = np.array([f'{i:03}'.encode() for i in range(1000)])
+        elif name == 'letters':
+            letters = np.frombuffer(_LETTERS, dtype=np.uint8)
+            _tables[name] = letters[(np.arange(256) * len(letters)) >> 8]
+    return _tables[name]
+
+
+def _node_rng(node_name: str, seed: int = None):
+    """
+    :param node_name: Имя узла
+    :param seed: Начальное значение генератора. None - случайная инициализация
+    :return: Генератор случайных чисел NumPy узла
+    """
+    if seed is None:
+        return np.random.default_rng()
+    return np.random.default_rng([seed, zlib.crc32(node_name.encode())])
+
+
+def _float_values(rng, shape) -> 'np.ndarray':
+    """
+    :return: Вещественные числа из диапазона [0;1000) с 5 знаками после запятой
+    """
+    return np.char.add(
+        _table('numbers')[rng.integers(0, 1000, shape)],
+        _table('fractions')[rng.integers(0, 100000, shape)]
+    )
+
+
+def _int_values(rng, shape) -> 'np.ndarray':
+    """
+    :return: Целые числа из диапазона [0;1000) с суффиксом i
+    """
+    return np.char.add(_table('numbers'), b'i')[rng.integers(0, 1000, shape)]
+
+
+def _str_values(rng, shape) -> 'np.ndarray':
+    """
+    :return: Строки длиной 60 из латинских букв в кавычках
+    """
+    chars = np.full(shape + (62,), ord('"'), dtype=np.uint8)
+    random_bytes = np.frombuffer(rng.bytes(int(np.prod(shape)) * 60), dtype=np.uint8).reshape(shape + (60,))
+    chars[..., 1:-1] = _table('letters').take(random_bytes)
+    return chars.view('S62')[..., 0]
+
+
+def _bool_values(rng, shape) -> 'np.ndarray':
+    """
+    :return: Булевы значения в формате line protocol
+    """
+    return np.where(rng.random(shape) < 0.5, b't', b'f')
+
+
+def _column_values(rng,
+                   sensor_type: str,
+                   sensors: int,
+                   uniform: Callable,
+                   signals: Optional[Signals],
+                   sample_interval: float) -> Callable[[int], 'np.ndarray']:
+    """
+    :param rng: Генератор случайных чисел NumPy узла
+    :param sensor_type: Тип датчиков
+    :param sensors: Количество датчиков этого типа
+    :param uniform: Функция генерации равномерно распределённых значений (_float_values и т.п.)
+    :param signals: Модели значений датчиков
+    :param sample_interval: Интервал между значениями датчика (в секундах)
+    :return: Функция, возвращающая следующие steps значений всех датчиков типа (массив шаги x датчики)
+    """
+    type_models = signals.models.get(sensor_type) if signals is not None else None
+    if not type_models:
+        return lambda steps: uniform(rng, (steps, sensors))
+    
+    # Датчику с номером k назначена модель k % (количество моделей), датчики одной модели генерируются вместе
+    groups = [
+        (np.arange(index, sensors, len(type_models)), model)
+        for index, model in enumerate(type_models[:sensors])
+    ]
+    groups = [(indexes, model.columns(rng, len(indexes), sample_interval)) for indexes, model in groups]
+    
+    def _values(steps: int) -> 'np.ndarray':
+        parts = [(indexes, values(steps)) for indexes, values in groups]
+        itemsize = max(part.dtype.itemsize for _, part in parts)
+        result = np.empty((steps, sensors), dtype=f'S{itemsize}')
+        for indexes, part in parts:
+            result[:, indexes] = part
+        return result
+    
+    return _values
+
+
+def _timestamps(timestamps: 'np.ndarray') -> 'np.ndarray':
+    """
+    Старшие разряды меток времени в пределах блока почти не меняются, поэтому в текст преобразуются только
+    их уникальные значения, а младшие 6 разрядов берутся из таблицы
+
+    :param timestamps: Неотрицательные метки времени
+    :return: Десятичная запись меток времени
+    """
+    if timestamps.min() < 1000000:
+        return timestamps.astype(bytes)
+    high, low = np.divmod(timestamps, 1000000)
+    unique_high, inverse = np.unique(high, return_inverse=True)
+    digits = _table('digits')
+    return np.char.add(np.char.add(unique_high.astype(bytes)[inverse], digits[low // 1000]), digits[low % 1000])
+
+
+def vectorized_node_lines(node_name: str,
+                          float_sensors: int,
+                          int_sensors: int,
+                          str_sensors: int,
+                          bool_sensors: int,
+                          steps: int,
+                          start_timestamp: int,
+                          step: int,
+                          seed: int = None,
+                          signals: Signals = None,
+                          sample_interval: float = 1.0) -> Iterator[bytes]:
+    """
+    Генерация строк line protocol одного узла средствами NumPy
+
+    Значения и метки времени генерируются целыми столбцами, а строки собираются поэлементными операциями
+    над массивами байтовых строк. Данные генерируются блоками по _BLOCK_STEPS значений каждого датчика, поэтому
+    потребление памяти не зависит от steps. Формат строк совпадает с StressTester._node_lines, но внутри блока строки
+    сгруппированы по типу датчика, а последовательность случайных значений при одинаковом seed отличается
+
+    :param node_name: Имя узла (значение тега thread)
+    :param float_sensors: Количество вещественных датчиков на узле
+    :param int_sensors: Количество целочисленных датчиков на узле
+    :param str_sensors: Количество строковых датчиков на узле
+    :param bool_sensors: Количество булевых датчиков на узле
+    :param steps: Количество значений каждого датчика
+    :param start_timestamp: Метка времени первой точки
+    :param step: Интервал между значениями датчика в единицах точности меток времени
+    :param seed: Начальное значение генератора случайных чисел. None - данные не воспроизводимы
+    :param signals: Модели значений датчиков. По умолчанию - равномерно распределённые случайные значения
+    :param sample_interval: Интервал между значениями датчика (в секундах)
+    :return: Итератор по закодированным строкам (без завершающего перевода строки)
+    """
+    if np is None:
+        raise ImportError('Для векторизованной генерации данных необходим пакет numpy')
+    
+    return chain.from_iterable(
+        _node_blocks(node_name, float_sensors, int_sensors, str_sensors, bool_sensors, steps, start_timestamp,
+                     step, seed, signals, sample_interval)
+    )
+
+
+def _node_blocks(node_name: str,
+                 float_sensors: int,
+                 int_sensors: int,
+                 str_sensors: int,
+                 bool_sensors: int,
+                 steps: int,
+                 start_timestamp: int,
+                 step: int,
+                 seed: int = None,
+                 signals: Signals = None,
+                 sample_interval: float = 1.0) -> Iterator[List[bytes]]:
+    """
+    Генерация строк line protocol одного узла блоками по _BLOCK_STEPS значений каждого датчика
+
+    :return: Итератор по спискам закодированных строк, по одному списку на каждый тип датчика в блоке
+    """
+    rng = _node_rng(node_name, seed)
+    
+    columns = [
+        (f'python_measurement,thread={node_name} {field}='.encode(), sensors,
+         _column_values(rng, field, sensors, values, signals, sample_interval))
+        for field, sensors, values in (
+            ('float', float_sensors, _float_values),
+            ('int', int_sensors, _int_values),
+            ('str', str_sensors, _str_values),
+            ('bool', bool_sensors, _bool_values),
+        )
+        if sensors > 0
+    ]
+    
+    if not columns:
+        return
+    
+    for block_start in range(0, steps, _BLOCK_STEPS):
+        block = min(_BLOCK_STEPS, steps - block_start)
+        
+        offsets = np.arange(block_start, block_start + block, dtype=np.int64)
+        suffixes = np.char.add(b',q=0 ', _timestamps(start_timestamp + offsets * step))[:, None]
+        
+        for prefix, sensors, values in columns:
+            yield np.char.add(np.char.add(prefix, values(block)), suffixes).ravel().tolist()
@@ -0,0 +1,229 @@
+"""
+Проверка записанных данных
+
+Отправленные строки line protocol сводятся к количеству значений каждого поля каждой серии по окнам времени
+(ExpectedCounts). Видимые в СУБД значения подсчитываются запросами count(*) с группировкой по всем тегам и окнам
+времени (count_statements), несколько запросов передаются одним обращением к /query, а ответ читается частями.
+Сравнение показывает потерянные, лишние и ставшие видимыми с опозданием значения
+"""
+import re
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+# Строка line protocol: ключ серии, поля и метка времени
+_LINE = re.compile(rb'((?:[^ \\]|\\.)+) ((?:[^ "\\]|\\.|"(?:[^"\\]|\\.)*")+) (-?\d+)')
+# Ключ поля в разделе полей строки
+_FIELD_KEY = re.compile(rb'(?:^|,)((?:[^=,\\]|\\.)+)=(?:"(?:[^"\\]|\\.)*"|[^,]*)')
+_ESCAPED = re.compile(r'\\(.)')
+
+# Серия: измерение и отсортированные пары (тег, значение)
+Series = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class Verification:
+    """
+    Параметры проверки записанных данных (см. StressTester.write)
+    """
+    
+    def __init__(self,
+                 window: float = 60.0,
+                 timeout: float = 30.0,
+                 poll_interval: float = 1.0,
+                 query_span: float = 3600.0,
+                 statements_per_query: int = 10,
+                 chunk_size: int = 10000):
+        """
+        :param window: Длительность окна времени (в секундах), по которому сравниваются количества значений
+        :param timeout: Сколько секунд после окончания записи ждать, пока недостающие значения станут видимы
+        :param poll_interval: Пауза (в секундах) между повторными подсчётами недостающих значений
+        :param query_span: Период (в секундах), который охватывает один запрос count(*)
+        :param statements_per_query: Количество запросов count(*) в одном обращении к /query
+        :param chunk_size: Количество строк в одной части ответа (ответ передаётся частями)
+        """
+        if window <= 0 or query_span <= 0:
+            raise ValueError('Длительность окна и период запроса должны быть положительными')
+        if timeout < 0 or poll_interval <= 0:
+            raise ValueError('Время ожидания не может быть отрицательным, а пауза должна быть положительной')
+        if statements_per_query <= 0 or chunk_size <= 0:
+            raise ValueError('Количество запросов и размер части ответа должны быть положительными')
+        self.window = window
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.query_span = query_span
+        self.statements_per_query = statements_per_query
+        self.chunk_size = chunk_size
+    
+    def __repr__(self):
+        return (
+            f'Verification(window={self.window}, timeout={self.timeout}, poll_interval={self.poll_interval}, '
+            f'query_span={self.query_span}, statements_per_query={self.statements_per_query}, '
+            f'chunk_size={self.chunk_size})'
+        )
+
+
+def unescape(text: str) -> str:
+    """
+    :return: Текст без экранирования обратной косой чертой
+    """
+    return _ESCAPED.sub(r'\1', text)
+
+
+def _split_unescaped(text: str, separator: str) -> List[str]:
+    """
+    Разбиение по разделителю, не экранированному обратной косой чертой
+    """
+    parts = ['']
+    escaped = False
+    for char in text:
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == separator:
+            parts.append('')
+            continue
+        parts[-1] += char
+    return parts
+
+
+def parse_series_key(key: str) -> Series:
+    """
+    :param key: Ключ серии line protocol (измерение и теги с экранированием)
+    :return: Измерение и отсортированные пары (тег, значение) без экранирования
+    """
+    measurement, *tags = _split_unescaped(key, ',')
+    pairs = []
+    for tag in tags:
+        tag_key, tag_value = _split_unescaped(tag, '=')
+        pairs.append((unescape(tag_key), unescape(tag_value)))
+    return unescape(measurement), tuple(sorted(pairs))
+
+
+def split_line(line: bytes) -> Tuple[bytes, List[bytes], int]:
+    """
+    :param line: Строка line protocol с меткой времени (без завершающего перевода строки)
+    :return: Ключ серии, ключи полей (с экранированием) и метка времени
+    """
+    if b'\\' not in line:
+        # Без экранирования ключ серии заканчивается первым пробелом, а метка времени начинается после последнего
+        key, _, rest = line.partition(b' ')
+        fields, _, timestamp = rest.rpartition(b' ')
+        if key and fields and timestamp.isdigit():
+            if b'"' not in fields:
+                return key, [field.partition(b'=')[0] for field in fields.split(b',')], int(timestamp)
+            return key, _FIELD_KEY.findall(fields), int(timestamp)
+    match = _LINE.fullmatch(line)
+    if match is None:
+        raise ValueError(f'Неправильная строка line protocol: {line[:100]!r}')
+    key, fields, timestamp = match.groups()
+    return key, _FIELD_KEY.findall(fields), int(timestamp)
+
+
+class ExpectedCounts:
+    """
+    Количество значений каждого поля каждой серии по окнам времени в отправленных данных
+
+    Значения одного поля серии с одинаковой меткой времени InfluxDB хранит как одно (последнее записанное),
+    поэтому повторы в пределах одного вызова add (данных одного узла) учитываются один раз
+    """
+    
+    def __init__(self, window: int):
+        """
+        :param window: Длительность окна в единицах метки времени. Окна выровнены по началу эпохи, как GROUP BY time
+        """
+        self.window = window
+        self.counts: Dict[Tuple[Series, str], Dict[int, int]] = {}
+        self.lines = 0
+        self.start = None
+        self.end = None
+        self._series: Dict[bytes, Series] = {}
+        self._fields: Dict[bytes, str] = {}
+    
+    def add(self, lines: Iterable[bytes]):
+        """
+        :param lines: Отправленные строки line protocol (без завершающего перевода строки)
+        """
+        window = self.window
+        series_cache, fields_cache = self._series, self._fields
+        # Метки времени каждого окна каждой ячейки: строки не обязательно упорядочены по времени внутри ячейки
+        # (например, при генерации средствами NumPy строки блока сгруппированы по типу датчика)
+        timestamps: Dict[Tuple[Series, str, int], Set[int]] = {}
+        for line in lines:
+            key, field_keys, timestamp = split_line(line)
+            series = series_cache.get(key)
+            if series is None:
+                series = series_cache[key] = parse_series_key(key.decode())
+            window_start = timestamp - timestamp % window
+            for field_key in field_keys:
+                field = fields_cache.get(field_key)
+                if field is None:
+                    field = fields_cache[field_key] = unescape(field_key.decode())
+                cell_timestamps = timestamps.get((series, field, window_start))
+                if cell_timestamps is None:
+                    cell_timestamps = timestamps[series, field, window_start] = set()
+                cell_timestamps.add(timestamp)
+            self.lines += 1
+            if self.start is None or timestamp < self.start:
+                self.start = timestamp
+            if self.end is None or timestamp >= self.end:
+                self.end = timestamp + 1
+        
+        for (series, field, window_start), cell_timestamps in timestamps.items():
+            windows = self.counts.setdefault((series, field), {})
+            windows[window_start] = windows.get(window_start, 0) + len(cell_timestamps)
+    
+    @property
+    def measurements(self) -> List[str]:
+        return sorted({series[0] for series, _ in self.counts})
+    
+    @property
+    def values(self) -> int:
+        """
+        :return: Количество значений, которые должны быть видимы
+        """
+        return sum(sum(windows.values()) for windows in self.counts.values())
+
+
+def _quote(name: str) -> str:
+    return '"{}"'.format(name.replace('\\', '\\\\').replace('"', '\\"'))
+
+
+def count_statements(measurements: Sequence[str], start: int, end: int, window: int, span: int,
+                     nanoseconds: int) -> List[Tuple[int, int, str]]:
+    """
+    :param measurements: Измерения
+    :param start: Начало периода (в единицах метки времени)
+    :param end: Конец периода, не включая его (в единицах метки времени)
+    :param window: Длительность окна (в единицах метки времени)
+    :param span: Период одного запроса (в единицах метки времени). Округляется до целого количества окон
+    :param nanoseconds: Количество наносекунд в единице метки времени
+    :return: Запросы count(*) с группировкой по всем тегам и окнам: начало и конец периода запроса и текст
+    """
+    span = max(span // window, 1) * window
+    names = ','.join(_quote(measurement) for measurement in measurements)
+    statements = []
+    low = start - start % window
+    end = -(-end // window) * window
+    while low < end:
+        high = min(low + span, end)
+        statements.append((low, high, f'SELECT count(*) FROM {names} WHERE time >= {low * nanoseconds} '
+                                      f'AND time < {high * nanoseconds} GROUP BY *, time({window * nanoseconds}ns)'))
+        low = high
+    return statements
+
+
+def visible_counts(data: dict) -> Iterable[Tuple[Tuple[Series, str], int, int]]:
+    """
+    :param data: Ответ (или часть ответа) /query на запросы count_statements
+    :return: Ячейки (серия, поле), начало окна и количество видимых значений
+    """
+    for result in data.get('results', ()):
+        for series in result.get('series', ()):
+            key = (series['name'], tuple(sorted(
+                (tag, value) for tag, value in (series.get('tags') or {}).items() if value
+            )))
+            columns = series['columns']
+            for row in series.get('values', ()):
+                window_start = row[0]
+                for column, value in zip(columns[1:], row[1:]):
+                    if value and column.startswith('count_'):
+                        yield (key, column[len('count_'):]), window_start, value
@@ -0,0 +1,53 @@
+from datetime import datetime
+from threading import Thread
+
+import pytest
+
+from stress_tester import StressTester
+from stress_tester.mock_server import MockInfluxDB
+
+START = datetime(2020, 1, 1)
+END = datetime(2020, 1, 1, 6)
+
+
+@pytest.fixture
+def tester():
+    with MockInfluxDB() as server:
+        tester = StressTester(**server.config(), server_stats_interval=0)
+        tester.create_db()
+        yield tester
+
+
+@pytest.mark.parametrize('order', ['chronological', 'reverse', 'interleaved'])
+def test_backfill(tester, order):
+    result = tester.backfill(nodes_count=3, start_date=START, end_date=END, shard_duration='1h', order=order,
+                             connections=4)
+    # Четыре датчика на узле, значение каждую секунду
+    assert result.points == 3 * 4 * 6 * 3600
+    assert result.errors == 0
+    assert len(result.shard_groups) == 6
+    assert sum(group.points for group in result.shard_groups.values()) == result.points
+
+
+def test_backfill_data_error_raised(tester):
+    node_lines = tester._node_lines
+    
+    def _failing_lines(node_name, *args):
+        yield from node_lines(node_name, *args)
+        if node_name == '2':
+            raise RuntimeError('Ошибка генерации данных')
+    
+    tester._node_lines = _failing_lines
+    outcome = {}
+    
+    def _backfill():
+        try:
+            tester.backfill(nodes_count=3, start_date=START, end_date=END, shard_duration='1h', connections=4)
+        except BaseException as ex:
+            outcome['error'] = ex
+    
+    thread = Thread(target=_backfill, daemon=True)
+    thread.start()
+    thread.join(30)
+    assert not thread.is_alive(), 'Запись не завершилась'
+    assert isinstance(outcome.get('error'), RuntimeError)
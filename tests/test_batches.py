@@ -0,0 +1,68 @@
+import pytest
+
+from stress_tester.stress_tester import _split_batches, _stream_body
+
+
+def _lines(count: int, size: int = 9):
+    return [f'{i:0>{size}}'.encode() for i in range(count)]
+
+
+def test_no_limits_single_batch():
+    lines = _lines(10)
+    assert list(_split_batches(lines)) == [b'\n'.join(lines)]
+
+
+def test_empty():
+    assert list(_split_batches([], batch_size=10, max_batch_bytes=100)) == []
+
+
+@pytest.mark.parametrize('count, batch_size, sizes', [
+    (10, 3, [3, 3, 3, 1]),
+    (9, 3, [3, 3, 3]),
+    (2, 5, [2]),
+    (3, 1, [1, 1, 1]),
+])
+def test_batch_size(count, batch_size, sizes):
+    batches = list(_split_batches(_lines(count), batch_size=batch_size))
+    assert [len(batch.split(b'\n')) for batch in batches] == sizes
+
+
+def test_max_batch_bytes_filled_exactly():
+    # Две строки по 9 байт с переводом строки между ними - ровно 19 байт
+    assert [len(batch) for batch in _split_batches(_lines(4), max_batch_bytes=19)] == [19, 19]
+    assert [len(batch) for batch in _split_batches(_lines(4), max_batch_bytes=18)] == [9, 9, 9, 9]
+
+
+@pytest.mark.parametrize('max_batch_bytes', [10, 50, 99, 100, 1000])
+def test_max_batch_bytes_never_exceeded(max_batch_bytes):
+    lines = [b'x' * (i % 13 + 1) for i in range(200)]
+    batches = list(_split_batches(lines, max_batch_bytes=max_batch_bytes))
+    # Превысить ограничение может только пакет из одной строки, которая сама больше ограничения
+    assert all(len(batch) <= max_batch_bytes or b'\n' not in batch for batch in batches)
+    assert b'\n'.join(batches) == b'\n'.join(lines)
+
+
+def test_oversized_line_sent_alone():
+    lines = [b'a' * 5, b'b' * 50, b'c' * 5]
+    assert list(_split_batches(lines, max_batch_bytes=20)) == lines
+
+
+def test_both_limits():
+    lines = _lines(10)
+    batches = list(_split_batches(lines, batch_size=3, max_batch_bytes=19))
+    assert [len(batch.split(b'\n')) for batch in batches] == [2, 2, 2, 2, 2]
+    batches = list(_split_batches(lines, batch_size=2, max_batch_bytes=1000))
+    assert [len(batch.split(b'\n')) for batch in batches] == [2] * 5
+
+
+def test_lines_preserved_in_order():
+    lines = _lines(1000, size=7)
+    batches = list(_split_batches(iter(lines), batch_size=64, max_batch_bytes=300))
+    assert [line for batch in batches for line in batch.split(b'\n')] == lines
+
+
+def test_stream_body():
+    lines = _lines(10)
+    chunks = list(_stream_body(lines, chunk_points=4))
+    assert len(chunks) == 3
+    assert b''.join(chunks) == b''.join(line + b'\n' for line in lines)
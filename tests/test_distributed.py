@@ -0,0 +1,53 @@
+import pytest
+import requests
+
+from stress_tester import StressTester
+from stress_tester.distributed import Agent, Coordinator, split_nodes
+from stress_tester.mock_server import MockInfluxDB
+
+
+@pytest.fixture
+def mock():
+    with MockInfluxDB() as server:
+        yield server
+
+
+@pytest.fixture
+def coordinator(mock):
+    with Agent(0) as first, Agent(0) as second:
+        yield Coordinator([f'127.0.0.1:{first.port}', f'127.0.0.1:{second.port}'], mock.config(),
+                          start_delay=0.5, poll_interval=0.1, output=None)
+
+
+def test_split_nodes():
+    assert split_nodes(5, 2) == [(0, 2), (2, 5)]
+    assert split_nodes(1, 3) == [(0, 0), (0, 0), (0, 1)]
+
+
+def test_coordinated_write(mock, coordinator):
+    coordinator.create_db()
+    assert coordinator.time_diff >= 0
+    result = coordinator.run_step('write', dict(nodes_count=5, duration=30, batch_size=50, seed=1))
+    
+    tester = StressTester(**mock.config(), server_stats_interval=0)
+    single = tester.write(nodes_count=5, duration=30, batch_size=50, seed=1)
+    # Агенты вместе записывают те же узлы, что и один StressTester
+    assert (result.points, result.requests, result.errors) == (single.points, single.requests, 0)
+    assert result.duration == coordinator.time_diff > 0
+    assert coordinator.start_skew < 0.5
+
+
+def test_agent_rejects_other_actions(coordinator):
+    response = requests.post(coordinator.agents[0] + '/run', json=dict(action='drop_db', config={}))
+    assert response.status_code == 400
+
+
+def test_as_agent(mock):
+    tester = StressTester(**mock.config())
+    with tester.as_agent(node_share=(1, 3)):
+        assert tester.node_names(5) == ['2', '3']
+        assert tester.node_names(5, whole_run=True) == ['1', '2', '3', '4', '5']
+    assert tester.node_names(5) == ['1', '2', '3', '4', '5']
+    with pytest.raises(ValueError):
+        with tester.as_agent(node_share=(3, 3)):
+            pass
@@ -0,0 +1,113 @@
+import math
+
+import pytest
+
+from stress_tester import LatencyHistogram
+
+
+def _histogram(values, **kwargs) -> LatencyHistogram:
+    histogram = LatencyHistogram(**kwargs)
+    for value in values:
+        histogram.record(value)
+    return histogram
+
+
+def _exact_percentile(values, percent: float) -> float:
+    values = sorted(values)
+    return values[max(1, math.ceil(len(values) * percent / 100)) - 1]
+
+
+def test_empty():
+    histogram = LatencyHistogram()
+    assert histogram.count == 0
+    assert histogram.percentile(50) == 0.0
+    assert histogram.min == 0.0
+    assert histogram.mean == 0.0
+
+
+@pytest.mark.parametrize('percent', [1, 25, 50, 90, 99, 99.9, 100])
+def test_percentile_relative_error(percent):
+    # Значения от 1 мс до 10 сек. с логарифмически равномерным распределением
+    values = [0.001 * 10 ** (4 * i / 9999) for i in range(10000)]
+    histogram = _histogram(values)
+    exact = _exact_percentile(values, percent)
+    assert histogram.percentile(percent) == pytest.approx(exact, rel=0.01)
+
+
+def test_percentile_bounded_by_min_and_max():
+    histogram = _histogram([0.5] * 10)
+    assert histogram.percentile(0) == 0.5
+    assert histogram.percentile(50) == 0.5
+    assert histogram.percentile(100) == 0.5
+
+
+def test_statistics():
+    histogram = _histogram([0.1, 0.2, 0.3, 0.4])
+    assert histogram.count == 4
+    assert histogram.min == 0.1
+    assert histogram.max == 0.4
+    assert histogram.mean == pytest.approx(0.25)
+
+
+def test_values_below_min_value():
+    histogram = _histogram([0.0, 1e-9, 1e-3], min_value=1e-6)
+    assert histogram.count == 3
+    assert histogram.min == 0.0
+    assert histogram.percentile(50) == pytest.approx(1e-6, rel=0.02)
+
+
+def test_counts():
+    histogram = _histogram([0.5, 0.5, 0.501, 2.0])
+    counts = histogram.counts()
+    # Близкие значения попадают в один интервал
+    assert sorted(counts.values()) == [1, 3]
+    assert sum(counts.values()) == histogram.count
+    counts.clear()
+    assert histogram.counts()
+
+
+def test_merge_equals_single_histogram():
+    values = [0.001 * (i % 97 + 1) * (1 + i % 7) for i in range(5000)]
+    merged = _histogram(values[:1000])
+    for start in range(1000, 5000, 1000):
+        merged.merge(_histogram(values[start:start + 1000]))
+    single = _histogram(values)
+    
+    assert merged.count == single.count
+    assert merged.min == single.min
+    assert merged.max == single.max
+    assert merged.mean == pytest.approx(single.mean)
+    for percent in (50, 90, 99, 99.9):
+        assert merged.percentile(percent) == single.percentile(percent)
+
+
+def test_merge_empty():
+    histogram = _histogram([0.2, 0.4])
+    histogram.merge(LatencyHistogram())
+    assert histogram.count == 2
+    assert histogram.min == 0.2
+    
+    empty = LatencyHistogram()
+    empty.merge(_histogram([0.2, 0.4]))
+    assert empty.min == 0.2
+    assert empty.percentile(100) == 0.4
+
+
+def test_merge_requires_same_precision():
+    with pytest.raises(ValueError):
+        LatencyHistogram(precision=0.01).merge(LatencyHistogram(precision=0.001))
+
+
+def test_dict_round_trip():
+    histogram = _histogram([0.003, 0.05, 0.05, 1.2, 7.0])
+    restored = LatencyHistogram.from_dict(histogram.to_dict())
+    assert restored.count == histogram.count
+    assert restored.min == histogram.min
+    assert restored.max == histogram.max
+    for percent in (1, 50, 99, 100):
+        assert restored.percentile(percent) == histogram.percentile(percent)
+    
+    empty = LatencyHistogram.from_dict(LatencyHistogram().to_dict())
+    assert empty.count == 0
+    empty.record(0.1)
+    assert empty.min == 0.1
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from stress_tester import line_protocol
+from stress_tester.verification import parse_series_key, split_line
+
+
+@pytest.mark.parametrize('name, escaped', [
+    ('cpu', 'cpu'),
+    ('cpu load', 'cpu\\ load'),
+    ('cpu,load', 'cpu\\,load'),
+    ('cpu=load', 'cpu=load'),
+])
+def test_escape_measurement(name, escaped):
+    assert line_protocol.escape_measurement(name) == escaped
+
+
+@pytest.mark.parametrize('key, escaped', [
+    ('host', 'host'),
+    ('server 1', 'server\\ 1'),
+    ('a,b', 'a\\,b'),
+    ('a=b', 'a\\=b'),
+    ('a, =b', 'a\\,\\ \\=b'),
+    ('"quoted"', '"quoted"'),
+])
+def test_escape_key(key, escaped):
+    assert line_protocol.escape_key(key) == escaped
+
+
+@pytest.mark.parametrize('value, escaped', [
+    ('running', 'running'),
+    ('say "hi"', 'say \\"hi\\"'),
+    ('C:\\path', 'C:\\\\path'),
+    ('\\"', '\\\\\\"'),
+    ('a, b=c', 'a, b=c'),
+])
+def test_escape_string(value, escaped):
+    assert line_protocol.escape_string(value) == escaped
+
+
+def test_series_key_sorts_and_escapes_tags():
+    key = line_protocol.series_key('cpu load', dict(zone='eu west', host='a,b', rack=1))
+    assert key == 'cpu\\ load,host=a\\,b,rack=1,zone=eu\\ west'
+    assert line_protocol.series_key('cpu') == 'cpu'
+
+
+def test_escaped_line_round_trip():
+    # Строка, закодированная с экранированием, разбирается обратно в исходные имена
+    key = line_protocol.series_key('m 1,x', {'t=1': 'v, 2'})
+    field = line_protocol.escape_key('f 1')
+    value = line_protocol.escape_string('a "b", c=d')
+    line = f'{key} {field}="{value}",q=0i 1600000000000000000'.encode()
+    
+    series_key, field_keys, timestamp = split_line(line)
+    assert parse_series_key(series_key.decode()) == ('m 1,x', (('t=1', 'v, 2'),))
+    assert field_keys == [b'f\\ 1', b'q']
+    assert timestamp == 1600000000000000000
+
+
+@pytest.mark.parametrize('precision, expected', [
+    ('ns', 1600000000123456000),
+    ('us', 1600000000123456),
+    ('ms', 1600000000123),
+    ('s', 1600000000),
+])
+def test_to_timestamp(precision, expected):
+    moment = datetime(2020, 9, 13, 12, 26, 40, 123456, tzinfo=timezone.utc)
+    assert line_protocol.to_timestamp(moment, precision) == expected
+
+
+def test_to_timestamp_keeps_microseconds_far_from_epoch():
+    moment = datetime(2100, 1, 1, tzinfo=timezone.utc) + timedelta(microseconds=1)
+    assert line_protocol.to_timestamp(moment, 'ns') % 1_000_000_000 == 1000
+
+
+def test_to_timestamp_from_seconds():
+    assert line_protocol.to_timestamp(1.5, 'ms') == 1500
+
+
+def test_unknown_precision():
+    with pytest.raises(ValueError):
+        line_protocol.precision_multiplier('m')
@@ -0,0 +1,19 @@
+import pytest
+
+from stress_tester import StressTester
+from stress_tester.mock_server import MockInfluxDB
+
+
+@pytest.fixture
+def tester():
+    with MockInfluxDB() as server:
+        tester = StressTester(**server.config(), server_stats_interval=0)
+        tester.create_db()
+        yield tester
+
+
+def test_read(tester):
+    result, response = tester.read(nodes_count=3)
+    assert (result.requests, result.errors) == (3, 0)
+    assert result.rows > 0
+    assert response['results']
@@ -0,0 +1,60 @@
+import pytest
+
+from stress_tester import LatencyHistogram
+from stress_tester.regression import _incomplete_beta, mann_whitney, welch_t_test
+
+# Ожидаемые значения получены scipy.stats.ttest_ind(equal_var=False), scipy.stats.mannwhitneyu
+# (method='asymptotic', use_continuity=False) и scipy.special.betainc
+
+
+def _histogram(values) -> LatencyHistogram:
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    return histogram
+
+
+@pytest.mark.parametrize('a, b, x, expected', [
+    (2.5, 0.5, 0.3, 0.018927124071945658),
+    (3, 4, 0.6, 0.8208),
+    (1, 1, 0.25, 0.25),
+    (2, 3, 0.0, 0.0),
+    (2, 3, 1.0, 1.0),
+])
+def test_incomplete_beta(a, b, x, expected):
+    assert _incomplete_beta(a, b, x) == pytest.approx(expected, rel=1e-9, abs=1e-12)
+
+
+@pytest.mark.parametrize('baseline, candidate, p_value', [
+    ([10.1, 10.4, 9.8, 10.0, 10.3], [10.9, 11.2, 10.7, 11.5, 10.8, 11.0], 0.00033613112012799315),
+    ([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], [1.5, 2.5, 3.5, 4.5, 5.5, 6.5, 7.5, 8.5, 9.5, 10.5], 0.716231383316418),
+])
+def test_welch_t_test(baseline, candidate, p_value):
+    assert welch_t_test(baseline, candidate) == pytest.approx(p_value, rel=1e-6)
+    assert welch_t_test(candidate, baseline) == pytest.approx(p_value, rel=1e-6)
+
+
+def test_welch_t_test_degenerate():
+    assert welch_t_test([1.0], [1.0, 2.0]) is None
+    assert welch_t_test([5.0, 5.0], [5.0, 5.0, 5.0]) == 1.0
+    assert welch_t_test([5.0, 5.0], [6.0, 6.0]) == 0.0
+
+
+@pytest.mark.parametrize('baseline, candidate, z, p_value', [
+    ([1, 2, 3, 4, 5, 6, 7, 8], [4.5, 6.5, 8.5, 9, 10, 11, 12, 13, 14], 2.886751345948129, 0.003892417122778628),
+    # Одинаковые значения попадают в один интервал гистограммы и учитываются как связки
+    ([1, 1, 2, 2, 3, 3, 3], [2, 3, 3, 4, 4, 5], 2.0754980866510833, 0.037940396008338845),
+])
+def test_mann_whitney(baseline, candidate, z, p_value):
+    result_z, result_p = mann_whitney(_histogram(baseline), _histogram(candidate))
+    assert result_z == pytest.approx(z, rel=1e-9)
+    assert result_p == pytest.approx(p_value, rel=1e-9)
+    
+    reversed_z, reversed_p = mann_whitney(_histogram(candidate), _histogram(baseline))
+    assert reversed_z == pytest.approx(-z, rel=1e-9)
+    assert reversed_p == pytest.approx(p_value, rel=1e-9)
+
+
+def test_mann_whitney_degenerate():
+    assert mann_whitney(LatencyHistogram(), _histogram([1, 2])) == (0.0, 1.0)
+    assert mann_whitney(_histogram([0.5] * 5), _histogram([0.5] * 5)) == (0.0, 1.0)
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+import requests
+
+from stress_tester import AdaptiveLimiter, RetryPolicy
+from stress_tester.retry import classify, classify_exception, parse_retry_after
+
+
+@pytest.mark.parametrize('status, text, outcome', [
+    (200, '', 'ok'),
+    (204, '', 'ok'),
+    (429, '', 'overload'),
+    (503, '', 'overload'),
+    (408, '', 'timeout'),
+    (400, 'unable to parse', 'client'),
+    (404, 'database not found', 'client'),
+    (500, '{"error":"engine: hinted handoff queue full"}', 'overload'),
+    (500, '{"error":"cache-max-memory-size exceeded: (1073741824/1073741824)"}', 'overload'),
+    (500, '{"error":"Timeout"}', 'overload'),
+    (500, '{"error":"internal error"}', 'server'),
+    (502, '', 'server'),
+])
+def test_classify(status, text, outcome):
+    assert classify(status, text) == outcome
+
+
+def test_classify_exception():
+    assert classify_exception(requests.ReadTimeout()) == 'timeout'
+    assert classify_exception(requests.ConnectTimeout()) == 'timeout'
+    assert classify_exception(requests.ConnectionError()) == 'connection'
+
+
+@pytest.mark.parametrize('value, seconds', [
+    (None, None),
+    ('', None),
+    ('5', 5.0),
+    ('0.25', 0.25),
+    ('-3', 0.0),
+    ('soon', None),
+])
+def test_parse_retry_after_seconds(value, seconds):
+    assert parse_retry_after(value) == seconds
+
+
+def test_parse_retry_after_date():
+    value = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert parse_retry_after(value) == pytest.approx(30, abs=2)
+    past = format_datetime(datetime.now(timezone.utc) - timedelta(seconds=30), usegmt=True)
+    assert parse_retry_after(past) == 0.0
+
+
+@pytest.mark.parametrize('attempt, cap', [(0, 0.1), (1, 0.2), (3, 0.8), (10, 5.0)])
+def test_delay_full_jitter_bounds(attempt, cap):
+    policy = RetryPolicy(backoff=0.1, max_backoff=5.0, seed=1)
+    delays = [policy.delay(attempt) for _ in range(2000)]
+    assert all(0 <= delay <= cap for delay in delays)
+    # Равномерное распределение на [0; cap]: среднее около cap / 2
+    assert sum(delays) / len(delays) == pytest.approx(cap / 2, rel=0.1)
+
+
+def test_delay_reproducible_with_seed():
+    first = RetryPolicy(seed=7)
+    second = RetryPolicy(seed=7)
+    assert [first.delay(i) for i in range(5)] == [second.delay(i) for i in range(5)]
+
+
+def test_delay_respects_retry_after():
+    assert RetryPolicy(backoff=0.1, seed=1).delay(0, retry_after=3.0) == 3.0
+    assert RetryPolicy(backoff=0.1, seed=1, respect_retry_after=False).delay(0, retry_after=3.0) <= 0.1
+
+
+def test_should_retry():
+    policy = RetryPolicy(retries=2, retry_on=('overload',))
+    assert policy.should_retry('overload', 0)
+    assert policy.should_retry('overload', 1)
+    assert not policy.should_retry('overload', 2)
+    assert not policy.should_retry('server', 0)
+    assert not policy.should_retry('client', 0)
+
+
+def test_invalid_policy():
+    with pytest.raises(ValueError):
+        RetryPolicy(retries=-1)
+    with pytest.raises(ValueError):
+        RetryPolicy(retry_on=('overloaded',))
+
+
+def test_adaptive_limiter():
+    limiter = AdaptiveLimiter(8, min_limit=2, cooldown=0)
+    limiter.acquire()
+    limiter.release('overload')
+    assert limiter.limit == 4
+    limiter.acquire()
+    limiter.release('timeout')
+    limiter.acquire()
+    limiter.release('overload')
+    assert limiter.limit == 2
+    assert limiter.lowest == 2
+    assert limiter.decreases == 3
+    
+    # Аддитивное увеличение: около единицы за limit успешных ответов
+    for _ in range(2):
+        limiter.acquire()
+        limiter.release('ok')
+    assert int(limiter.limit) == 2
+    for _ in range(2):
+        limiter.acquire()
+        limiter.release('ok')
+    assert int(limiter.limit) == 3
+    for _ in range(100):
+        limiter.acquire()
+        limiter.release('ok')
+    assert limiter.limit == 8
+    assert limiter.as_dict() == dict(limit=8, lowest=2, decreases=3)
+
+
+def test_adaptive_limiter_cooldown():
+    limiter = AdaptiveLimiter(8, cooldown=60)
+    for _ in range(5):
+        limiter.acquire()
+        limiter.release('overload')
+    assert limiter.limit == 4
+    assert limiter.decreases == 1
@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from stress_tester import Signals
+from stress_tester.signals import RandomWalk, Signal
+
+np = pytest.importorskip('numpy')
+
+
+def test_incomplete_signal_not_instantiated():
+    class OnlySensor(Signal):
+        def sensor(self, rng, interval):
+            return lambda: '1'
+    
+    with pytest.raises(TypeError):
+        OnlySensor()
+
+
+@pytest.mark.parametrize('sensor_type', ['float', 'int', 'str', 'bool'])
+def test_realistic_sensor_reproducible(sensor_type):
+    model = Signals.realistic().model(sensor_type, 0)
+    first = model.sensor(random.Random(1), 1.0)
+    second = model.sensor(random.Random(1), 1.0)
+    assert [first() for _ in range(100)] == [second() for _ in range(100)]
+
+
+@pytest.mark.parametrize('sensor_type', ['float', 'int', 'str', 'bool'])
+def test_realistic_columns_reproducible(sensor_type):
+    model = Signals.realistic().model(sensor_type, 0)
+    first = model.columns(np.random.default_rng(1), 3, 1.0)
+    second = model.columns(np.random.default_rng(1), 3, 1.0)
+    values = first(50)
+    assert values.shape == (50, 3)
+    assert (values == second(50)).all()
+
+
+def test_random_walk_within_bounds():
+    model = RandomWalk(low=0, high=10, step=5)
+    sensor = model.sensor(random.Random(1), 1.0)
+    assert all(0 <= float(sensor()) <= 10 for _ in range(1000))
+    columns = model.columns(np.random.default_rng(1), 4, 1.0)
+    assert ((0 <= columns(1000).astype(float)) & (columns(1000).astype(float) <= 10)).all()
+
+
+def test_model_type_checked():
+    with pytest.raises(ValueError):
+        Signals(dict(int=RandomWalk()))
+    assert Signals(dict(int=RandomWalk(integer=True))).model('int', 3).integer
@@ -0,0 +1,142 @@
+from itertools import islice
+from threading import Thread
+
+import pytest
+
+from stress_tester import StressTester, SustainedResult
+from stress_tester.mock_server import MockInfluxDB
+from stress_tester.sustained import Role, run_roles, schedule, write_role
+
+
+def _finished(func, timeout: float = 30):
+    # Зависшая нагрузка завершает тест ошибкой, а не останавливает весь запуск
+    outcome = {}
+    
+    def _target():
+        try:
+            outcome['result'] = func()
+        except BaseException as ex:
+            outcome['error'] = ex
+    
+    thread = Thread(target=_target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), 'Нагрузка не завершилась'
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
+
+
+@pytest.mark.parametrize('rates, step_duration, offsets', [
+    ([2, 0, 4], 1.0, [0.0, 0.5, 2.0, 2.25, 2.5, 2.75]),
+    ([3], 0.5, [0.0, 1 / 3]),
+    ([0, 0], 10.0, []),
+])
+def test_schedule(rates, step_duration, offsets):
+    assert schedule(rates, step_duration) == pytest.approx(offsets)
+
+
+def test_role_workers_limited_by_requests():
+    role = Role([0.0, 0.1], lambda slot: slot, lambda session, payload: {}, 10, SustainedResult())
+    assert role.workers == 2
+
+
+def test_role_requests_end_when_prepare_exhausted():
+    payloads = iter('ab')
+    role = Role([0.0] * 5, lambda slot: next(payloads), lambda session, payload: {}, 1, SustainedResult())
+    assert role.next_request() == (0, 'a')
+    assert role.next_request() == (1, 'b')
+    assert role.next_request() is None
+    assert role.next_request() is None
+
+
+def test_target_reached():
+    result = SustainedResult(target_rate=100, tolerance=0.1)
+    result.points, result.duration = 95, 1.0
+    assert result.target_reached
+    result.points = 85
+    assert not result.target_reached
+
+
+@pytest.fixture
+def mock():
+    with MockInfluxDB() as server:
+        yield server
+
+
+@pytest.fixture
+def slow_mock():
+    with MockInfluxDB(latency=0.1) as server:
+        yield server
+
+
+def _tester(mock: MockInfluxDB) -> StressTester:
+    tester = StressTester(**mock.config(), server_stats_interval=0)
+    tester.create_db()
+    return tester
+
+
+def test_sustain(mock):
+    result = _finished(lambda: _tester(mock).sustain(nodes_count=2, rate=20, run_duration=1, rate_unit='requests',
+                                                     batch_size=10, report_interval=0.5))
+    assert (result.requests, result.errors, result.points, result.unsent) == (20, 0, 200, 0)
+    assert mock.stats['writes'] == 20
+    assert result.target_rate == 200
+    assert result.target_reached
+    # Запросы распределены по интервалам по моменту получения ответа
+    assert len(result.windows) >= 2
+    assert sum(window.requests for window in result.windows) == 20
+
+
+def test_sustain_coordinated_omission(slow_mock):
+    # Один поток отвечает за 0.1 с, а запросы запланированы каждые 0.05 с: опоздание копится от запроса к запросу
+    result = _finished(lambda: _tester(slow_mock).sustain(nodes_count=1, rate=20, run_duration=0.5,
+                                                          rate_unit='requests', batch_size=10, connections=1))
+    assert result.requests == 10
+    assert result.service_latency.max < 0.3
+    assert result.send_lag.max > 0.3
+    # Время выполнения отсчитывается от запланированного момента и включает опоздание отправки
+    assert result.latency.max >= result.send_lag.max + 0.1 - 0.01
+    assert not result.target_reached
+
+
+def test_sustain_bodies_exhausted(mock, monkeypatch):
+    # Данных каждого узла хватает только на два запроса из десяти запланированных
+    scheduled_node_batches = StressTester._scheduled_node_batches
+    
+    def _short_node_batches(tester, *args):
+        node_batches = scheduled_node_batches(tester, *args)
+        return lambda node_name: islice(node_batches(node_name), 2)
+    
+    monkeypatch.setattr(StressTester, '_scheduled_node_batches', _short_node_batches)
+    result = _finished(lambda: _tester(mock).sustain(nodes_count=2, rate=20, run_duration=0.5, rate_unit='requests',
+                                                     batch_size=10, connections=3))
+    assert (result.requests, result.errors, result.unsent) == (4, 0, 6)
+    assert not result.target_reached
+    assert SustainedResult.from_dict(result.to_dict()).unsent == 6
+
+
+def _failing_body():
+    yield b'm f=1 1\n'
+    raise RuntimeError('Ошибка генерации данных')
+
+
+def test_sustain_body_error_raised(mock):
+    tester = _tester(mock)
+    role = write_role(tester, ['a', 'b', 'c'], lambda node_name: (_failing_body() for _ in range(3)), [0.0] * 9, 3,
+                      SustainedResult())
+    with pytest.raises(RuntimeError):
+        _finished(lambda: run_roles(tester, [role], 1.0))
+
+
+def test_perform_error_raised(mock):
+    tester = _tester(mock)
+    
+    def _perform(session, payload):
+        if payload == 3:
+            raise ValueError(payload)
+        return {}
+    
+    role = Role([0.01 * i for i in range(20)], lambda slot: slot, _perform, 4, SustainedResult())
+    with pytest.raises(ValueError):
+        _finished(lambda: run_roles(tester, [role], 1.0))
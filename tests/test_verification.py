@@ -0,0 +1,149 @@
+from datetime import datetime
+
+import pytest
+
+from stress_tester import RunResult, Schema, StressTester, Verification, VerificationResult
+from stress_tester.mock_server import MockInfluxDB
+from stress_tester.verification import ExpectedCounts, count_statements, visible_counts
+
+
+def test_expected_counts_deduplicates_like_influxdb():
+    counts = ExpectedCounts(window=10)
+    counts.add([
+        b'm,t=a f=1,g=2 1',
+        b'm,t=a f=3 1',
+        b'm,t=a f=4 12',
+        b'm,t=b f=5 1',
+        b'm,t=a f=6 2',
+    ])
+    series_a = ('m', (('t', 'a'),))
+    assert counts.counts[series_a, 'f'] == {0: 2, 10: 1}
+    assert counts.counts[series_a, 'g'] == {0: 1}
+    assert counts.counts[('m', (('t', 'b'),)), 'f'] == {0: 1}
+    assert counts.lines == 5
+    assert counts.values == 5
+    assert (counts.start, counts.end) == (1, 13)
+    assert counts.measurements == ['m']
+
+
+def test_count_statements_cover_period_in_whole_windows():
+    statements = count_statements(['m', 'a"b'], start=5, end=95, window=10, span=35, nanoseconds=1000)
+    assert [(low, high) for low, high, _ in statements] == [(0, 30), (30, 60), (60, 90), (90, 100)]
+    assert statements[0][2] == ('SELECT count(*) FROM "m","a\\"b" WHERE time >= 0 AND time < 30000 '
+                                'GROUP BY *, time(10000ns)')
+
+
+def test_visible_counts():
+    data = dict(results=[dict(statement_id=0, series=[dict(
+        name='m', tags=dict(t='a', empty=''), columns=['time', 'count_f', 'count_g'],
+        values=[[0, 2, None], [10, 1, 0]]
+    )])])
+    series = ('m', (('t', 'a'),))
+    assert list(visible_counts(data)) == [((series, 'f'), 0, 2), ((series, 'f'), 10, 1)]
+
+
+def test_invalid_verification():
+    with pytest.raises(ValueError):
+        Verification(window=0)
+    with pytest.raises(ValueError):
+        Verification(poll_interval=0)
+
+
+def _verification(**counters) -> VerificationResult:
+    result = VerificationResult()
+    for name, value in counters.items():
+        setattr(result, name, value)
+    return result
+
+
+def test_verification_result_merge():
+    first = _verification(expected=100, visible=90, first_visible=80, lines=50, acknowledged=45, windows=4,
+                          incomplete_windows=1, unexpected_series=2, polls=3, first_pass=0.5)
+    first.visibility.record(0.1)
+    second = _verification(expected=60, visible=60, first_visible=60, extra=5, lines=30, acknowledged=30,
+                           windows=2, unexpected_series=2, polls=1, first_pass=0.8)
+    second.visibility.record(0.3)
+    
+    first.merge(second)
+    assert (first.expected, first.visible, first.extra, first.lines, first.windows) == (160, 150, 5, 80, 6)
+    assert (first.lost, first.late, first.rejected) == (10, 10, 5)
+    # Узлы проверяются одновременно: количество подсчётов и время первого подсчёта - наибольшие
+    assert (first.polls, first.first_pass) == (3, 0.8)
+    # Неожиданные серии каждый агент ищет среди серий всей нагрузки, поэтому они не суммируются
+    assert first.unexpected_series == 2
+    assert first.visibility.count == 2
+
+
+def test_verification_result_dict_round_trip():
+    result = _verification(expected=10, visible=9, first_visible=8, lines=10, acknowledged=10, polls=2,
+                           first_pass=0.25)
+    result.visibility.record(0.5)
+    result.queries.record(0.01, rows=3)
+    restored = VerificationResult.from_dict(result.to_dict())
+    assert restored.as_dict() == result.as_dict()
+
+
+def test_run_result_merges_verification():
+    first, second = RunResult(), RunResult()
+    second.verification = _verification(expected=10, visible=10)
+    first.merge(second)
+    assert first.verification.expected == 10
+    first.merge(RunResult())
+    assert first.verification.expected == 10
+    
+    restored = RunResult.from_dict(first.to_dict())
+    assert restored.verification.visible == 10
+
+
+@pytest.fixture
+def mock():
+    with MockInfluxDB(store=True) as server:
+        yield server
+
+
+def _tester(mock: MockInfluxDB) -> StressTester:
+    return StressTester(**mock.config(), server_stats_interval=0)
+
+
+def test_write_verified(mock):
+    tester = _tester(mock)
+    tester.create_db()
+    result = tester.write(nodes_count=3, duration=60, batch_size=50, seed=1, verify=Verification(timeout=1))
+    verification = result.verification
+    # Четыре строки (датчика) в каждый момент, у каждой ещё поле q с той же меткой времени - одно значение на момент
+    assert verification.expected == 3 * 60 * (4 + 1)
+    assert verification.visible == verification.expected
+    assert (verification.lost, verification.extra, verification.unexpected_series) == (0, 0, 0)
+
+
+@pytest.mark.parametrize('schema', [None, Schema(tags=[('site', 2), ('device', 3)], measurements=2)])
+def test_node_shares_do_not_report_each_other(mock, schema):
+    # Как при распределённой нагрузке: каждый агент пишет и проверяет свою долю узлов одного шага
+    _tester(mock).create_db()
+    start_date = datetime.now()
+    merged = RunResult()
+    for share in ((0, 2), (2, 5)):
+        tester = _tester(mock)
+        with tester.as_agent(node_share=share):
+            merged.merge(tester.write(nodes_count=5, duration=20, batch_size=50, seed=1, start_date=start_date,
+                                      schema=schema, verify=Verification(timeout=1)))
+    
+    verification = merged.verification
+    assert verification.visible == verification.expected > 0
+    assert (verification.lost, verification.extra, verification.unexpected_series) == (0, 0, 0)
+
+
+def test_foreign_series_reported(mock):
+    tester = _tester(mock)
+    tester.create_db()
+    start_date = datetime.now()
+    other = _tester(mock)
+    other.write(nodes_count=7, duration=20, seed=2, start_date=start_date)
+    
+    result = tester.write(nodes_count=5, duration=20, seed=1, start_date=start_date,
+                          verify=Verification(timeout=0))
+    verification = result.verification
+    assert verification.unexpected_series == 2
+    # Узлы 1-5 записаны дважды с разными значениями: более поздняя запись заменяет значения, а не добавляет
+    assert verification.extra == 0
+    assert verification.visible == verification.expected
@@ -0,0 +1,51 @@
+from threading import Thread
+
+import pytest
+
+from stress_tester import StressTester
+from stress_tester.mock_server import MockInfluxDB
+
+
+@pytest.fixture
+def mock():
+    with MockInfluxDB() as server:
+        yield server
+
+
+@pytest.mark.parametrize('batch_size', [None, 100])
+def test_stream_sends_same_points(mock, batch_size):
+    tester = StressTester(**mock.config(), server_stats_interval=0)
+    tester.create_db()
+    prepared = tester.write(nodes_count=3, duration=60, batch_size=batch_size, seed=1)
+    streamed = tester.write(nodes_count=3, duration=60, batch_size=batch_size, seed=1, stream=True)
+    assert streamed.points == prepared.points == 3 * 60 * 4
+    assert streamed.requests == prepared.requests
+    assert streamed.errors == 0
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_write_data_error_raised(mock, stream):
+    # Данные одного из узлов не удаётся сгенерировать: при stream - уже во время отправки тела запроса
+    tester = StressTester(**mock.config(), server_stats_interval=0)
+    tester.create_db()
+    node_lines = tester._node_lines
+    
+    def _failing_lines(node_name, *args):
+        yield from node_lines(node_name, *args)
+        if node_name.endswith('3'):
+            raise RuntimeError('Ошибка генерации данных')
+    
+    tester._node_lines = _failing_lines
+    outcome = {}
+    
+    def _write():
+        try:
+            tester.write(nodes_count=4, duration=30, stream=stream)
+        except BaseException as ex:
+            outcome['error'] = ex
+    
+    thread = Thread(target=_write, daemon=True)
+    thread.start()
+    thread.join(30)
+    assert not thread.is_alive(), 'Запись не завершилась'
+    assert isinstance(outcome.get('error'), RuntimeError)